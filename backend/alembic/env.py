@@ -10,7 +10,17 @@ from model.users.user import User
 from model.enable_banking.account import Account
 from model.enable_banking.balance import Balance
 from model.enable_banking.transaction import Transaction
+from model.enable_banking.sync_state import AccountSyncState
+from model.enable_banking.sync_dead_letter import SyncDeadLetter
+from model.enable_banking.sync_run import SyncRun
+from model.enable_banking.account_sync_run import AccountSyncRun
+from model.enable_banking.daily_account_summary import DailyAccountSummary
+from model.enable_banking.recurring_series import RecurringSeries
 from model.budgets.budget import Budget
+from model.budgets.budget_spend import BudgetSpend
+from model.budgets.budget_alert import BudgetAlert
+from model.notifications.outbound_email import OutboundEmail
+from model.categories.category_rule import CategoryRule
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
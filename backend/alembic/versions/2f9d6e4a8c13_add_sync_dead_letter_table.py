@@ -0,0 +1,42 @@
+"""Add sync dead letter table
+
+Revision ID: 2f9d6e4a8c13
+Revises: 8c3e5a1f6b27
+Create Date: 2026-10-18 11:37:45.921406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f9d6e4a8c13'
+down_revision: Union[str, None] = '8c3e5a1f6b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('syncdeadletter',
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('last_failed_at', sa.DateTime(), nullable=False),
+    sa.Column('next_retry_at', sa.DateTime(), nullable=True),
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id')
+    )
+    op.create_index(op.f('ix_syncdeadletter_id'), 'syncdeadletter', ['id'], unique=False)
+    op.create_index('ix_syncdeadletter_next_retry_at', 'syncdeadletter', ['next_retry_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_syncdeadletter_next_retry_at', table_name='syncdeadletter')
+    op.drop_index(op.f('ix_syncdeadletter_id'), table_name='syncdeadletter')
+    op.drop_table('syncdeadletter')
@@ -0,0 +1,34 @@
+"""Add transaction (account_id, reference) unique key
+
+Revision ID: 4b1f0c7e2d9a
+Revises: db92b04e8ed5
+Create Date: 2026-10-18 09:12:31.104522
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b1f0c7e2d9a'
+down_revision: Union[str, None] = 'db92b04e8ed5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the most recently updated row of any (account_id, reference) duplicates
+    op.execute("""
+        DELETE FROM transaction t
+        USING transaction d
+        WHERE t.account_id = d.account_id
+          AND t.reference = d.reference
+          AND (t.updated_on, t.id) < (d.updated_on, d.id)
+    """)
+    op.create_unique_constraint('uq_transaction_account_id_reference', 'transaction', ['account_id', 'reference'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_transaction_account_id_reference', 'transaction', type_='unique')
@@ -0,0 +1,81 @@
+"""Add sync run tables
+
+Revision ID: 5d7a9b3c1e60
+Revises: 2f9d6e4a8c13
+Create Date: 2026-10-18 13:02:18.640317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d7a9b3c1e60'
+down_revision: Union[str, None] = '2f9d6e4a8c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('syncrun',
+    sa.Column('trigger', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('duration_seconds', sa.Float(), nullable=True),
+    sa.Column('accounts', sa.Integer(), nullable=False),
+    sa.Column('failed_accounts', sa.Integer(), nullable=False),
+    sa.Column('pages', sa.Integer(), nullable=False),
+    sa.Column('upstream_requests', sa.Integer(), nullable=False),
+    sa.Column('rows_inserted', sa.Integer(), nullable=False),
+    sa.Column('rows_updated', sa.Integer(), nullable=False),
+    sa.Column('rows_skipped', sa.Integer(), nullable=False),
+    sa.Column('retries', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.Integer(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_syncrun_id'), 'syncrun', ['id'], unique=False)
+    op.create_index(op.f('ix_syncrun_started_at'), 'syncrun', ['started_at'], unique=False)
+    op.create_table('accountsyncrun',
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('duration_seconds', sa.Float(), nullable=False),
+    sa.Column('pages', sa.Integer(), nullable=False),
+    sa.Column('upstream_requests', sa.Integer(), nullable=False),
+    sa.Column('upstream_latency_p50_ms', sa.Float(), nullable=True),
+    sa.Column('upstream_latency_p95_ms', sa.Float(), nullable=True),
+    sa.Column('upstream_latency_p99_ms', sa.Float(), nullable=True),
+    sa.Column('rows_received', sa.Integer(), nullable=False),
+    sa.Column('rows_inserted', sa.Integer(), nullable=False),
+    sa.Column('rows_updated', sa.Integer(), nullable=False),
+    sa.Column('rows_skipped', sa.Integer(), nullable=False),
+    sa.Column('retries', sa.Integer(), nullable=False),
+    sa.Column('errors', sa.Integer(), nullable=False),
+    sa.Column('sync_run_id', sa.UUID(), nullable=True),
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['sync_run_id'], ['syncrun.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_accountsyncrun_id'), 'accountsyncrun', ['id'], unique=False)
+    op.create_index(op.f('ix_accountsyncrun_sync_run_id'), 'accountsyncrun', ['sync_run_id'], unique=False)
+    op.create_index(op.f('ix_accountsyncrun_started_at'), 'accountsyncrun', ['started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_accountsyncrun_started_at'), table_name='accountsyncrun')
+    op.drop_index(op.f('ix_accountsyncrun_sync_run_id'), table_name='accountsyncrun')
+    op.drop_index(op.f('ix_accountsyncrun_id'), table_name='accountsyncrun')
+    op.drop_table('accountsyncrun')
+    op.drop_index(op.f('ix_syncrun_started_at'), table_name='syncrun')
+    op.drop_index(op.f('ix_syncrun_id'), table_name='syncrun')
+    op.drop_table('syncrun')
@@ -0,0 +1,39 @@
+"""Add account sync state table
+
+Revision ID: 8c3e5a1f6b27
+Revises: 4b1f0c7e2d9a
+Create Date: 2026-10-18 10:04:12.553190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3e5a1f6b27'
+down_revision: Union[str, None] = '4b1f0c7e2d9a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('accountsyncstate',
+    sa.Column('last_booking_date', sa.Date(), nullable=True),
+    sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+    sa.Column('continuation_key', sa.String(), nullable=True),
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id')
+    )
+    op.create_index(op.f('ix_accountsyncstate_id'), 'accountsyncstate', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_accountsyncstate_id'), table_name='accountsyncstate')
+    op.drop_table('accountsyncstate')
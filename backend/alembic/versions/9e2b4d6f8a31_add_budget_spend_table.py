@@ -0,0 +1,51 @@
+"""Add budget spend table
+
+Revision ID: 9e2b4d6f8a31
+Revises: 5d7a9b3c1e60
+Create Date: 2026-10-18 14:21:09.318225
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e2b4d6f8a31'
+down_revision: Union[str, None] = '5d7a9b3c1e60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('budgetspend',
+    sa.Column('spent', sa.Float(), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.Column('reconciled_at', sa.DateTime(), nullable=True),
+    sa.Column('budget_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['budget_id'], ['budget.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('budget_id')
+    )
+    op.create_index(op.f('ix_budgetspend_id'), 'budgetspend', ['id'], unique=False)
+
+    # Seed the ledger of existing budgets from their transactions
+    op.execute("""
+        INSERT INTO budgetspend (id, budget_id, spent, transaction_count, reconciled_at, created_on, updated_on)
+        SELECT gen_random_uuid(), b.id, COALESCE(SUM(t.amount), 0), COUNT(t.id), now(), now(), now()
+        FROM budget b
+        LEFT JOIN transaction t
+          ON t.account_id = b.account_id
+         AND t.credit_debit_indicator = 'DBIT'
+         AND t.booking_date::date BETWEEN b.valid_from::timestamptz::date AND b.valid_until::timestamptz::date
+        GROUP BY b.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_budgetspend_id'), table_name='budgetspend')
+    op.drop_table('budgetspend')
@@ -0,0 +1,52 @@
+"""Add daily account summary table
+
+Revision ID: a8d4f1c6e357
+Revises: f3b5d7e9a026
+Create Date: 2026-10-18 17:55:41.802396
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d4f1c6e357'
+down_revision: Union[str, None] = 'f3b5d7e9a026'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('dailyaccountsummary',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('currency', sa.String(), nullable=False),
+    sa.Column('debit_total', sa.Float(), nullable=False),
+    sa.Column('credit_total', sa.Float(), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id', 'day', 'currency', name='uq_dailyaccountsummary_account_id_day_currency')
+    )
+    op.create_index(op.f('ix_dailyaccountsummary_id'), 'dailyaccountsummary', ['id'], unique=False)
+
+    # Backfill from the stored transactions
+    op.execute("""
+        INSERT INTO dailyaccountsummary (id, account_id, day, currency, debit_total, credit_total, transaction_count, created_on, updated_on)
+        SELECT gen_random_uuid(), account_id, booking_date, currency,
+               COALESCE(SUM(amount) FILTER (WHERE credit_debit_indicator = 'DBIT'), 0),
+               COALESCE(SUM(amount) FILTER (WHERE credit_debit_indicator IS DISTINCT FROM 'DBIT'), 0),
+               COUNT(*), now(), now()
+        FROM transaction
+        GROUP BY account_id, booking_date, currency
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_dailyaccountsummary_id'), table_name='dailyaccountsummary')
+    op.drop_table('dailyaccountsummary')
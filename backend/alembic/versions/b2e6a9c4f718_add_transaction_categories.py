@@ -0,0 +1,45 @@
+"""Add transaction categories
+
+Revision ID: b2e6a9c4f718
+Revises: a8d4f1c6e357
+Create Date: 2026-10-18 18:42:13.276590
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e6a9c4f718'
+down_revision: Union[str, None] = 'a8d4f1c6e357'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('categoryrule',
+    sa.Column('pattern', sa.String(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_categoryrule_id'), 'categoryrule', ['id'], unique=False)
+    op.create_index(op.f('ix_categoryrule_user_id'), 'categoryrule', ['user_id'], unique=False)
+
+    # Existing transactions are categorized afterwards with python -m utils.recategorize_transactions
+    op.add_column('transaction', sa.Column('category', sa.String(), nullable=True))
+    op.create_index('ix_transaction_account_id_category_booking_date', 'transaction', ['account_id', 'category', 'booking_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transaction_account_id_category_booking_date', table_name='transaction')
+    op.drop_column('transaction', 'category')
+    op.drop_index(op.f('ix_categoryrule_user_id'), table_name='categoryrule')
+    op.drop_index(op.f('ix_categoryrule_id'), table_name='categoryrule')
+    op.drop_table('categoryrule')
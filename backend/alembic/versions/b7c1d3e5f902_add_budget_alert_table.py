@@ -0,0 +1,39 @@
+"""Add budget alert table
+
+Revision ID: b7c1d3e5f902
+Revises: 9e2b4d6f8a31
+Create Date: 2026-10-18 15:10:52.007413
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c1d3e5f902'
+down_revision: Union[str, None] = '9e2b4d6f8a31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('budgetalert',
+    sa.Column('state', sa.String(), nullable=False),
+    sa.Column('notified_at', sa.DateTime(), nullable=True),
+    sa.Column('last_notified_amount', sa.Float(), nullable=True),
+    sa.Column('budget_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['budget_id'], ['budget.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('budget_id')
+    )
+    op.create_index(op.f('ix_budgetalert_id'), 'budgetalert', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_budgetalert_id'), table_name='budgetalert')
+    op.drop_table('budgetalert')
@@ -0,0 +1,45 @@
+"""Add outbound email table
+
+Revision ID: c4e8a2f6d193
+Revises: b7c1d3e5f902
+Create Date: 2026-10-18 16:02:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2f6d193'
+down_revision: Union[str, None] = 'b7c1d3e5f902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('outboundemail',
+    sa.Column('recipient', sa.String(), nullable=False),
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('digest_key', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('send_after', sa.DateTime(), nullable=False),
+    sa.Column('sent_at', sa.DateTime(), nullable=True),
+    sa.Column('latency_ms', sa.Float(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_outboundemail_id'), 'outboundemail', ['id'], unique=False)
+    op.create_index('ix_outboundemail_status_send_after', 'outboundemail', ['status', 'send_after'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outboundemail_status_send_after', table_name='outboundemail')
+    op.drop_index(op.f('ix_outboundemail_id'), table_name='outboundemail')
+    op.drop_table('outboundemail')
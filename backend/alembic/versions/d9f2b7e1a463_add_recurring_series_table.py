@@ -0,0 +1,50 @@
+"""Add recurring series table
+
+Revision ID: d9f2b7e1a463
+Revises: b2e6a9c4f718
+Create Date: 2026-10-18 19:26:50.913428
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f2b7e1a463'
+down_revision: Union[str, None] = 'b2e6a9c4f718'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('recurringseries',
+    sa.Column('counterparty', sa.String(), nullable=False),
+    sa.Column('category', sa.String(), nullable=True),
+    sa.Column('credit_debit_indicator', sa.String(), nullable=True),
+    sa.Column('currency', sa.String(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('period', sa.String(), nullable=False),
+    sa.Column('interval_days', sa.Float(), nullable=False),
+    sa.Column('regularity', sa.Float(), nullable=False),
+    sa.Column('occurrences', sa.Integer(), nullable=False),
+    sa.Column('first_date', sa.Date(), nullable=False),
+    sa.Column('last_date', sa.Date(), nullable=False),
+    sa.Column('next_expected_date', sa.Date(), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=False),
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), nullable=False),
+    sa.Column('updated_on', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['account.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recurringseries_account_id'), 'recurringseries', ['account_id'], unique=False)
+    op.create_index(op.f('ix_recurringseries_id'), 'recurringseries', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_recurringseries_id'), table_name='recurringseries')
+    op.drop_index(op.f('ix_recurringseries_account_id'), table_name='recurringseries')
+    op.drop_table('recurringseries')
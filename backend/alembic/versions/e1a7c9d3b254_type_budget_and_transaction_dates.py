@@ -0,0 +1,71 @@
+"""Type budget and transaction dates
+
+Revision ID: e1a7c9d3b254
+Revises: c4e8a2f6d193
+Create Date: 2026-10-18 16:48:19.640175
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a7c9d3b254'
+down_revision: Union[str, None] = 'c4e8a2f6d193'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('transaction', 'booking_date',
+               existing_type=sa.String(),
+               type_=sa.Date(),
+               existing_nullable=False,
+               postgresql_using='booking_date::date')
+    op.alter_column('transaction', 'transaction_date',
+               existing_type=sa.String(),
+               type_=sa.Date(),
+               existing_nullable=False,
+               postgresql_using='transaction_date::date')
+    # Budget windows were stored as "%Y-%m-%d %H:%M:%S%z" strings, which Postgres parses as timestamptz
+    op.alter_column('budget', 'valid_from',
+               existing_type=sa.String(),
+               type_=sa.DateTime(timezone=True),
+               existing_nullable=False,
+               postgresql_using='valid_from::timestamptz')
+    op.alter_column('budget', 'valid_until',
+               existing_type=sa.String(),
+               type_=sa.DateTime(timezone=True),
+               existing_nullable=False,
+               postgresql_using='valid_until::timestamptz')
+
+    op.create_index('ix_transaction_account_id_booking_date', 'transaction', ['account_id', sa.text('booking_date DESC')], unique=False)
+    op.create_index('ix_budget_active_valid_from_valid_until', 'budget', ['active', 'valid_from', 'valid_until'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_budget_active_valid_from_valid_until', table_name='budget')
+    op.drop_index('ix_transaction_account_id_booking_date', table_name='transaction')
+
+    op.alter_column('budget', 'valid_until',
+               existing_type=sa.DateTime(timezone=True),
+               type_=sa.String(),
+               existing_nullable=False,
+               postgresql_using="to_char(valid_until AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS\"+0000\"')")
+    op.alter_column('budget', 'valid_from',
+               existing_type=sa.DateTime(timezone=True),
+               type_=sa.String(),
+               existing_nullable=False,
+               postgresql_using="to_char(valid_from AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS\"+0000\"')")
+    op.alter_column('transaction', 'transaction_date',
+               existing_type=sa.Date(),
+               type_=sa.String(),
+               existing_nullable=False,
+               postgresql_using="to_char(transaction_date, 'YYYY-MM-DD')")
+    op.alter_column('transaction', 'booking_date',
+               existing_type=sa.Date(),
+               type_=sa.String(),
+               existing_nullable=False,
+               postgresql_using="to_char(booking_date, 'YYYY-MM-DD')")
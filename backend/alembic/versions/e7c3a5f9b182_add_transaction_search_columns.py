@@ -0,0 +1,42 @@
+"""Add transaction search columns
+
+Revision ID: e7c3a5f9b182
+Revises: d9f2b7e1a463
+Create Date: 2026-10-18 20:04:38.157362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c3a5f9b182'
+down_revision: Union[str, None] = 'd9f2b7e1a463'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(creditor_name, '') || ' ' || coalesce(debtor_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(remittance_information, '')), 'B')"
+)
+SEARCH_TEXT = "lower(coalesce(creditor_name, '') || ' ' || coalesce(debtor_name, '') || ' ' || coalesce(remittance_information, ''))"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Stored generated columns are computed for the existing rows when they are added
+    op.add_column('transaction', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True))
+    op.add_column('transaction', sa.Column('search_text', sa.Text(), sa.Computed(SEARCH_TEXT, persisted=True), nullable=True))
+    op.create_index('ix_transaction_search_vector', 'transaction', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_transaction_search_text_trgm', 'transaction', ['search_text'], unique=False, postgresql_using='gin', postgresql_ops={'search_text': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transaction_search_text_trgm', table_name='transaction', postgresql_using='gin')
+    op.drop_index('ix_transaction_search_vector', table_name='transaction', postgresql_using='gin')
+    op.drop_column('transaction', 'search_text')
+    op.drop_column('transaction', 'search_vector')
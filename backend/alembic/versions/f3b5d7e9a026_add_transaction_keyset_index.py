@@ -0,0 +1,29 @@
+"""Add transaction keyset index
+
+Revision ID: f3b5d7e9a026
+Revises: e1a7c9d3b254
+Create Date: 2026-10-18 17:21:05.334918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b5d7e9a026'
+down_revision: Union[str, None] = 'e1a7c9d3b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Saved transactions are paged on (booking_date, id), so the index carries the id as a tiebreaker
+    op.create_index('ix_transaction_account_id_booking_date_id', 'transaction', ['account_id', sa.text('booking_date DESC'), sa.text('id DESC')], unique=False)
+    op.drop_index('ix_transaction_account_id_booking_date', table_name='transaction')
+
+
+def downgrade() -> None:
+    op.create_index('ix_transaction_account_id_booking_date', 'transaction', ['account_id', sa.text('booking_date DESC')], unique=False)
+    op.drop_index('ix_transaction_account_id_booking_date_id', table_name='transaction')
@@ -0,0 +1,27 @@
+"""Add account source
+
+Revision ID: f8a2c6e4b391
+Revises: e7c3a5f9b182
+Create Date: 2026-10-18 23:12:47.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8a2c6e4b391'
+down_revision: Union[str, None] = 'e7c3a5f9b182'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every existing account was created from an Enable Banking session
+    op.add_column('account', sa.Column('source', sa.String(), server_default='enable_banking', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('account', 'source')
@@ -0,0 +1,205 @@
+"""
+Local stand-in for the Enable Banking endpoints used by the routers and the sync task.
+
+Run it with:
+    MOCK_LATENCY_MS=80 MOCK_PAGE_SIZE=200 uvicorn benchmarks.enable_banking_mock:app --port 8900
+
+Every response is generated from MOCK_SEED, the account id and the transaction index, so repeated
+runs see exactly the same data. Failures are injected with MOCK_ERROR_RATE (HTTP 500) and
+MOCK_RATE_LIMIT_RATE (HTTP 429 with Retry-After). GET /_stats returns the number of calls per endpoint.
+"""
+import asyncio
+import hashlib
+import os
+import random
+from collections import Counter
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+class MockConfig(BaseModel):
+    latency_ms: float = 50
+    page_size: int = 100
+    history_days: int = 730
+    transactions_per_day: int = 3
+    accounts_per_session: int = 2
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after: int = 1
+    end_date: date = date.today()
+    seed: int = 42
+
+    @staticmethod
+    def from_env() -> "MockConfig":
+        return MockConfig(
+            latency_ms=float(os.getenv('MOCK_LATENCY_MS', '50')),
+            page_size=int(os.getenv('MOCK_PAGE_SIZE', '100')),
+            history_days=int(os.getenv('MOCK_HISTORY_DAYS', '730')),
+            transactions_per_day=int(os.getenv('MOCK_TRANSACTIONS_PER_DAY', '3')),
+            accounts_per_session=int(os.getenv('MOCK_ACCOUNTS_PER_SESSION', '2')),
+            error_rate=float(os.getenv('MOCK_ERROR_RATE', '0')),
+            rate_limit_rate=float(os.getenv('MOCK_RATE_LIMIT_RATE', '0')),
+            retry_after=int(os.getenv('MOCK_RETRY_AFTER', '1')),
+            end_date=date.fromisoformat(os.getenv('MOCK_END_DATE', date.today().isoformat())),
+            seed=int(os.getenv('MOCK_SEED', '42')),
+        )
+
+
+CREDITORS = ["Konzum", "Lidl", "INA", "HEP", "A1 Hrvatska", "Netflix", "Spotify", "Bolt", "Wolt", "DM"]
+MERCHANT_CATEGORY_CODES = ["5411", "5411", "5541", "4900", "4814", "4899", "5815", "4121", "5812", "5912"]
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(title="Enable Banking mock", default_response_class=ORJSONResponse)
+    calls = Counter()
+    injected = Counter()
+    failure_random = random.Random(config.seed)
+
+    @app.middleware("http")
+    async def simulate_upstream(request: Request, call_next):
+        if request.url.path.startswith("/_stats"):
+            return await call_next(request)
+
+        calls[f"{request.method} {_endpoint_name(request.url.path)}"] += 1
+        await asyncio.sleep(config.latency_ms / 1000)
+
+        roll = failure_random.random()
+        if roll < config.rate_limit_rate:
+            injected["429"] += 1
+            return ORJSONResponse({"error": "TOO_MANY_REQUESTS"}, status_code=429, headers={"Retry-After": str(config.retry_after)})
+        if roll < config.rate_limit_rate + config.error_rate:
+            injected["500"] += 1
+            return ORJSONResponse({"error": "INTERNAL_ERROR"}, status_code=500)
+
+        return await call_next(request)
+
+    @app.get("/_stats")
+    async def get_stats():
+        return {"calls": dict(calls), "total_calls": sum(calls.values()), "injected": dict(injected)}
+
+    @app.post("/_stats/reset")
+    async def reset_stats():
+        calls.clear()
+        injected.clear()
+        return {"calls": {}}
+
+    @app.get("/aspsps")
+    async def get_aspsps(country: str = "HR"):
+        return {"aspsps": [{"name": "Mock ASPSP", "country": country, "psu_types": ["personal"]}]}
+
+    @app.get("/application")
+    async def get_application():
+        return {"name": "Smart Spend benchmark", "environment": "SANDBOX", "active": True}
+
+    @app.post("/auth")
+    async def start_authorization():
+        return {"url": "http://localhost:3000/callback?code=mock-code", "authorization_id": "mock-authorization"}
+
+    @app.post("/sessions")
+    async def create_session():
+        return _session("mock-session", config)
+
+    @app.get("/sessions/{session_id}")
+    async def get_session(session_id: str):
+        return _session(session_id, config)
+
+    @app.get("/accounts/{account_id}/details")
+    async def get_details(account_id: str):
+        return {
+            "all_account_ids": [],
+            "account_servicer": None,
+            "name": f"Account {account_id}",
+            "details": None,
+            "usage": "PRIV",
+            "cash_account_type": "CACC",
+            "product": "Current account",
+            "currency": "EUR",
+            "psu_status": None,
+            "credit_limit": None,
+            "uid": account_id,
+            "identification_hash": _digest(account_id),
+            "identification_hashes": [_digest(account_id)],
+        }
+
+    @app.get("/accounts/{account_id}/balances")
+    async def get_balances(account_id: str):
+        amount = f"{random.Random(f'{config.seed}:{account_id}').uniform(100, 10000):.2f}"
+        return {"balances": [{
+            "name": "Booked balance",
+            "balance_amount": {"currency": "EUR", "amount": amount},
+            "balance_type": "CLBD",
+            "last_change_date_time": None,
+            "reference_date": config.end_date.isoformat(),
+            "last_committed_transaction": None,
+        }]}
+
+    @app.get("/accounts/{account_id}/transactions")
+    async def get_transactions(account_id: str, date_from: Optional[date] = None, continuation_key: Optional[str] = None):
+        total = config.history_days * config.transactions_per_day
+        if date_from is not None:
+            # Transactions are ordered newest first, transactions_per_day per day
+            days = (config.end_date - date_from).days + 1
+            total = max(0, min(total, days * config.transactions_per_day))
+
+        offset = int(continuation_key) if continuation_key else 0
+        end = min(total, offset + config.page_size)
+
+        return {
+            "transactions": [_transaction(account_id, index, config) for index in range(offset, end)],
+            "continuation_key": str(end) if end < total else None,
+        }
+
+    return app
+
+
+def _transaction(account_id: str, index: int, config: MockConfig) -> dict:
+    generator = random.Random(f"{config.seed}:{account_id}:{index}")
+    booking_date = config.end_date - timedelta(days=index // config.transactions_per_day)
+    creditor = generator.randrange(len(CREDITORS))
+    is_debit = generator.random() < 0.85
+    # The most recent transactions of an account are still pending, and some of those are not booked on any date yet
+    is_pending = index < config.transactions_per_day
+    is_unbooked = is_pending and index % 2 == 0
+
+    return {
+        "entry_reference": f"{account_id}-{index}",
+        "transaction_id": _digest(f"{account_id}:{index}"),
+        "transaction_amount": {"currency": "EUR", "amount": f"{generator.uniform(1, 250 if is_debit else 3000):.2f}"},
+        "creditor": {"name": CREDITORS[creditor]} if is_debit else None,
+        "debtor": None if is_debit else {"name": "Employer d.o.o."},
+        "bank_transaction_code": {"code": "PMNT"},
+        "credit_debit_indicator": "DBIT" if is_debit else "CRDT",
+        "status": "PDNG" if is_pending else "BOOK",
+        "booking_date": None if is_unbooked else booking_date.isoformat(),
+        "transaction_date": booking_date.isoformat(),
+        "remittance_information": [f"Payment {index}"],
+        "merchant_category_code": MERCHANT_CATEGORY_CODES[creditor] if is_debit else None,
+    }
+
+
+def _session(session_id: str, config: MockConfig) -> dict:
+    return {
+        "session_id": session_id,
+        "accounts": [f"{session_id}-account-{index}" for index in range(config.accounts_per_session)],
+        "access": {"valid_until": (config.end_date + timedelta(days=90)).isoformat() + "T00:00:00+00:00"},
+    }
+
+
+def _endpoint_name(path: str) -> str:
+    parts = path.strip("/").split("/")
+    if parts[0] == "accounts" and len(parts) >= 3:
+        return f"/accounts/{{id}}/{parts[2]}"
+    if parts[0] == "sessions" and len(parts) >= 2:
+        return "/sessions/{id}"
+    return path
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha1(value.encode()).hexdigest()[:20]
+
+
+app = create_app(MockConfig.from_env())
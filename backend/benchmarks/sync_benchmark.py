@@ -0,0 +1,213 @@
+"""
+Measures synchronize_transactions against the local Enable Banking mock.
+
+    python -m benchmarks.sync_benchmark --users 50 --accounts-per-user 4 --latency-ms 80 --page-size 200
+
+The mock is started as a separate process, so the reported peak RSS belongs to the sync alone.
+Benchmark users and accounts are created in the database from DATABASE_URL and removed afterwards
+(unless --keep is given). synchronize_transactions synchronizes every account with a session,
+so point DATABASE_URL at a dedicated database.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+os.environ.setdefault('ENABLE_BANKING_RATE_LIMIT', '0')
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from sqlalchemy import event
+
+from database import SessionLocal, engine
+from model.enable_banking.account import Account
+from model.enable_banking.account_sync_run import AccountSyncRun
+from model.enable_banking.sync_dead_letter import SyncDeadLetter
+from model.enable_banking.sync_run import SyncRun
+from model.enable_banking.sync_state import AccountSyncState
+from model.enable_banking.transaction import Transaction
+from model.users.user import User
+from settings import settings
+from tasks.synchronize_transactions import synchronize_transactions
+
+BENCHMARK_PREFIX = "sync-benchmark"
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--accounts-per-user", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=None, help="defaults to SYNC_CONCURRENCY")
+    parser.add_argument("--runs", type=int, default=1, help="consecutive runs, later ones are incremental")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--history-days", type=int, default=730)
+    parser.add_argument("--transactions-per-day", type=int, default=3)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=0, help="mock port, a free one by default")
+    parser.add_argument("--keep", action="store_true", help="keep benchmark users, accounts and transactions")
+    return parser.parse_args()
+
+
+def main():
+    arguments = parse_arguments()
+    port = arguments.port or _free_port()
+
+    mock = _start_mock(arguments, port)
+    key_file = _write_signing_key()
+    settings.enable_banking_api_url = f"http://127.0.0.1:{port}"
+    settings.enable_banking_key_path = key_file
+
+    statements = Counter()
+    event.listen(engine, "before_cursor_execute", lambda *args, **kwargs: statements.update(["total"]))
+
+    account_pks = _seed(arguments)
+    try:
+        for run in range(1, arguments.runs + 1):
+            httpx.post(f"{settings.enable_banking_api_url}/_stats/reset")
+            statements.clear()
+
+            started_at = time.perf_counter()
+            if arguments.concurrency is None:
+                results = asyncio.run(synchronize_transactions())
+            else:
+                results = asyncio.run(synchronize_transactions(concurrency=arguments.concurrency))
+            elapsed = time.perf_counter() - started_at
+
+            stats = httpx.get(f"{settings.enable_banking_api_url}/_stats").json()
+            _report(run, results, elapsed, stats, statements["total"], account_pks)
+    finally:
+        if not arguments.keep:
+            _clean_up(account_pks)
+        mock.terminate()
+        mock.wait()
+        os.unlink(key_file)
+
+
+def _report(run: int, results: list, elapsed: float, stats: dict, statement_count: int, account_pks: list):
+    results = [result for result in results if result["account_id"] in account_pks]
+    received = sum(result["transactions_received"] for result in results)
+    inserted = sum(result["transactions_saved"] for result in results)
+    updated = sum(result["transactions_updated"] for result in results)
+    failed = sum(1 for result in results if result["status"] != "ok")
+    pages = sum(result["pages"] for result in results)
+    durations = sorted(result["duration_seconds"] for result in results) or [0.0]
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"--- run {run} ---")
+    print(f"accounts:             {len(results)} ({failed} failed)")
+    print(f"wall clock:           {elapsed:.2f} s")
+    print(f"transactions:         {received} received, {inserted} inserted, {updated} updated")
+    print(f"throughput:           {received / elapsed if elapsed else 0:.0f} transactions/s")
+    print(f"pages:                {pages}")
+    print(f"account duration:     p50 {durations[len(durations) // 2]:.2f} s, max {durations[-1]:.2f} s")
+    print(f"upstream calls:       {stats['total_calls']} {stats['calls']}")
+    print(f"injected failures:    {stats['injected']}")
+    print(f"db statements:        {statement_count}")
+    print(f"peak rss:             {peak_rss_mb:.1f} MB")
+
+
+def _seed(arguments) -> list:
+    db = SessionLocal()
+    try:
+        account_pks = []
+        for user_index in range(arguments.users):
+            user = User(
+                name=f"{BENCHMARK_PREFIX} user {user_index}",
+                username=f"{BENCHMARK_PREFIX}-{user_index}-{uuid.uuid4().hex[:8]}",
+                email=f"{BENCHMARK_PREFIX}-{user_index}-{uuid.uuid4().hex[:8]}@example.com",
+                password="",
+                eb_session_id=f"{BENCHMARK_PREFIX}-session-{user_index}",
+            )
+            db.add(user)
+            db.flush()
+
+            for account_index in range(arguments.accounts_per_user):
+                account = Account(account_id=f"{BENCHMARK_PREFIX}-{user_index}-{account_index}", user_id=user.id)
+                db.add(account)
+                db.flush()
+                account_pks.append(str(account.id))
+
+        db.commit()
+        return account_pks
+    finally:
+        db.close()
+
+
+def _clean_up(account_pks: list):
+    db = SessionLocal()
+    try:
+        user_ids = [row.user_id for row in db.query(Account.user_id).filter(Account.id.in_(account_pks)).distinct()]
+        sync_run_ids = [
+            row.sync_run_id for row in db.query(AccountSyncRun.sync_run_id).filter(AccountSyncRun.account_id.in_(account_pks)).distinct()
+            if row.sync_run_id is not None
+        ]
+        for model in (Transaction, AccountSyncState, SyncDeadLetter, AccountSyncRun):
+            db.query(model).filter(model.account_id.in_(account_pks)).delete(synchronize_session=False)
+        db.query(Account).filter(Account.id.in_(account_pks)).delete(synchronize_session=False)
+        db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        # Sync runs of the benchmark, unless they also synchronized accounts that are not its own
+        db.query(SyncRun) \
+            .filter(SyncRun.id.in_(sync_run_ids), ~SyncRun.account_runs.any()) \
+            .delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _start_mock(arguments, port: int) -> subprocess.Popen:
+    environment = {
+        **os.environ,
+        "MOCK_LATENCY_MS": str(arguments.latency_ms),
+        "MOCK_PAGE_SIZE": str(arguments.page_size),
+        "MOCK_HISTORY_DAYS": str(arguments.history_days),
+        "MOCK_TRANSACTIONS_PER_DAY": str(arguments.transactions_per_day),
+        "MOCK_ERROR_RATE": str(arguments.error_rate),
+        "MOCK_RATE_LIMIT_RATE": str(arguments.rate_limit_rate),
+        "MOCK_SEED": str(arguments.seed),
+    }
+    mock = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.enable_banking_mock:app", "--port", str(port), "--log-level", "warning"],
+        env=environment,
+    )
+
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/_stats")
+            return mock
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+    mock.terminate()
+    raise RuntimeError("Enable Banking mock did not start")
+
+
+def _write_signing_key() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    with tempfile.NamedTemporaryFile("wb", suffix=".pem", delete=False) as key_file:
+        key_file.write(key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        ))
+    return key_file.name
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+if __name__ == "__main__":
+    main()
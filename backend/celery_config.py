@@ -1,19 +1,29 @@
 import asyncio
 import os
-from datetime import datetime
 
-from celery import Celery
+from celery import Celery, chord
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
 
 import email_service
 from database import SessionLocal
-from model.budgets.budget import Budget
 from model.enable_banking.account import Account
-from model.enable_banking.transaction import Transaction
-from model.users.user import User
-from tasks.synchronize_transactions import synchronize_transactions
+from services.budget_alerts import evaluate_budget_alerts
+from services.budget_spending import reconcile_budget_spend
+from services.categorization import recategorize_transactions
+from services.email_outbox import enqueue_email, flush_email_outbox
+from services.enable_banking_client import close_enable_banking_client, start_token_refresher, stop_token_refresher
+from services.events import acknowledge_category_rules_changed, acknowledge_transactions_ingested
+from services.recurring_payments import claim_changed_accounts, detect_recurring_payments, mark_account_changed
+from services.response_cache import invalidate_account
+from services.sync_dead_letters import claim_due_dead_letters
+from services.sync_telemetry import finish_sync_run, start_sync_run
+from tasks.synchronize_transactions import get_accounts_to_synchronize, synchronize_account_by_id
 
 BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0')
+SYNC_ACCOUNT_MAX_RETRIES = int(os.getenv('SYNC_ACCOUNT_MAX_RETRIES', '3'))
+SYNC_ACCOUNT_RETRY_DELAY = int(os.getenv('SYNC_ACCOUNT_RETRY_DELAY', '60'))
+RECURRING_ACCOUNTS_PER_RUN = int(os.getenv('RECURRING_ACCOUNTS_PER_RUN', '200'))
 
 app = Celery(
     'tasks',
@@ -21,68 +31,221 @@ app = Celery(
     backend=BROKER_URL,
 )
 
+app.conf.task_routes = {
+    'flush_email_outbox': {'queue': 'email'},
+}
+
+_worker_loop = None
+
 app.conf.beat_schedule = {
     'synchronize_transactions': {
         'task': 'synchronize_transactions',
         'schedule': crontab(minute="0", hour="0"),
     },
+    'retry_dead_letters': {
+        'task': 'retry_dead_letters',
+        'schedule': crontab(minute="*/10"),
+    },
+    'reconcile_budget_spend': {
+        'task': 'reconcile_budget_spend',
+        'schedule': crontab(minute="30", hour="3"),
+    },
+    # Budgets are evaluated when their account receives transactions; this sweep is only a safety net
     'check-budgets': {
         'task': 'check_budgets',
-        'schedule': 20,
-    }
+        'schedule': crontab(minute="15"),
+    },
+    # Only accounts that received transactions since the previous run are analysed
+    'detect_recurring_payments': {
+        'task': 'detect_recurring_payments',
+        'schedule': crontab(minute="45"),
+    },
+    # Flushes are scheduled when messages are queued; this picks up retries and missed publishes
+    'flush_email_outbox': {
+        'task': 'flush_email_outbox',
+        'schedule': crontab(minute="*"),
+    },
 }
 
+def run_async(coroutine):
+    """
+    Runs a coroutine on this worker process' long-lived event loop, so that the shared
+    Enable Banking client keeps its pooled connections between tasks.
+    """
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop.run_until_complete(coroutine)
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    start_token_refresher()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    stop_token_refresher()
+    email_service.close_smtp_connection()
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        _worker_loop.run_until_complete(close_enable_banking_client())
+        _worker_loop.close()
+
+
 @app.task(name="synchronize_transactions")
 def synchronize_transactions_task():
-    asyncio.run(synchronize_transactions())
-    return "Started transactions synchronization."
+    db = SessionLocal()
+    try:
+        accounts = get_accounts_to_synchronize(db)
+        if not accounts:
+            return "No accounts to synchronize."
+        sync_run_id = start_sync_run(db, "beat")
+    finally:
+        db.close()
+
+    chord(
+        synchronize_account_task.s(str(account_pk), sync_run_id) for account_pk, _, _ in accounts
+    )(summarize_synchronization_task.s(sync_run_id))
+
+    return f"Dispatched synchronization of {len(accounts)} accounts."
+
+
+@app.task(name="synchronize_account", bind=True, max_retries=SYNC_ACCOUNT_MAX_RETRIES)
+def synchronize_account_task(self, account_pk: str, sync_run_id: str = None, retry: bool = True):
+    # Only the last attempt of the retry chain counts as one dead-letter attempt
+    will_retry = retry and self.request.retries < self.max_retries
+    result = run_async(synchronize_account_by_id(account_pk, sync_run_id, record_failure=not will_retry))
+
+    # Only this account is retried; the final failure is still returned so the chord completes
+    if result["status"] != "ok" and will_retry:
+        raise self.retry(countdown=SYNC_ACCOUNT_RETRY_DELAY * 2 ** self.request.retries)
+
+    return result
+
+
+@app.task(name="summarize_synchronization")
+def summarize_synchronization_task(results: list, sync_run_id: str):
+    db = SessionLocal()
+    try:
+        finish_sync_run(db, sync_run_id)
+    finally:
+        db.close()
+
+    failed = [result for result in results if result["status"] != "ok"]
+    saved = sum(result["transactions_saved"] for result in results)
+    updated = sum(result["transactions_updated"] for result in results)
+
+    for result in failed:
+        print(f"Synchronization of account {result['account_id']} failed: {result['error']}")
+
+    return f"Synchronized {len(results)} accounts ({len(failed)} failed), {saved} new and {updated} updated transactions."
+
+
+@app.task(name="retry_dead_letters")
+def retry_dead_letters_task():
+    db = SessionLocal()
+    try:
+        account_pks = claim_due_dead_letters(db)
+    finally:
+        db.close()
+
+    # The dead letter schedules its own backoff, so each retry is a single attempt
+    for account_pk in account_pks:
+        synchronize_account_task.delay(account_pk, retry=False)
+
+    return f"Retrying synchronization of {len(account_pks)} dead-lettered accounts."
+
+
+@app.task(name="transactions_ingested")
+def transactions_ingested_task(account_pk: str):
+    acknowledge_transactions_ingested(account_pk)
+    mark_account_changed(account_pk)
+    return check_budgets_task(account_pk)
 
 
 @app.task(name="check_budgets")
-def check_budgets_task():
+def check_budgets_task(account_pk: str = None):
+    db = SessionLocal()
+    total_emails_queued = 0
+    try:
+        transitions = evaluate_budget_alerts(db, account_pk)
+
+        for transition in transitions:
+            if not transition.should_notify:
+                continue
+            if transition.state == "exceeded":
+                subject = "Budget exceeded!"
+                content = f"Budget {transition.budget_name} of {transition.spending_limit} has been exceeded by {transition.spent - transition.spending_limit}."
+            else:
+                subject = "Budget almost reached!"
+                content = f"You have spent {transition.spent} of your budget {transition.budget_name} of {transition.spending_limit}."
+            enqueue_email(db, subject, content, transition.email, digest_key="budget_alert", commit=False)
+            total_emails_queued += 1
+
+        db.commit()
+    finally:
+        db.close()
+
+    return f"{len(transitions)} budget alert transitions, total {total_emails_queued} emails queued."
+
+
+@app.task(name="flush_email_outbox")
+def flush_email_outbox_task():
     db = SessionLocal()
-    total_emails_sent = 0
     try:
-        budgets = db.query(Budget).all()
-        filtered_budgets = [
-            budget for budget in budgets
-            if is_datetime_in_range(budget.valid_from, budget.valid_until)
-        ]
-
-        for budget in filtered_budgets:
-            transactions = db.query(Transaction).filter(Transaction.account_id == budget.account_id).all()
-            filtered_transactions = [
-                transaction for transaction in transactions
-                if is_date_in_range(budget.valid_from, budget.valid_until, transaction.booking_date)
-            ]
-            total = sum([float(transaction.transaction_amount) for transaction in filtered_transactions])
-
-            if total > budget.spending_limit:
-                account = db.query(Account).filter(Account.id == budget.account_id).first()
-                user = db.query(User).filter(User.id == account.user_id).first()
-                email_service.send_email("Budget exceeded!", f"Budget of {budget.spending_limit} has been exceeded by {total - budget.spending_limit}.", user.email)
-                total_emails_sent += 1
+        stats = flush_email_outbox(db)
+    finally:
+        db.close()
+
+    return f"{stats['sent']} emails sent and {stats['failed']} failed in {stats['deliveries']} deliveries."
 
+
+@app.task(name="reconcile_budget_spend")
+def reconcile_budget_spend_task():
+    db = SessionLocal()
+    try:
+        corrected = reconcile_budget_spend(db)
     finally:
         db.close()
-        return f"Total {total_emails_sent} emails sent."
+
+    if corrected:
+        print(f"Corrected spend ledger of {corrected} budgets")
+    return f"Reconciled budget spend ledgers, {corrected} corrected."
 
 
-def is_datetime_in_range(valid_from: str, valid_until: str) -> bool:
-    valid_from_dt = datetime.fromisoformat(valid_from)
-    valid_until_dt = datetime.fromisoformat(valid_until)
+@app.task(name="recategorize_transactions")
+def recategorize_transactions_task(user_id: str):
+    acknowledge_category_rules_changed(user_id)
 
-    current_dt = datetime.now(valid_from_dt.tzinfo)
+    db = SessionLocal()
+    try:
+        changed = recategorize_transactions(db, user_id)
+        account_pks = [row.id for row in db.query(Account.id).filter(Account.user_id == user_id)]
+    finally:
+        db.close()
 
-    return valid_from_dt <= current_dt <= valid_until_dt
+    if changed:
+        for account_pk in account_pks:
+            invalidate_account(account_pk)
+    return f"Recategorized transactions of user {user_id}, {changed} categories changed."
 
-def is_date_in_range(valid_from: str, valid_until: str, check_date: str) -> bool:
-    valid_from_dt = datetime.fromisoformat(valid_from)
-    valid_until_dt = datetime.fromisoformat(valid_until)
 
-    check_date_dt = datetime.strptime(check_date, "%Y-%m-%d").date()
+@app.task(name="detect_recurring_payments")
+def detect_recurring_payments_task():
+    account_pks = claim_changed_accounts(RECURRING_ACCOUNTS_PER_RUN)
 
-    valid_from_date = valid_from_dt.date()
-    valid_until_date = valid_until_dt.date()
+    db = SessionLocal()
+    detected = 0
+    try:
+        for account_pk in account_pks:
+            try:
+                detected += detect_recurring_payments(db, account_pk)
+            except Exception as e:
+                db.rollback()
+                mark_account_changed(account_pk)
+                print(f"Failed to detect recurring payments of account {account_pk}: {e}")
+    finally:
+        db.close()
 
-    return valid_from_date <= check_date_dt <= valid_until_date
\ No newline at end of file
+    return f"Detected {detected} recurring series in {len(account_pks)} accounts."
@@ -0,0 +1,8 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+class CreateStatementAccountRequest(BaseModel):
+    name: str
+    currency: str = "EUR"
+    account_servicer: Optional[str] = None
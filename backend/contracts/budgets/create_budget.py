@@ -1,8 +1,10 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 class CreateBudgetRequest(BaseModel):
     name: str
-    valid_from: str
-    valid_until: str
+    valid_from: datetime
+    valid_until: datetime
     spending_limit: float
     account_id: str
\ No newline at end of file
@@ -1,10 +1,12 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 class UpdateBudgetRequest(BaseModel):
     id: str
     name: str
-    valid_from: str
-    valid_until: str
+    valid_from: datetime
+    valid_until: datetime
     spending_limit: float
     active: bool
     account_id: str
\ No newline at end of file
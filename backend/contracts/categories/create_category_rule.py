@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+class CreateCategoryRuleRequest(BaseModel):
+    pattern: str
+    category: str
@@ -1,52 +1,50 @@
+import os
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from settings import settings
+from typing import Optional
 
-SENDGRID_API_KEY = settings.SENDGRID_API_KEY
-FROM_EMAIL = settings.FROM_EMAIL
+SMTP_HOST = os.getenv('SMTP_HOST', 'host.docker.internal')
+SMTP_PORT = int(os.getenv('SMTP_PORT', '25'))
+SMTP_FROM = os.getenv('SMTP_FROM', 'info@smartspend.com')
+SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', '10'))
 
-def send_email(subject: str, content: str, recipient_email: str):
+# SMTP connection of this process, reused by every message until the server drops it
+_smtp: Optional[smtplib.SMTP] = None
+
+
+def _connect() -> smtplib.SMTP:
+    global _smtp
+    if _smtp is None:
+        _smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    return _smtp
+
+
+def close_smtp_connection():
+    global _smtp
+    if _smtp is not None:
+        try:
+            _smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        _smtp = None
+
+
+def deliver_email(subject: str, content: str, recipient_email: str):
     """
-    # Check if necessary environment variables are present
-    if not SENDGRID_API_KEY or not FROM_EMAIL:
-        print("Error: Missing SendGrid API key or email addresses in environment variables.")
-        return 500
-    
-    sg = sendgrid.SendGridAPIClient(api_key=SENDGRID_API_KEY)
-    from_email = Email(FROM_EMAIL)
-    to_email = To(recipient_email)
-    content = Content("text/plain", content)
-    mail = Mail(from_email, to_email, subject, content)
-    
-    try:
-        response = sg.send(mail)
-        print(f"Email response: {response.status_code} - {response.body.decode('utf-8')}")
-        if response.status_code == 202:
-            return response.status_code
-        else:
-            print(f"Error response: {response.status_code} - {response.body.decode('utf-8')}")
-            return response.status_code
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return 500
+    Sends one message over the process' SMTP connection, reconnecting once if the server closed it.
+    Raises on failure, so that the caller can record and retry it.
     """
-    # Email configuration
-    smtp_server = "host.docker.internal"  # Change if your SMTP server runs on a different host
-    smtp_port = 25  # Default port for an SMTP server
-    from_email = "info@smartspend.com"
+    global _smtp
 
-    # Create the email
     msg = MIMEMultipart()
-    msg['From'] = from_email
+    msg['From'] = SMTP_FROM
     msg['To'] = recipient_email
     msg['Subject'] = subject
     msg.attach(MIMEText(content, 'plain'))
 
-    # Send the email
     try:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.sendmail(from_email, recipient_email, msg.as_string())
-            print("Email sent successfully!")
-    except Exception as e:
-        print(f"Failed to send email: {e}")
\ No newline at end of file
+        _connect().sendmail(SMTP_FROM, recipient_email, msg.as_string())
+    except (smtplib.SMTPServerDisconnected, ConnectionError):
+        _smtp = None
+        _connect().sendmail(SMTP_FROM, recipient_email, msg.as_string())
@@ -1,12 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from routers import base, users, enable_banking_authorization, enable_banking_accounts, budget_routes, tasks_routes, analytics, account_routes
+from routers import base, users, enable_banking_authorization, enable_banking_accounts, budget_routes, tasks_routes, analytics, account_routes, metrics, category_rules, recurring_payments
+from services.enable_banking_client import close_enable_banking_client, start_token_refresher, stop_token_refresher
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_token_refresher()
+    yield
+    stop_token_refresher()
+    await close_enable_banking_client()
 
 app = FastAPI(
     title="Smart Spend",
     description="API documentation for a college project created in the scope of IPVO course (Big Data Infrastructure)",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -25,3 +36,6 @@ app.include_router(budget_routes.router)
 app.include_router(tasks_routes.router)
 app.include_router(analytics.router)
 app.include_router(account_routes.router)
+app.include_router(metrics.router)
+app.include_router(category_rules.router)
+app.include_router(recurring_payments.router)
@@ -1,12 +1,16 @@
-from sqlalchemy import Column, ForeignKey, UUID, String, Float, Boolean
+from sqlalchemy import Column, ForeignKey, UUID, String, Float, Boolean, DateTime, Index
 from sqlalchemy.orm import relationship
 
 from model.common.entity import Entity
 
 class Budget(Entity):
+    __table_args__ = (
+        Index("ix_budget_active_valid_from_valid_until", "active", "valid_from", "valid_until"),
+    )
+
     name = Column(String)
-    valid_from = Column(String, nullable=False)
-    valid_until = Column(String, nullable=False)
+    valid_from = Column(DateTime(timezone=True), nullable=False)
+    valid_until = Column(DateTime(timezone=True), nullable=False)
     spending_limit = Column(Float, nullable=False)
     active = Column(Boolean, nullable=False)
     account_id = Column(UUID(as_uuid=True), ForeignKey('account.id'), nullable=False)
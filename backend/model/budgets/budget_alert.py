@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, Float, String, UUID, ForeignKey
+from sqlalchemy.orm import relationship, backref
+
+from model.common.entity import Entity
+
+class BudgetAlert(Entity):
+    state = Column(String, nullable=False, default="ok")
+    notified_at = Column(DateTime, nullable=True)
+    last_notified_amount = Column(Float, nullable=True)
+    budget_id = Column(UUID(as_uuid=True), ForeignKey('budget.id', ondelete='CASCADE'), unique=True, nullable=False)
+    budget = relationship("Budget", backref=backref("alert", uselist=False, passive_deletes=True))
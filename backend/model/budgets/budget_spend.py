@@ -0,0 +1,11 @@
+from sqlalchemy import Column, DateTime, Float, Integer, UUID, ForeignKey
+from sqlalchemy.orm import relationship, backref
+
+from model.common.entity import Entity
+
+class BudgetSpend(Entity):
+    spent = Column(Float, nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    reconciled_at = Column(DateTime, nullable=True)
+    budget_id = Column(UUID(as_uuid=True), ForeignKey('budget.id', ondelete='CASCADE'), unique=True, nullable=False)
+    budget = relationship("Budget", backref=backref("spend", uselist=False, passive_deletes=True))
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, UUID, ForeignKey
+from sqlalchemy.orm import relationship, backref
+
+from model.common.entity import Entity
+
+class CategoryRule(Entity):
+    pattern = Column(String, nullable=False)
+    category = Column(String, nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    user = relationship("User", backref=backref("category_rules", passive_deletes=True))
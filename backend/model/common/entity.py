@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from sqlalchemy import Column, DateTime, UUID, MetaData
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
@@ -22,7 +22,7 @@ class Entity:
         for key, value in self.__dict__.items():
             if key.startswith('_'):
                 continue
-            if isinstance(value, datetime):
+            if isinstance(value, (datetime, date)):
                 result[key] = value.isoformat()
             elif isinstance(value, uuid.UUID):
                 result[key] = str(value)
@@ -3,6 +3,10 @@ from sqlalchemy.orm import relationship
 
 from model.common.entity import Entity
 
+# Where the transactions of an account come from
+ENABLE_BANKING_SOURCE = "enable_banking"
+STATEMENT_SOURCE = "statement"
+
 
 class Account(Entity):
     account_id = Column(String, nullable=False)
@@ -19,6 +23,7 @@ class Account(Entity):
     uid = Column(String, nullable=True)
     identification_hash = Column(String, nullable=True)
     identification_hashes = Column(ARRAY(String), nullable=True)
+    source = Column(String, nullable=False, default=ENABLE_BANKING_SOURCE, server_default=ENABLE_BANKING_SOURCE)
 
     user_id = Column(UUID(as_uuid=True), ForeignKey('user.id'), nullable=False)
     user = relationship("User", backref="accounts")
\ No newline at end of file
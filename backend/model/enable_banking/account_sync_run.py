@@ -0,0 +1,27 @@
+from sqlalchemy import Column, DateTime, Float, Integer, String, UUID, ForeignKey
+from sqlalchemy.orm import relationship
+
+from model.common.entity import Entity
+
+
+class AccountSyncRun(Entity):
+    status = Column(String, nullable=False)
+    error = Column(String, nullable=True)
+    started_at = Column(DateTime, nullable=False, index=True)
+    duration_seconds = Column(Float, nullable=False)
+    pages = Column(Integer, nullable=False)
+    upstream_requests = Column(Integer, nullable=False)
+    upstream_latency_p50_ms = Column(Float, nullable=True)
+    upstream_latency_p95_ms = Column(Float, nullable=True)
+    upstream_latency_p99_ms = Column(Float, nullable=True)
+    rows_received = Column(Integer, nullable=False)
+    rows_inserted = Column(Integer, nullable=False)
+    rows_updated = Column(Integer, nullable=False)
+    rows_skipped = Column(Integer, nullable=False)
+    retries = Column(Integer, nullable=False)
+    errors = Column(Integer, nullable=False)
+
+    sync_run_id = Column(UUID(as_uuid=True), ForeignKey('syncrun.id'), nullable=True, index=True)
+    sync_run = relationship("SyncRun", backref="account_runs")
+    account_id = Column(UUID(as_uuid=True), ForeignKey('account.id', ondelete='CASCADE'), nullable=False)
+    account = relationship("Account", backref="sync_runs")
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Date, Float, Integer, String, UUID, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship, backref
+
+from model.common.entity import Entity
+
+
+class DailyAccountSummary(Entity):
+    __table_args__ = (
+        UniqueConstraint("account_id", "day", "currency", name="uq_dailyaccountsummary_account_id_day_currency"),
+    )
+
+    day = Column(Date, nullable=False)
+    currency = Column(String, nullable=False)
+    debit_total = Column(Float, nullable=False, default=0.0)
+    credit_total = Column(Float, nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+    account_id = Column(UUID(as_uuid=True), ForeignKey('account.id', ondelete='CASCADE'), nullable=False)
+    account = relationship("Account", backref=backref("daily_summaries", passive_deletes=True))
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Boolean, Date, Float, Integer, String, UUID, ForeignKey
+from sqlalchemy.orm import relationship, backref
+
+from model.common.entity import Entity
+
+
+class RecurringSeries(Entity):
+    counterparty = Column(String, nullable=False)
+    category = Column(String, nullable=True)
+    credit_debit_indicator = Column(String, nullable=True)
+    currency = Column(String, nullable=False)
+    amount = Column(Float, nullable=False)
+    period = Column(String, nullable=False)
+    interval_days = Column(Float, nullable=False)
+    regularity = Column(Float, nullable=False)
+    occurrences = Column(Integer, nullable=False)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    next_expected_date = Column(Date, nullable=False)
+    active = Column(Boolean, nullable=False)
+
+    account_id = Column(UUID(as_uuid=True), ForeignKey('account.id', ondelete='CASCADE'), nullable=False, index=True)
+    account = relationship("Account", backref=backref("recurring_series", passive_deletes=True))
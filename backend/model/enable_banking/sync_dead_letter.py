@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, Integer, String, UUID, ForeignKey
+from sqlalchemy.orm import relationship, backref
+
+from model.common.entity import Entity
+
+
+class SyncDeadLetter(Entity):
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String, nullable=True)
+    last_failed_at = Column(DateTime, nullable=False)
+    # NULL once the account ran out of automatic retries and has to be requeued manually
+    next_retry_at = Column(DateTime, nullable=True)
+
+    account_id = Column(UUID(as_uuid=True), ForeignKey('account.id'), unique=True, nullable=False)
+    account = relationship("Account", backref=backref("sync_dead_letter", uselist=False))
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Float, Integer, String
+
+from model.common.entity import Entity
+
+
+class SyncRun(Entity):
+    trigger = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="running")
+    started_at = Column(DateTime, nullable=False, index=True)
+    finished_at = Column(DateTime, nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    accounts = Column(Integer, nullable=False, default=0)
+    failed_accounts = Column(Integer, nullable=False, default=0)
+    pages = Column(Integer, nullable=False, default=0)
+    upstream_requests = Column(Integer, nullable=False, default=0)
+    rows_inserted = Column(Integer, nullable=False, default=0)
+    rows_updated = Column(Integer, nullable=False, default=0)
+    rows_skipped = Column(Integer, nullable=False, default=0)
+    retries = Column(Integer, nullable=False, default=0)
+    errors = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Date, DateTime, String, UUID, ForeignKey
+from sqlalchemy.orm import relationship, backref
+
+from model.common.entity import Entity
+
+
+class AccountSyncState(Entity):
+    last_booking_date = Column(Date, nullable=True)
+    last_synced_at = Column(DateTime, nullable=True)
+    continuation_key = Column(String, nullable=True)
+
+    account_id = Column(UUID(as_uuid=True), ForeignKey('account.id'), unique=True, nullable=False)
+    account = relationship("Account", backref=backref("sync_state", uselist=False))
@@ -1,13 +1,30 @@
-from sqlalchemy import Column, String, UUID, ForeignKey, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Date, String, Text, UUID, ForeignKey, Float, UniqueConstraint, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from model.common.entity import Entity
 
+# Searchable text of a transaction; counterparties weigh more than the remittance information.
+# The 'simple' configuration does not stem, since the texts mix Croatian, English and merchant codes.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(creditor_name, '') || ' ' || coalesce(debtor_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(remittance_information, '')), 'B')"
+)
+SEARCH_TEXT = "lower(coalesce(creditor_name, '') || ' ' || coalesce(debtor_name, '') || ' ' || coalesce(remittance_information, ''))"
+
 
 class Transaction(Entity):
+    __table_args__ = (
+        UniqueConstraint("account_id", "reference", name="uq_transaction_account_id_reference"),
+        Index("ix_transaction_account_id_booking_date_id", "account_id", text("booking_date DESC"), text("id DESC")),
+        Index("ix_transaction_account_id_category_booking_date", "account_id", "category", "booking_date"),
+        Index("ix_transaction_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_transaction_search_text_trgm", "search_text", postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"}),
+    )
+
     reference = Column(String, nullable=False)
-    booking_date = Column(String, nullable=False)
-    transaction_date = Column(String, nullable=False)
+    booking_date = Column(Date, nullable=False)
+    transaction_date = Column(Date, nullable=False)
     amount = Column(Float, nullable=False)
     currency = Column(String, nullable=False)
     credit_debit_indicator = Column(String, nullable=True)
@@ -17,6 +34,10 @@ class Transaction(Entity):
     creditor_name = Column(String, nullable=True)
     debtor_name = Column(String, nullable=True)
     bank_transaction_code = Column(String, nullable=True)
+    category = Column(String, nullable=True)
+    # Maintained by Postgres and only loaded when asked for
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR, persisted=True)))
+    search_text = deferred(Column(Text, Computed(SEARCH_TEXT, persisted=True)))
 
     account_id = Column(UUID(as_uuid=True), ForeignKey('account.id'), nullable=False)
     account = relationship("Account", backref="transactions")
\ No newline at end of file
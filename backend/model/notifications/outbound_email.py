@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Float, Integer, String, Text, Index
+
+from model.common.entity import Entity
+
+class OutboundEmail(Entity):
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    # Queued messages of a recipient sharing a digest key are delivered together as one digest
+    digest_key = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    send_after = Column(DateTime, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+    latency_ms = Column(Float, nullable=True)
+    error = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_outboundemail_status_send_after", "status", "send_after"),
+    )
@@ -1,8 +1,15 @@
+import uuid
+from typing import Optional
+
+from contracts.accounts.create_statement_account import CreateStatementAccountRequest
 from model.common.response import Response
-from model.enable_banking.account import Account
+from model.enable_banking.account import STATEMENT_SOURCE, Account
+from services.statement_import import import_statement
+from services.statement_parsers import StatementFormatError, detect_statement_format
 from utils.jwt_generator import JwtGenerator
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, Query, UploadFile
 from sqlalchemy.orm import Session
+from starlette import status
 from database import get_db
 
 router = APIRouter(
@@ -17,4 +24,70 @@ async def get_user_accounts(user_id: str = Depends(JwtGenerator.get_current_user
     accounts = db.query(Account).filter(Account.user_id == user_id).all()
     accounts_data = [account.to_dict() for account in accounts]
     
-    return response.success(accounts_data)
\ No newline at end of file
+    return response.success(accounts_data)
+
+@router.post("/")
+def create_statement_account(request: CreateStatementAccountRequest, user_id: str = Depends(JwtGenerator.get_current_user_id), db: Session = Depends(get_db)):
+    """
+    Creates an account for a bank that is not available through Enable Banking. Its transactions
+    are loaded by uploading statements, and it is never synchronized.
+    """
+    response = Response()
+
+    if not request.name.strip():
+        return response.with_error("Name must not be empty")
+
+    account_pk = uuid.uuid4()
+    account = Account(
+        id=account_pk,
+        account_id=str(account_pk),
+        name=request.name.strip(),
+        currency=request.currency.upper(),
+        account_servicer=request.account_servicer,
+        source=STATEMENT_SOURCE,
+        user_id=user_id,
+    )
+    db.add(account)
+    db.commit()
+    db.refresh(account)
+
+    return response.success(account.to_dict(), status.HTTP_201_CREATED)
+
+@router.post("/{account_id}/statements")
+def upload_statement(
+    account_id: str,
+    file: UploadFile = File(..., description="CAMT.053 XML, CSV or OFX bank statement"),
+    statement_format: Optional[str] = Query(None, alias="format", pattern="^(camt053|csv|ofx)$", description="Detected from the file by default"),
+    user_id: str = Depends(JwtGenerator.get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Imports the transactions of a bank statement into one of the user's statement accounts.
+    Transactions are matched on the reference the statement gives them, so uploading overlapping
+    statements of the same bank is safe. Synchronized accounts are refused: their transactions carry
+    Enable Banking references, which a statement's never match.
+    """
+    response = Response()
+
+    try:
+        uuid.UUID(account_id)
+    except ValueError:
+        return response.with_error(f"Invalid UUID: {account_id}")
+
+    account = db.query(Account).filter(Account.id == account_id, Account.user_id == user_id).first()
+    if account is None:
+        return response.with_error(f"Account {account_id} not found", status.HTTP_404_NOT_FOUND)
+
+    if account.source != STATEMENT_SOURCE:
+        return response.with_error(f"Account {account_id} is synchronized through Enable Banking, statements can only be imported into statement accounts", status.HTTP_409_CONFLICT)
+
+    if statement_format is None:
+        statement_format = detect_statement_format(file.filename, file.file.read(512))
+        file.file.seek(0)
+
+    try:
+        result = import_statement(db, account.id, file.file, statement_format, account.currency)
+    except StatementFormatError as e:
+        return response.with_error(str(e))
+
+    return response.success({**result.model_dump(), "skipped": result.skipped}, status.HTTP_201_CREATED)
@@ -1,48 +1,251 @@
-from fastapi import APIRouter, Depends
+import os
+import uuid
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
 from model.common.response import Response
 from model.enable_banking.account import Account
 from sqlalchemy.orm import Session
 from starlette import status
 from database import get_db
+from model.enable_banking.daily_account_summary import DailyAccountSummary
 from model.enable_banking.transaction import Transaction
+from sqlalchemy import Date, cast, func
+from services.response_cache import get_cached_response, set_cached_response
+from services import spending_statistics
 
 router = APIRouter(
     tags=["Analytics"],
     prefix="/api"
 )
 
+# Largest number of periods one response may cover, which bounds its size to periods x currencies
+ANALYTICS_MAX_PERIODS = int(os.getenv('ANALYTICS_MAX_PERIODS', '400'))
+# Range returned when date_from is not given
+DEFAULT_RANGE_DAYS = {"day": 90, "week": 182, "month": 365}
+# Longest history the spending statistics are computed over, and their default range
+STATISTICS_MAX_RANGE_DAYS = int(os.getenv('STATISTICS_MAX_RANGE_DAYS', '3660'))
+STATISTICS_DEFAULT_RANGE_DAYS = 365
+ROLLING_WINDOWS = (7, 30)
+
 @router.get("/accounts/{user_id}/analytics")
-async def get_account_analytics(user_id: str, db: Session = Depends(get_db)):
+async def get_account_analytics(
+    user_id: str,
+    granularity: str = Query("day", pattern="^(day|week|month)$", description="Length of the periods: day, week or month"),
+    date_from: Optional[date] = Query(None, description="First day to include, defaults to a granularity-dependent range"),
+    date_until: Optional[date] = Query(None, description="Last day to include, defaults to today"),
+    db: Session = Depends(get_db)
+):
     """
-    Returns the total spending (debits) and total income (credits) grouped by day for the given account.
+    Returns the total spending (debits) and total income (credits) of all the user's accounts,
+    grouped by period and currency. Aggregated by Postgres from the daily account rollup.
     """
     response = Response()
 
-    # Check if the account exists
-    account = db.query(Account).filter(Account.user_id == user_id).first()
-    if account is None:
+    try:
+        uuid.UUID(user_id)
+    except ValueError:
+        return response.with_error(f"Invalid UUID: {user_id}")
+
+    # Check if the user has any accounts
+    account_ids = [row.id for row in db.query(Account.id).filter(Account.user_id == user_id)]
+    if not account_ids:
         return response.with_error(f"Account with user_id {user_id} not found", status.HTTP_404_NOT_FOUND)
 
-    # Fetch transactions in a single query, filtering by account_id of the retrieved account
-    transactions = (
-        db.query(Transaction.booking_date, Transaction.transaction_amount, Transaction.credit_debit_indicator)
-        .filter(Transaction.account_id == account.id)  # Use account.account_id here
+    date_until = date_until or date.today()
+    date_from = date_from or date_until - timedelta(days=DEFAULT_RANGE_DAYS[granularity])
+    if date_from > date_until:
+        return response.with_error(f"date_from {date_from} is after date_until {date_until}")
+
+    if _count_periods(granularity, date_from, date_until) > ANALYTICS_MAX_PERIODS:
+        return response.with_error(f"The range from {date_from} to {date_until} has more than {ANALYTICS_MAX_PERIODS} periods of a {granularity}, narrow it or use a coarser granularity")
+
+    cache_key, cached = await get_cached_response("analytics", account_ids, user_id=user_id, granularity=granularity, date_from=date_from, date_until=date_until)
+    if cached is not None:
+        return response.success(cached)
+
+    period = cast(func.date_trunc(granularity, DailyAccountSummary.day), Date).label("period")
+    periods = (
+        db.query(
+            period,
+            DailyAccountSummary.currency,
+            func.sum(DailyAccountSummary.debit_total),
+            func.sum(DailyAccountSummary.credit_total),
+        )
+        .filter(
+            DailyAccountSummary.account_id.in_(account_ids),
+            DailyAccountSummary.day.between(date_from, date_until),
+        )
+        .group_by(period, DailyAccountSummary.currency)
+        .order_by(period, DailyAccountSummary.currency)
         .all()
     )
-    # Group and calculate analytics
-    analytics_data = {"debits": {}, "credits": {}}
-    for booking_date, amount, indicator in transactions:
-        day = booking_date
-        amount = float(amount)
-        key = "debits" if indicator == "DBIT" else "credits"
-        if day not in analytics_data[key]:
-            analytics_data[key][day] = 0
-        analytics_data[key][day] += amount
 
     # Format the response
     analytics_result = {
-        "debits": [{"day": day, "total_spent": total} for day, total in analytics_data["debits"].items()],
-        "credits": [{"day": day, "total_income": total} for day, total in analytics_data["credits"].items()],
+        "granularity": granularity,
+        "date_from": date_from,
+        "date_until": date_until,
+        "debits": [
+            {"day": day, "currency": currency, "total_spent": debit_total}
+            for day, currency, debit_total, credit_total in periods if debit_total
+        ],
+        "credits": [
+            {"day": day, "currency": currency, "total_income": credit_total}
+            for day, currency, debit_total, credit_total in periods if credit_total
+        ],
     }
 
+    await set_cached_response(cache_key, analytics_result)
     return response.success(analytics_result)
+
+@router.get("/accounts/{user_id}/analytics/categories")
+async def get_category_analytics(
+    user_id: str,
+    date_from: Optional[date] = Query(None, description="First day to include, defaults to a month before date_until"),
+    date_until: Optional[date] = Query(None, description="Last day to include, defaults to today"),
+    db: Session = Depends(get_db)
+):
+    """
+    Returns the spending (debits) of all the user's accounts per category and currency.
+    """
+    response = Response()
+
+    try:
+        uuid.UUID(user_id)
+    except ValueError:
+        return response.with_error(f"Invalid UUID: {user_id}")
+
+    account_ids = [row.id for row in db.query(Account.id).filter(Account.user_id == user_id)]
+    if not account_ids:
+        return response.with_error(f"Account with user_id {user_id} not found", status.HTTP_404_NOT_FOUND)
+
+    date_until = date_until or date.today()
+    date_from = date_from or date_until - timedelta(days=30)
+    if date_from > date_until:
+        return response.with_error(f"date_from {date_from} is after date_until {date_until}")
+
+    cache_key, cached = await get_cached_response("categories", account_ids, user_id=user_id, date_from=date_from, date_until=date_until)
+    if cached is not None:
+        return response.success(cached)
+
+    category = func.coalesce(Transaction.category, "other")
+    categories = (
+        db.query(category, Transaction.currency, func.sum(Transaction.amount), func.count())
+        .filter(
+            Transaction.account_id.in_(account_ids),
+            Transaction.credit_debit_indicator == "DBIT",
+            Transaction.booking_date.between(date_from, date_until),
+        )
+        .group_by(category, Transaction.currency)
+        .order_by(func.sum(Transaction.amount).desc())
+        .all()
+    )
+
+    result = {
+        "date_from": date_from,
+        "date_until": date_until,
+        "categories": [
+            {"category": name, "currency": currency, "total_spent": total, "transaction_count": count}
+            for name, currency, total, count in categories
+        ],
+    }
+
+    await set_cached_response(cache_key, result)
+    return response.success(result)
+
+@router.get("/accounts/{user_id}/analytics/rolling-averages")
+async def get_rolling_averages(
+    user_id: str,
+    date_from: Optional[date] = Query(None, description="First day to include, defaults to a year before date_until"),
+    date_until: Optional[date] = Query(None, description="Last day to include, defaults to today"),
+    currency: Optional[str] = Query(None, description="Only transactions in this currency"),
+    db: Session = Depends(get_db)
+):
+    """
+    Trailing 7- and 30-day average daily spending of all the user's accounts, for every day in the range.
+    """
+    # The series starts early enough for the first day's windows to be complete
+    lead_days = max(ROLLING_WINDOWS) - 1
+    return await _spending_statistics(
+        "rolling_averages", db, user_id, date_from, date_until, currency,
+        lambda series: spending_statistics.rolling_averages(series, ROLLING_WINDOWS, lead_days),
+        lead_days=lead_days, max_range_days=ANALYTICS_MAX_PERIODS,
+    )
+
+@router.get("/accounts/{user_id}/analytics/weekdays")
+async def get_weekday_profile(
+    user_id: str,
+    date_from: Optional[date] = Query(None, description="First day to include, defaults to a year before date_until"),
+    date_until: Optional[date] = Query(None, description="Last day to include, defaults to today"),
+    currency: Optional[str] = Query(None, description="Only transactions in this currency"),
+    db: Session = Depends(get_db)
+):
+    """
+    Total and average spending per weekday of all the user's accounts.
+    """
+    return await _spending_statistics("weekdays", db, user_id, date_from, date_until, currency, spending_statistics.weekday_profile)
+
+@router.get("/accounts/{user_id}/analytics/transaction-sizes")
+async def get_transaction_sizes(
+    user_id: str,
+    date_from: Optional[date] = Query(None, description="First day to include, defaults to a year before date_until"),
+    date_until: Optional[date] = Query(None, description="Last day to include, defaults to today"),
+    currency: Optional[str] = Query(None, description="Only transactions in this currency"),
+    db: Session = Depends(get_db)
+):
+    """
+    Mean, median and percentiles of the user's individual debit transactions.
+    """
+    return await _spending_statistics("transaction_sizes", db, user_id, date_from, date_until, currency, spending_statistics.transaction_sizes)
+
+@router.get("/accounts/{user_id}/analytics/monthly")
+async def get_monthly_changes(
+    user_id: str,
+    date_from: Optional[date] = Query(None, description="First day to include, defaults to a year before date_until"),
+    date_until: Optional[date] = Query(None, description="Last day to include, defaults to today"),
+    currency: Optional[str] = Query(None, description="Only transactions in this currency"),
+    db: Session = Depends(get_db)
+):
+    """
+    Monthly spending and income of all the user's accounts, with month-over-month spending changes.
+    """
+    return await _spending_statistics("monthly", db, user_id, date_from, date_until, currency, spending_statistics.monthly_changes)
+
+async def _spending_statistics(name: str, db: Session, user_id: str, date_from: Optional[date], date_until: Optional[date], currency: Optional[str],
+                               compute, lead_days: int = 0, max_range_days: int = STATISTICS_MAX_RANGE_DAYS):
+    response = Response()
+
+    try:
+        uuid.UUID(user_id)
+    except ValueError:
+        return response.with_error(f"Invalid UUID: {user_id}")
+
+    account_ids = [row.id for row in db.query(Account.id).filter(Account.user_id == user_id)]
+    if not account_ids:
+        return response.with_error(f"Account with user_id {user_id} not found", status.HTTP_404_NOT_FOUND)
+
+    date_until = date_until or date.today()
+    date_from = date_from or date_until - timedelta(days=STATISTICS_DEFAULT_RANGE_DAYS)
+    if date_from > date_until:
+        return response.with_error(f"date_from {date_from} is after date_until {date_until}")
+    if (date_until - date_from).days + 1 > max_range_days:
+        return response.with_error(f"The range from {date_from} to {date_until} is longer than {max_range_days} days, narrow it")
+
+    cache_key, cached = await get_cached_response(f"statistics_{name}", account_ids, user_id=user_id, date_from=date_from, date_until=date_until, currency=currency)
+    if cached is not None:
+        return response.success(cached)
+
+    series = spending_statistics.load_spending_series(db, account_ids, date_from - timedelta(days=lead_days), date_until, currency)
+    result = {"date_from": date_from, "date_until": date_until, "currency": currency, name: compute(series)}
+
+    await set_cached_response(cache_key, result)
+    return response.success(result)
+
+def _count_periods(granularity: str, date_from: date, date_until: date) -> int:
+    if granularity == "day":
+        return (date_until - date_from).days + 1
+    if granularity == "week":
+        return (date_until - date_from).days // 7 + 2
+    return (date_until.year - date_from.year) * 12 + date_until.month - date_from.month + 1
@@ -1,6 +1,4 @@
 import uuid
-from datetime import datetime
-from typing import List
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
@@ -9,10 +7,13 @@ from starlette import status
 from contracts.budgets.create_budget import CreateBudgetRequest
 from contracts.budgets.update_budget import UpdateBudgetRequest
 from database import get_db
-from email_service import send_email
 from model.budgets.budget import Budget
+from model.budgets.budget_spend import BudgetSpend
 from model.common.response import Response
 from model.enable_banking.account import Account
+from services.budget_spending import recalculate_budget_spend
+from services.email_outbox import enqueue_email
+from services.response_cache import get_cached_response, invalidate_account_async, set_cached_response
 
 router = APIRouter(
     tags=["Budget"],
@@ -20,18 +21,12 @@ router = APIRouter(
 )
 
 @router.post("/notify-budget-exceeded")
-async def notify_budget_exceeded(budget: float, actual_spent: float):
+def notify_budget_exceeded(budget: float, actual_spent: float, db: Session = Depends(get_db)):
     if actual_spent > budget:
         subject = "Budget Exceeded!"
         content = f"You have exceeded your budget. Your set budget was ${budget} and you've spent ${actual_spent}."
-        status_code = send_email(subject, content, "leo@gmail.com")
-        
-        if status_code == 202:
-            return {"message": "Email sent successfully!"}
-        elif status_code == 500:
-            return {"message": "Failed to send email. Please check the server logs for details."}
-        else:
-            return {"message": f"Email sending failed with status code {status_code}."}
+        enqueue_email(db, subject, content, "leo@gmail.com", digest_key="budget_alert")
+        return {"message": "Email queued for delivery."}
     else:
         return {"message": "No action needed. Budget is within limits."}
 
@@ -48,15 +43,11 @@ async def create_budget(request: CreateBudgetRequest, db: Session = Depends(get_
     if account is None:
         return response.with_error(f"Account {request.account_id} not found", status.HTTP_404_NOT_FOUND)
 
-    try:
-        datetime.strptime(request.valid_from, "%Y-%m-%d %H:%M:%S%z")
-    except ValueError:
-        return response.with_error(f"Invalid valid_from: {request.valid_from}")
+    if request.valid_from.tzinfo is None or request.valid_until.tzinfo is None:
+        return response.with_error("valid_from and valid_until must include a time zone offset")
 
-    try:
-        datetime.strptime(request.valid_until, "%Y-%m-%d %H:%M:%S%z")
-    except ValueError:
-        return response.with_error(f"Invalid valid_until: {request.valid_until}")
+    if request.valid_from > request.valid_until:
+        return response.with_error(f"valid_from {request.valid_from} is after valid_until {request.valid_until}")
 
     if request.spending_limit <= 0:
         return response.with_error(f"Budget must be greater than zero: {request.spending_limit}")
@@ -74,10 +65,13 @@ async def create_budget(request: CreateBudgetRequest, db: Session = Depends(get_
         budget.name = request.name
 
     db.add(budget)
+    db.flush()
+    recalculate_budget_spend(db, budget.id)
     db.commit()
     db.refresh(budget)
+    await invalidate_account_async(budget.account_id)
 
-    return response.success(budget.to_dict(), status.HTTP_201_CREATED)
+    return response.success(_with_spend(db, budget), status.HTTP_201_CREATED)
 
 @router.put("/")
 async def update_budget(request: UpdateBudgetRequest, db: Session = Depends(get_db)):
@@ -101,15 +95,11 @@ async def update_budget(request: UpdateBudgetRequest, db: Session = Depends(get_
     if account is None:
         return response.with_error(f"Account {request.account_id} not found", status.HTTP_404_NOT_FOUND)
 
-    try:
-        datetime.strptime(request.valid_from, "%Y-%m-%d %H:%M:%S%z")
-    except ValueError:
-        return response.with_error(f"Invalid valid_from: {request.valid_from}")
+    if request.valid_from.tzinfo is None or request.valid_until.tzinfo is None:
+        return response.with_error("valid_from and valid_until must include a time zone offset")
 
-    try:
-        datetime.strptime(request.valid_until, "%Y-%m-%d %H:%M:%S%z")
-    except ValueError:
-        return response.with_error(f"Invalid valid_until: {request.valid_until}")
+    if request.valid_from > request.valid_until:
+        return response.with_error(f"valid_from {request.valid_from} is after valid_until {request.valid_until}")
 
     if request.spending_limit <= 0:
         return response.with_error(f"Budget must be greater than zero: {request.spending_limit}")
@@ -120,28 +110,40 @@ async def update_budget(request: UpdateBudgetRequest, db: Session = Depends(get_
     budget.active = request.active
     budget.name = request.name
 
+    db.flush()
+    recalculate_budget_spend(db, budget.id)
     db.commit()
     db.refresh(budget)
+    await invalidate_account_async(budget.account_id)
 
-    return response.success(budget.to_dict())
+    return response.success(_with_spend(db, budget))
 
 @router.get("/accounts/{account_id}")
 async def get_budgets(account_id: str, db: Session = Depends(get_db)):
     response = Response()
 
     try:
-        uuid.UUID(account_id)
+        # Canonical form, the one invalidation bumps the version of
+        account_id = str(uuid.UUID(account_id))
     except ValueError:
         return response.with_error(f"Invalid UUID: {account_id}")
 
+    cache_key, cached = await get_cached_response("budgets", [account_id])
+    if cached is not None:
+        return response.success(cached)
+
     account = db.query(Account).filter(Account.id == account_id).first()
     if account is None:
         return response.with_error(f"Account {account_id} not found", status.HTTP_404_NOT_FOUND)
 
-    budgets: List[Budget] = db.query(Budget).filter(Budget.account_id == account_id).all()
+    budgets = db.query(Budget, BudgetSpend.spent) \
+        .outerjoin(BudgetSpend, BudgetSpend.budget_id == Budget.id) \
+        .filter(Budget.account_id == account_id) \
+        .all()
 
-    budgets_serialized = [budget.to_dict() for budget in budgets]
+    budgets_serialized = [_serialize(budget, spent) for budget, spent in budgets]
 
+    await set_cached_response(cache_key, budgets_serialized)
     return response.success(budgets_serialized)
 
 @router.get("/{budget_id}")
@@ -153,11 +155,14 @@ async def get_budget(budget_id: str, db: Session = Depends(get_db)):
     except ValueError:
         return response.with_error(f"Invalid UUID: {budget_id}")
 
-    budget = db.query(Budget).filter(Budget.id == budget_id).first()
-    if budget is None:
+    row = db.query(Budget, BudgetSpend.spent) \
+        .outerjoin(BudgetSpend, BudgetSpend.budget_id == Budget.id) \
+        .filter(Budget.id == budget_id) \
+        .first()
+    if row is None:
         return response.with_error(f"Budget {budget_id} not found", status.HTTP_404_NOT_FOUND)
 
-    return response.success(budget.to_dict())
+    return response.success(_serialize(*row))
 
 @router.delete("/{budget_id}")
 async def delete_budget(budget_id: str, db: Session = Depends(get_db)):
@@ -172,7 +177,18 @@ async def delete_budget(budget_id: str, db: Session = Depends(get_db)):
     if budget is None:
         return response.with_error(f"Budget {budget_id} not found", status.HTTP_404_NOT_FOUND)
 
+    account_id = budget.account_id
     db.delete(budget)
     db.commit()
+    await invalidate_account_async(account_id)
+
+    return response.success(status_code=status.HTTP_204_NO_CONTENT)
+
+def _with_spend(db: Session, budget: Budget) -> dict:
+    spent = db.query(BudgetSpend.spent).filter(BudgetSpend.budget_id == budget.id).scalar()
+    return _serialize(budget, spent)
 
-    return response.success(status_code=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+def _serialize(budget: Budget, spent) -> dict:
+    budget_serialized = budget.to_dict()
+    budget_serialized["spent"] = spent or 0.0
+    return budget_serialized
\ No newline at end of file
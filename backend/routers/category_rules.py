@@ -0,0 +1,74 @@
+import uuid
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from starlette import status
+
+from contracts.categories.create_category_rule import CreateCategoryRuleRequest
+from database import get_db
+from model.categories.category_rule import CategoryRule
+from model.common.response import Response
+from services.categorization import CATEGORIES
+from services.events import publish_category_rules_changed_async
+from utils.jwt_generator import JwtGenerator
+
+router = APIRouter(
+    tags=["Categories"],
+    prefix="/api/categories"
+)
+
+@router.get("/")
+async def get_categories():
+    return Response().success(CATEGORIES)
+
+@router.get("/rules")
+async def get_category_rules(user_id: str = Depends(JwtGenerator.get_current_user_id), db: Session = Depends(get_db)):
+    response = Response()
+
+    rules = db.query(CategoryRule).filter(CategoryRule.user_id == user_id).order_by(CategoryRule.created_on).all()
+
+    return response.success([rule.to_dict() for rule in rules])
+
+@router.post("/rules")
+async def create_category_rule(request: CreateCategoryRuleRequest, user_id: str = Depends(JwtGenerator.get_current_user_id), db: Session = Depends(get_db)):
+    """
+    Adds a rule assigning a category to every transaction whose counterparty or remittance
+    information contains the pattern as a whole word. Rules take precedence over the built-in
+    categorization; the user's stored transactions are recategorized in the background.
+    """
+    response = Response()
+
+    if not request.pattern.strip():
+        return response.with_error("Pattern must not be empty")
+
+    if request.category not in CATEGORIES:
+        return response.with_error(f"Unknown category: {request.category}")
+
+    rule = CategoryRule(pattern=request.pattern.strip(), category=request.category, user_id=user_id)
+    db.add(rule)
+    db.commit()
+    db.refresh(rule)
+
+    await publish_category_rules_changed_async(user_id)
+
+    return response.success(rule.to_dict(), status.HTTP_201_CREATED)
+
+@router.delete("/rules/{rule_id}")
+async def delete_category_rule(rule_id: str, user_id: str = Depends(JwtGenerator.get_current_user_id), db: Session = Depends(get_db)):
+    response = Response()
+
+    try:
+        uuid.UUID(rule_id)
+    except ValueError:
+        return response.with_error(f"Invalid UUID: {rule_id}")
+
+    rule = db.query(CategoryRule).filter(CategoryRule.id == rule_id, CategoryRule.user_id == user_id).first()
+    if rule is None:
+        return response.with_error(f"Category rule {rule_id} not found", status.HTTP_404_NOT_FOUND)
+
+    db.delete(rule)
+    db.commit()
+
+    await publish_category_rules_changed_async(user_id)
+
+    return response.success(status_code=status.HTTP_204_NO_CONTENT)
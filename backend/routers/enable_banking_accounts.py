@@ -1,18 +1,23 @@
 from fastapi import APIRouter, Depends, Query
-import httpx
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from starlette import status
-from datetime import datetime
+import base64
+import uuid
+from datetime import date
 from typing import Optional
-from sqlalchemy import inspect
+from sqlalchemy import REAL, cast, func, inspect, or_, tuple_
 
 from database import get_db
 from model.enable_banking.account import Account
 from model.enable_banking.balance import Balance
 from model.enable_banking.transaction import Transaction
-from settings import settings
 from model.common.response import Response
-from utils.authorization_key import EnableBankingAuth
+from services.events import publish_transactions_ingested_async
+from services.response_cache import invalidate_account_async
+from services.transaction_export import EXPORT_FORMATS, export_transactions, is_parquet_available
+from services.transaction_ingestion import ingest_transactions
+from services.enable_banking_client import INTERACTIVE, get_enable_banking_client
 
 
 router = APIRouter(
@@ -23,17 +28,15 @@ router = APIRouter(
 @router.get("/accounts/{account_id}")
 async def get_account_details(account_id: str, db: Session = Depends(get_db)):
     response = Response()
-        
-    headers = {"Authorization": f"Bearer {EnableBankingAuth.get_enable_banking_jwt()}"}
 
     account = db.query(Account).filter(Account.account_id == account_id).first()
     if account is None:
         return response.with_error(f"Account {account_id} not found", status.HTTP_404_NOT_FOUND)
     
-    async with httpx.AsyncClient() as client:
-        eb_response = await client.get(f"{settings.enable_banking_api_url}/accounts/{account_id}/details", headers=headers)
-        if eb_response.is_error:
-            return response.with_error(eb_response.json(), eb_response.status_code)
+    client = get_enable_banking_client()
+    eb_response = await client.get(f"/accounts/{account_id}/details", extensions=INTERACTIVE)
+    if eb_response.is_error:
+        return response.with_error(eb_response.json(), eb_response.status_code)
 
     account.all_account_ids = eb_response.json()["all_account_ids"]
     account.account_servicer = eb_response.json()["account_servicer"]
@@ -58,16 +61,14 @@ async def get_account_details(account_id: str, db: Session = Depends(get_db)):
 async def get_account_balances(account_id: str, db: Session = Depends(get_db)):
     response = Response()
 
-    headers = {"Authorization": f"Bearer {EnableBankingAuth.get_enable_banking_jwt()}"}
-
     account = db.query(Account).filter(Account.account_id == account_id).first()
     if account is None:
         return response.with_error(f"Account {account_id} not found", status.HTTP_404_NOT_FOUND)
 
-    async with httpx.AsyncClient() as client:
-        eb_response = await client.get(f"{settings.enable_banking_api_url}/accounts/{account_id}/balances", headers=headers)
-        if eb_response.is_error:
-            return response.with_error(eb_response.json(), eb_response.status_code)
+    client = get_enable_banking_client()
+    eb_response = await client.get(f"/accounts/{account_id}/balances", extensions=INTERACTIVE)
+    if eb_response.is_error:
+        return response.with_error(eb_response.json(), eb_response.status_code)
 
     received_balances = eb_response.json()["balances"]
 
@@ -97,75 +98,37 @@ async def get_account_balances(account_id: str, db: Session = Depends(get_db)):
 async def get_account_transactions(account_id: str, db: Session = Depends(get_db)):
     response = Response()
 
-    headers = {"Authorization": f"Bearer {EnableBankingAuth.get_enable_banking_jwt()}"}
-
     account = db.query(Account).filter(Account.account_id == account_id).first()
     if account is None:
         return response.with_error(f"Account {account_id} not found", status.HTTP_404_NOT_FOUND)
 
-    async with httpx.AsyncClient() as client:
-        eb_response = await client.get(f"{settings.enable_banking_api_url}/accounts/{account_id}/transactions", headers=headers)
-        if eb_response.is_error:
-            return response.with_error(eb_response.json(), eb_response.status_code)
-
-    received_transactions = eb_response.json()["transactions"]
-
-    for received_transaction in received_transactions:
-        if db.query(Transaction).filter(Transaction.reference == (received_transaction["transaction_id"] or received_transaction["entry_reference"])).first() is not None:
-            continue
-
-        transaction = Transaction()
-        """
-        "id": raw_tx.get("transaction_id") or raw_tx.get("entry_reference"),
-        "booking_date": raw_tx.get("booking_date"),
-        "transaction_date": raw_tx.get("transaction_date"),
-        "amount": float(raw_tx["transaction_amount"]["amount"]),
-        "currency": raw_tx["transaction_amount"]["currency"],
-        "credit_debit_indicator": raw_tx["credit_debit_indicator"],
-        "status": raw_tx.get("status"),
-        "remittance_information": " ".join(raw_tx.get("remittance_information", [])),
-        "merchant_category_code": raw_tx.get("merchant_category_code"),
-        "creditor_name": raw_tx.get("creditor", {}).get("name"),
-        "debtor_name": raw_tx.get("debtor", {}).get("name"),
-        "bank_transaction_code": raw_tx.get("bank_transaction_code", {}).get("code"),
-        """
-        transaction.reference = received_transaction["transaction_id"] or received_transaction["entry_reference"]
-        transaction.booking_date = received_transaction["booking_date"]
-        transaction.transaction_date = received_transaction["transaction_date"]
-        transaction.amount = float(received_transaction["transaction_amount"]["amount"])
-        transaction.currency = received_transaction["transaction_amount"]["currency"]
-        transaction.credit_debit_indicator = received_transaction["credit_debit_indicator"]
-        transaction.status = received_transaction["status"]
-        transaction.remittance_information = " ".join(received_transaction.get("remittance_information", []))
-        transaction.merchant_category_code = received_transaction.get("merchant_category_code")
-        transaction.creditor_name = received_transaction.get("creditor", {}).get("name")
-        transaction.debtor_name = received_transaction.get("debtor", {}).get("name")
-        transaction.bank_transaction_code = received_transaction.get("bank_transaction_code", {}).get("code")
-
-
-        """ transaction.entry_reference = received_transaction["entry_reference"]
-        transaction.transaction_amount = received_transaction["transaction_amount"]["amount"]
-        transaction.transaction_currency = received_transaction["transaction_amount"]["currency"]
-        transaction.account_id = account.id
-        transaction.booking_date = received_transaction["booking_date"]
-        transaction.status = received_transaction["status"]
-        transaction.creditor_name = received_transaction["creditor"]["name"]
-        transaction.credit_debit_indicator = received_transaction["credit_debit_indicator"] """
-        db.add(transaction)
-        db.commit()
-        db.refresh(transaction)
+    client = get_enable_banking_client()
+    eb_response = await client.get(f"/accounts/{account_id}/transactions", extensions=INTERACTIVE)
+    if eb_response.is_error:
+        return response.with_error(eb_response.json(), eb_response.status_code)
+
+    ingested = ingest_transactions(db, account.id, eb_response.json()["transactions"])
+    if ingested.inserted or ingested.updated:
+        await invalidate_account_async(account.id)
+        await publish_transactions_ingested_async(account.id)
 
     return response.success(eb_response.json())
 
 @router.get("/accounts/{account_id}/saved-transactions")
 async def get_saved_transactions(
     account_id: str,
-    page: int = Query(1, ge=1, description="Page number"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    page: Optional[int] = Query(None, ge=1, description="Page number, for offset pagination instead of cursors"),
     page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
-    date_from: Optional[datetime] = Query(None, description="Filter transactions from this date"),
-    date_until: Optional[datetime] = Query(None, description="Filter transactions until this date"),
+    include_total: bool = Query(False, description="Count all matching transactions, always done with page"),
+    date_from: Optional[date] = Query(None, description="Filter transactions from this date"),
+    date_until: Optional[date] = Query(None, description="Filter transactions until this date"),
     db: Session = Depends(get_db)
 ):
+    """
+    Returns the account's transactions, newest first. Pages are keyed on (booking_date, id): pass the
+    returned next_cursor to get the next page, which costs the same however deep it is.
+    """
     response = Response()
 
     account = db.query(Account).filter(Account.account_id == account_id).first()
@@ -181,43 +144,164 @@ async def get_saved_transactions(
     if date_until:
         query = query.filter(Transaction.booking_date <= date_until)
 
-    # Calculate total count for pagination
-    total_count = query.count()
+    total_count = query.count() if include_total or page is not None else None
+
+    query = query.order_by(Transaction.booking_date.desc(), Transaction.id.desc())
 
-    # Apply pagination
-    transactions = query.order_by(Transaction.booking_date.desc()) \
-        .offset((page - 1) * page_size) \
-        .limit(page_size) \
-        .all()
+    if page is not None:
+        transactions = query.offset((page - 1) * page_size).limit(page_size).all()
+        has_more = page * page_size < total_count
+    else:
+        if cursor is not None:
+            try:
+                booking_date, transaction_id = _decode_cursor(cursor)
+                booking_date, transaction_id = date.fromisoformat(booking_date), uuid.UUID(transaction_id)
+            except ValueError:
+                return response.with_error(f"Invalid cursor: {cursor}")
+            query = query.filter(tuple_(Transaction.booking_date, Transaction.id) < tuple_(booking_date, transaction_id))
+
+        # One extra row tells whether there is a next page without counting
+        transactions = query.limit(page_size + 1).all()
+        has_more = len(transactions) > page_size
+        transactions = transactions[:page_size]
 
     # Convert transactions to dictionaries, excluding SQLAlchemy state
-    transaction_dicts = []
-    for transaction in transactions:
-        transaction_dict = {
-            "reference": transaction.reference, 
-            "booking_date": transaction.booking_date,
-            "transaction_date": transaction.transaction_date,
-            "amount": transaction.amount,
-            "currency": transaction.currency,
-            "credit_debit_indicator": transaction.credit_debit_indicator,
-            "status": transaction.status,
-            "remittance_information": transaction.remittance_information,
-            "merchant_category_code": transaction.merchant_category_code,
-            "creditor_name": transaction.creditor_name,
-            "debtor_name": transaction.debtor_name,
-            "bank_transaction_code": transaction.bank_transaction_code
-        }
-        transaction_dicts.append(transaction_dict)
+    transaction_dicts = [_serialize_transaction(transaction) for transaction in transactions]
+
+    pagination = {
+        "page_size": page_size,
+        "has_more": has_more,
+        "next_cursor": _encode_cursor(transactions[-1].booking_date.isoformat(), transactions[-1].id) if has_more and page is None else None,
+        "total_count": total_count,
+    }
+    if page is not None:
+        pagination["current_page"] = page
+        pagination["total_pages"] = (total_count + page_size - 1) // page_size
 
     # Format the response
     result = {
         "transactions": transaction_dicts,
+        "pagination": pagination,
+    }
+
+    return response.success(result)
+
+@router.get("/accounts/{account_id}/saved-transactions/search")
+async def search_saved_transactions(
+    account_id: str,
+    q: str = Query(..., min_length=2, max_length=200, description="Words or part of a merchant name or remittance text"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    page_size: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    amount_min: Optional[float] = Query(None, description="Only transactions of at least this amount"),
+    amount_max: Optional[float] = Query(None, description="Only transactions of at most this amount"),
+    date_from: Optional[date] = Query(None, description="Filter transactions from this date"),
+    date_until: Optional[date] = Query(None, description="Filter transactions until this date"),
+    db: Session = Depends(get_db)
+):
+    """
+    Searches the account's transactions by counterparty and remittance information, best matches first.
+    Whole words are matched through the full-text index and misspelled or partial words through the
+    trigram index; the rank combines both. Pages are keyed on (rank, id) like saved-transactions.
+    """
+    response = Response()
+
+    account = db.query(Account).filter(Account.account_id == account_id).first()
+    if account is None:
+        return response.with_error(f"Account {account_id} not found", status.HTTP_404_NOT_FOUND)
+
+    term = q.strip().lower()
+    search_query = func.websearch_to_tsquery("simple", term)
+    rank = func.ts_rank_cd(Transaction.search_vector, search_query) + func.word_similarity(term, Transaction.search_text)
+
+    query = db.query(Transaction, rank.label("rank")).filter(
+        Transaction.account_id == account.id,
+        or_(Transaction.search_vector.op("@@")(search_query), Transaction.search_text.op("%>")(term)),
+    )
+
+    if amount_min is not None:
+        query = query.filter(Transaction.amount >= amount_min)
+    if amount_max is not None:
+        query = query.filter(Transaction.amount <= amount_max)
+    if date_from:
+        query = query.filter(Transaction.booking_date >= date_from)
+    if date_until:
+        query = query.filter(Transaction.booking_date <= date_until)
+
+    if cursor is not None:
+        try:
+            cursor_rank, transaction_id = _decode_cursor(cursor)
+            cursor_rank, transaction_id = float(cursor_rank), uuid.UUID(transaction_id)
+        except ValueError:
+            return response.with_error(f"Invalid cursor: {cursor}")
+        # The rank is a real; comparing against the cursor as a real keeps equal ranks equal
+        query = query.filter(tuple_(rank, Transaction.id) < tuple_(cast(cursor_rank, REAL), transaction_id))
+
+    # One extra row tells whether there is a next page without counting
+    rows = query.order_by(rank.desc(), Transaction.id.desc()).limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    result = {
+        "transactions": [{**_serialize_transaction(transaction), "rank": transaction_rank} for transaction, transaction_rank in rows],
         "pagination": {
-            "current_page": page,
             "page_size": page_size,
-            "total_count": total_count,
-            "total_pages": (total_count + page_size - 1) // page_size
-        }
+            "has_more": has_more,
+            "next_cursor": _encode_cursor(repr(rows[-1].rank), rows[-1].Transaction.id) if has_more else None,
+        },
     }
 
-    return response.success(result)
\ No newline at end of file
+    return response.success(result)
+
+@router.get("/accounts/{account_id}/saved-transactions/export")
+async def export_saved_transactions(
+    account_id: str,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson|parquet)$", description="csv, ndjson or parquet"),
+    date_from: Optional[date] = Query(None, description="Export transactions from this date"),
+    date_until: Optional[date] = Query(None, description="Export transactions until this date"),
+    db: Session = Depends(get_db)
+):
+    """
+    Downloads the account's whole transaction history, oldest first. The file is streamed while it is
+    read from the database, so the export of any number of transactions takes constant memory.
+    """
+    response = Response()
+
+    account = db.query(Account).filter(Account.account_id == account_id).first()
+    if account is None:
+        return response.with_error(f"Account {account_id} not found", status.HTTP_404_NOT_FOUND)
+
+    if export_format == "parquet" and not is_parquet_available():
+        return response.with_error("Parquet export needs the pyarrow package", status.HTTP_501_NOT_IMPLEMENTED)
+
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        export_transactions(account.id, export_format, date_from, date_until),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions-{account_id}.{extension}"'},
+    )
+
+def _serialize_transaction(transaction: Transaction) -> dict:
+    return {
+        "reference": transaction.reference,
+        "booking_date": transaction.booking_date,
+        "transaction_date": transaction.transaction_date,
+        "amount": transaction.amount,
+        "currency": transaction.currency,
+        "credit_debit_indicator": transaction.credit_debit_indicator,
+        "status": transaction.status,
+        "remittance_information": transaction.remittance_information,
+        "merchant_category_code": transaction.merchant_category_code,
+        "creditor_name": transaction.creditor_name,
+        "debtor_name": transaction.debtor_name,
+        "bank_transaction_code": transaction.bank_transaction_code,
+        "category": transaction.category,
+    }
+
+
+def _encode_cursor(*values) -> str:
+    key = "|".join(str(value) for value in values)
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> list:
+    return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split("|")
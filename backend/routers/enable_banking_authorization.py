@@ -1,5 +1,4 @@
 from fastapi import APIRouter, Depends, Query
-import httpx
 import uuid
 from contracts.enable_banking.authorize_session_request import AuthorizeSessionRequest
 from database import get_db
@@ -7,11 +6,10 @@ from model.enable_banking.account import Account
 from model.users.user import User
 from utils.jwt_generator import JwtGenerator
 from contracts.enable_banking.start_authorization_request import Access, Aspsp, StartAuthorizationRequest
-from utils.authorization_key import EnableBankingAuth
+from services.enable_banking_client import INTERACTIVE, get_enable_banking_client
 from model.common.response import Response
 from datetime import datetime, timedelta
 import pytz
-from settings import settings
 from sqlalchemy.orm import Session
 
 router = APIRouter(
@@ -24,25 +22,22 @@ async def get_aspsps_list(country: str = Query(default="hr", max_length=2)):
     response = Response()
         
     params = {"country": country.upper()}
-    headers = {"Authorization": f"Bearer {EnableBankingAuth.get_enable_banking_jwt()}"}
-    
-    async with httpx.AsyncClient() as client:
-        eb_response = await client.get(f"{settings.enable_banking_api_url}/aspsps", headers=headers, params=params)
-        if eb_response.is_error:
-            return response.with_error(eb_response.json(), eb_response.status_code)    
+
+    client = get_enable_banking_client()
+    eb_response = await client.get("/aspsps", params=params, extensions=INTERACTIVE)
+    if eb_response.is_error:
+        return response.with_error(eb_response.json(), eb_response.status_code)
         
     return response.success(eb_response.json())
 
 @router.get("/application")
 async def get_application():
     response = Response()
-        
-    headers = {"Authorization": f"Bearer {EnableBankingAuth.get_enable_banking_jwt()}"}
-    
-    async with httpx.AsyncClient() as client:
-        eb_response = await client.get(f"{settings.enable_banking_api_url}/application", headers=headers)
-        if eb_response.is_error:
-            return response.with_error(eb_response.json(), eb_response.status_code)    
+
+    client = get_enable_banking_client()
+    eb_response = await client.get("/application", extensions=INTERACTIVE)
+    if eb_response.is_error:
+        return response.with_error(eb_response.json(), eb_response.status_code)
         
     return response.success(eb_response.json())
             
@@ -63,11 +58,10 @@ async def start_user_authorization(aspsp: Aspsp, user_id: str = Depends(JwtGener
         "state": user_id
     }
     
-    headers = {"Authorization": f"Bearer {EnableBankingAuth.get_enable_banking_jwt()}"}
-    async with httpx.AsyncClient() as client:
-        eb_response = await client.post(f"{settings.enable_banking_api_url}/auth", headers=headers, json=payload,)
-        if eb_response.is_error:
-            return response.with_error(eb_response.json(), eb_response.status_code)    
+    client = get_enable_banking_client()
+    eb_response = await client.post("/auth", json=payload, extensions=INTERACTIVE)
+    if eb_response.is_error:
+        return response.with_error(eb_response.json(), eb_response.status_code)
     
     return response.success(eb_response.json())
 
@@ -79,12 +73,10 @@ async def authorize_user_session(request: AuthorizeSessionRequest, db: Session =
         "code": request.authorization_code
     }
     
-    headers = {"Authorization": f"Bearer {EnableBankingAuth.get_enable_banking_jwt()}"}
-    
-    async with httpx.AsyncClient() as client:
-        eb_response = await client.post(f"{settings.enable_banking_api_url}/sessions", headers=headers, json=payload,)
-        if eb_response.is_error:
-            return response.with_error(eb_response.json(), eb_response.status_code)
+    client = get_enable_banking_client()
+    eb_response = await client.post("/sessions", json=payload, extensions=INTERACTIVE)
+    if eb_response.is_error:
+        return response.with_error(eb_response.json(), eb_response.status_code)
 
     user = db.query(User).filter(User.id == request.user_id).first()
 
@@ -98,13 +90,11 @@ async def authorize_user_session(request: AuthorizeSessionRequest, db: Session =
 @router.get("/session/{session_id}")
 async def get_session_data(session_id: str, user_id: str = Depends(JwtGenerator.get_current_user_id), db: Session = Depends(get_db)):
     response = Response()
-        
-    headers = {"Authorization": f"Bearer {EnableBankingAuth.get_enable_banking_jwt()}"}
-    
-    async with httpx.AsyncClient() as client:
-        eb_response = await client.get(f"{settings.enable_banking_api_url}/sessions/{session_id}", headers=headers)
-        if eb_response.is_error:
-            return response.with_error(eb_response.json(), eb_response.status_code)
+
+    client = get_enable_banking_client()
+    eb_response = await client.get(f"/sessions/{session_id}", extensions=INTERACTIVE)
+    if eb_response.is_error:
+        return response.with_error(eb_response.json(), eb_response.status_code)
 
     for account in eb_response.json()["accounts"]:
         if db.query(Account).filter(Account.account_id == account).first() == None:
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database import get_db
+from model.enable_banking.account_sync_run import AccountSyncRun
+from model.enable_banking.sync_run import SyncRun
+from model.notifications.outbound_email import OutboundEmail
+from services.metrics import MetricFamily, render_metrics
+from services.response_cache import get_cache_stats
+
+router = APIRouter(
+    tags=["Metrics"]
+)
+
+SLOWEST_ACCOUNTS = 10
+RUN_COUNTERS = ["accounts", "failed_accounts", "pages", "upstream_requests", "rows_inserted", "rows_updated", "rows_skipped", "retries", "errors"]
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(db: Session = Depends(get_db)):
+    """
+    Prometheus metrics of the latest finished sync run and of the account syncs and emails in the last 24 hours,
+    and the response cache counters.
+    """
+    families = []
+
+    last_run = db.query(SyncRun).filter(SyncRun.status == "finished").order_by(SyncRun.started_at.desc()).first()
+    if last_run is not None:
+        families.append(MetricFamily("smart_spend_sync_last_run_timestamp_seconds", "gauge", "Start of the latest finished sync run")
+                        .add(last_run.started_at.timestamp(), trigger=last_run.trigger))
+        families.append(MetricFamily("smart_spend_sync_last_run_duration_seconds", "gauge", "Duration of the latest finished sync run")
+                        .add(last_run.duration_seconds, trigger=last_run.trigger))
+        for counter in RUN_COUNTERS:
+            families.append(MetricFamily(f"smart_spend_sync_last_run_{counter}", "gauge", f"{counter.replace('_', ' ').capitalize()} of the latest finished sync run")
+                            .add(getattr(last_run, counter), trigger=last_run.trigger))
+
+    since = datetime.utcnow() - timedelta(hours=24)
+    recent = db.query(AccountSyncRun).filter(AccountSyncRun.started_at >= since)
+
+    runs_by_status = MetricFamily("smart_spend_sync_account_runs", "gauge", "Account syncs in the last 24 hours by status")
+    for sync_status, count in recent.with_entities(AccountSyncRun.status, func.count()).group_by(AccountSyncRun.status):
+        runs_by_status.add(count, status=sync_status)
+    families.append(runs_by_status)
+
+    quantiles = recent.with_entities(
+        func.percentile_cont(0.5).within_group(AccountSyncRun.duration_seconds),
+        func.percentile_cont(0.95).within_group(AccountSyncRun.duration_seconds),
+        func.percentile_cont(0.99).within_group(AccountSyncRun.duration_seconds),
+        func.percentile_cont(0.5).within_group(AccountSyncRun.upstream_latency_p50_ms),
+        func.percentile_cont(0.95).within_group(AccountSyncRun.upstream_latency_p95_ms),
+        func.percentile_cont(0.99).within_group(AccountSyncRun.upstream_latency_p99_ms),
+    ).one()
+    families.append(MetricFamily("smart_spend_sync_account_duration_seconds", "summary", "Account sync duration over the last 24 hours")
+                    .add(quantiles[0], quantile="0.5").add(quantiles[1], quantile="0.95").add(quantiles[2], quantile="0.99"))
+    families.append(MetricFamily("smart_spend_sync_upstream_latency_milliseconds", "summary", "Enable Banking latency over the last 24 hours, from per-account percentiles")
+                    .add(quantiles[3], quantile="0.5").add(quantiles[4], quantile="0.95").add(quantiles[5], quantile="0.99"))
+
+    totals = recent.with_entities(
+        func.coalesce(func.sum(AccountSyncRun.rows_inserted), 0),
+        func.coalesce(func.sum(AccountSyncRun.rows_skipped), 0),
+        func.coalesce(func.sum(AccountSyncRun.retries), 0),
+        func.coalesce(func.sum(AccountSyncRun.errors), 0),
+    ).one()
+    families.append(MetricFamily("smart_spend_sync_rows", "gauge", "Rows written by account syncs in the last 24 hours")
+                    .add(totals[0], result="inserted").add(totals[1], result="skipped"))
+    families.append(MetricFamily("smart_spend_sync_upstream_retries", "gauge", "Enable Banking retries in the last 24 hours").add(totals[2]))
+    families.append(MetricFamily("smart_spend_sync_errors", "gauge", "Errors of account syncs in the last 24 hours").add(totals[3]))
+
+    slowest = MetricFamily("smart_spend_sync_slowest_account_duration_seconds", "gauge", f"The {SLOWEST_ACCOUNTS} slowest account syncs of the last 24 hours")
+    for account_run in recent.order_by(AccountSyncRun.duration_seconds.desc()).limit(SLOWEST_ACCOUNTS):
+        slowest.add(account_run.duration_seconds, account_id=str(account_run.account_id))
+    families.append(slowest)
+
+    emails = db.query(OutboundEmail).filter(OutboundEmail.created_on >= since)
+
+    emails_by_status = MetricFamily("smart_spend_emails", "gauge", "Emails queued in the last 24 hours by status")
+    for email_status, count in emails.with_entities(OutboundEmail.status, func.count()).group_by(OutboundEmail.status):
+        emails_by_status.add(count, status=email_status)
+    families.append(emails_by_status)
+
+    latency = emails.filter(OutboundEmail.status == "sent").with_entities(
+        func.percentile_cont(0.5).within_group(OutboundEmail.latency_ms),
+        func.percentile_cont(0.95).within_group(OutboundEmail.latency_ms),
+        func.percentile_cont(0.99).within_group(OutboundEmail.latency_ms),
+    ).one()
+    families.append(MetricFamily("smart_spend_email_delivery_latency_milliseconds", "summary", "SMTP delivery latency over the last 24 hours")
+                    .add(latency[0], quantile="0.5").add(latency[1], quantile="0.95").add(latency[2], quantile="0.99"))
+
+    cache_requests = MetricFamily("smart_spend_response_cache_requests_total", "counter", "Cached response lookups by endpoint and result")
+    for namespace, counts in sorted((await get_cache_stats()).items()):
+        for result, count in counts.items():
+            cache_requests.add(count, endpoint=namespace, result=result)
+    families.append(cache_requests)
+
+    return PlainTextResponse(render_metrics(families), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,57 @@
+import uuid
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from starlette import status
+
+from database import get_db
+from model.common.response import Response
+from model.enable_banking.account import Account
+from model.enable_banking.recurring_series import RecurringSeries
+from services.recurring_payments import PERIODS
+
+router = APIRouter(
+    tags=["Recurring payments"],
+    prefix="/api"
+)
+
+@router.get("/accounts/{user_id}/recurring-payments")
+async def get_recurring_payments(
+    user_id: str,
+    include_inactive: bool = Query(False, description="Also return series whose next payment is overdue"),
+    db: Session = Depends(get_db)
+):
+    """
+    Returns the subscriptions, standing orders and other recurring payments detected in all the
+    user's accounts, ordered by their next expected date.
+    """
+    response = Response()
+
+    try:
+        uuid.UUID(user_id)
+    except ValueError:
+        return response.with_error(f"Invalid UUID: {user_id}")
+
+    account_ids = [row.id for row in db.query(Account.id).filter(Account.user_id == user_id)]
+    if not account_ids:
+        return response.with_error(f"Account with user_id {user_id} not found", status.HTTP_404_NOT_FOUND)
+
+    series = db.query(RecurringSeries) \
+        .filter(RecurringSeries.account_id.in_(account_ids)) \
+        .order_by(RecurringSeries.next_expected_date) \
+        .all()
+
+    # Accounts without new transactions are not analysed again, so whether a series is still
+    # running is decided against today rather than the date it was detected
+    tolerances = {name: tolerance for name, _, tolerance in PERIODS}
+    today = date.today()
+
+    result = []
+    for recurring in series:
+        recurring_dict = recurring.to_dict()
+        recurring_dict["active"] = recurring.next_expected_date + timedelta(days=tolerances.get(recurring.period, 0)) >= today
+        if recurring_dict["active"] or include_inactive:
+            result.append(recurring_dict)
+
+    return response.success(result)
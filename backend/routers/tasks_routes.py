@@ -1,6 +1,12 @@
+import uuid
+
 from fastapi import APIRouter, Depends
 from database import get_db
+from model.common.response import Response
+from model.enable_banking.sync_dead_letter import SyncDeadLetter
+from services.sync_dead_letters import requeue_dead_letter
 from sqlalchemy.orm import Session
+from starlette import status
 from tasks.synchronize_transactions import synchronize_transactions
 
 router = APIRouter(
@@ -10,4 +16,30 @@ router = APIRouter(
 
 @router.get("/fetch-transactions")
 async def fetch_transactions(db: Session = Depends(get_db)):
-    return await synchronize_transactions(db)
\ No newline at end of file
+    response = Response()
+
+    return response.success(await synchronize_transactions(db, trigger="api"))
+
+@router.get("/sync-dead-letters")
+async def get_sync_dead_letters(db: Session = Depends(get_db)):
+    response = Response()
+
+    dead_letters = db.query(SyncDeadLetter).order_by(SyncDeadLetter.last_failed_at.desc()).all()
+
+    return response.success([dead_letter.to_dict() for dead_letter in dead_letters])
+
+@router.post("/sync-dead-letters/{account_id}/requeue")
+async def requeue_sync_dead_letter(account_id: str, db: Session = Depends(get_db)):
+    response = Response()
+
+    try:
+        uuid.UUID(account_id)
+    except ValueError:
+        return response.with_error(f"Invalid UUID: {account_id}")
+
+    if db.query(SyncDeadLetter).filter(SyncDeadLetter.account_id == account_id).first() is None:
+        return response.with_error(f"Account {account_id} is not dead-lettered", status.HTTP_404_NOT_FOUND)
+
+    requeue_dead_letter(db, account_id)
+
+    return response.success(status_code=status.HTTP_204_NO_CONTENT)
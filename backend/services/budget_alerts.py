@@ -0,0 +1,102 @@
+import os
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from model.budgets.budget import Budget
+from model.budgets.budget_alert import BudgetAlert
+from model.budgets.budget_spend import BudgetSpend
+from model.enable_banking.account import Account
+from model.users.user import User
+
+BUDGET_WARNING_THRESHOLD = float(os.getenv('BUDGET_WARNING_THRESHOLD', '0.8'))
+BUDGET_EXCEEDED_THRESHOLD = float(os.getenv('BUDGET_EXCEEDED_THRESHOLD', '1.0'))
+
+# Alert states ordered by severity; an email is only sent when a budget moves to a more severe state
+STATES = ["ok", "warning", "exceeded"]
+
+
+class BudgetAlertTransition(BaseModel):
+    budget_id: str
+    budget_name: Optional[str]
+    spending_limit: float
+    spent: float
+    previous_state: str
+    state: str
+    email: str
+
+    @property
+    def should_notify(self) -> bool:
+        return STATES.index(self.state) > STATES.index(self.previous_state)
+
+
+def evaluate_budget_alerts(db: Session, account_pk=None) -> List[BudgetAlertTransition]:
+    """
+    Moves the alert state of every active, in-window budget (optionally of one account) to the state
+    its spend ledger is in, and returns the transitions this call made.
+    Only budgets whose state changed are loaded, together with their owner's email. Does not commit,
+    so that the caller can queue the notifications in the same transaction.
+    """
+    spent = BudgetSpend.spent
+    state = case(
+        (spent >= Budget.spending_limit * BUDGET_EXCEEDED_THRESHOLD, "exceeded"),
+        (spent >= Budget.spending_limit * BUDGET_WARNING_THRESHOLD, "warning"),
+        else_="ok",
+    )
+    previous_state = func.coalesce(BudgetAlert.state, "ok")
+
+    query = db.query(Budget.id, Budget.name, Budget.spending_limit, spent, previous_state.label("previous_state"), state.label("state"), User.email) \
+        .join(BudgetSpend, BudgetSpend.budget_id == Budget.id) \
+        .outerjoin(BudgetAlert, BudgetAlert.budget_id == Budget.id) \
+        .join(Account, Account.id == Budget.account_id) \
+        .join(User, User.id == Account.user_id) \
+        .filter(
+            Budget.active.is_(True),
+            Budget.valid_from <= func.now(),
+            Budget.valid_until >= func.now(),
+            state != previous_state,
+        )
+
+    if account_pk is not None:
+        query = query.filter(Budget.account_id == account_pk)
+
+    transitions = []
+    for row in query.all():
+        transition = BudgetAlertTransition(
+            budget_id=str(row.id),
+            budget_name=row.name,
+            spending_limit=row.spending_limit,
+            spent=row.spent,
+            previous_state=row.previous_state,
+            state=row.state,
+            email=row.email,
+        )
+        if _claim_transition(db, transition):
+            transitions.append(transition)
+
+    return transitions
+
+
+def _claim_transition(db: Session, transition: BudgetAlertTransition) -> bool:
+    """
+    Stores the new state only if the stored one is still the previous state, so that concurrent
+    evaluations of the same budget cannot both notify.
+    """
+    now = datetime.utcnow()
+    notified = {"notified_at": now, "last_notified_amount": transition.spent} if transition.should_notify else {}
+
+    statement = insert(BudgetAlert).values(
+        id=uuid.uuid4(), budget_id=transition.budget_id, state=transition.state, created_on=now, updated_on=now, **notified
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[BudgetAlert.budget_id],
+        set_={"state": statement.excluded.state, "updated_on": now, **notified},
+        where=BudgetAlert.state == transition.previous_state,
+    ).returning(BudgetAlert.id)
+
+    return db.execute(statement).first() is not None
@@ -0,0 +1,135 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, and_, cast, func, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Query, Session
+
+from model.budgets.budget import Budget
+from model.budgets.budget_spend import BudgetSpend
+from model.enable_banking.transaction import Transaction
+from services.response_cache import invalidate_account
+
+# (previous column values or None if the row is new, current column values) of a written transaction
+TransactionChange = Tuple[Optional[dict], dict]
+
+
+def spending_from_transactions(db: Session) -> Query:
+    """
+    Returns a query of (budget id, spent, transaction count) for every budget, computed from the raw
+    transactions: the debit transactions booked on its account within its window.
+    Aggregated by Postgres in a single statement. Used to seed and reconcile the spend ledger.
+    """
+    return db.query(
+        Budget.id,
+        func.coalesce(func.sum(Transaction.amount), 0.0).label("spent"),
+        func.count(Transaction.id).label("transaction_count"),
+    ) \
+        .outerjoin(Transaction, and_(
+            Transaction.account_id == Budget.account_id,
+            Transaction.credit_debit_indicator == "DBIT",
+            Transaction.booking_date.between(cast(Budget.valid_from, Date), cast(Budget.valid_until, Date)),
+        )) \
+        .group_by(Budget.id)
+
+
+def apply_budget_spend_changes(db: Session, account_pk, changes: List[TransactionChange]):
+    """
+    Adds the written transactions to, and removes their previous versions from, the ledger of every
+    budget of the account whose window contains them. Does not commit.
+    """
+    if not changes:
+        return
+
+    budgets = db.query(Budget.id, Budget.valid_from, Budget.valid_until).filter(Budget.account_id == account_pk).all()
+    if not budgets:
+        return
+
+    windows = [(budget.id, budget.valid_from.date(), budget.valid_until.date()) for budget in budgets]
+
+    deltas: Dict[uuid.UUID, List] = {}
+    for previous, current in changes:
+        for sign, row in ((-1, previous), (1, current)):
+            if row is None or row["credit_debit_indicator"] != "DBIT" or not row["booking_date"]:
+                continue
+
+            for budget_id, valid_from, valid_until in windows:
+                if valid_from <= row["booking_date"] <= valid_until:
+                    delta = deltas.setdefault(budget_id, [0.0, 0])
+                    delta[0] += sign * row["amount"]
+                    delta[1] += sign
+
+    deltas = {budget_id: delta for budget_id, delta in deltas.items() if delta[0] != 0 or delta[1] != 0}
+    if not deltas:
+        return
+
+    now = datetime.utcnow()
+    statement = insert(BudgetSpend).values([
+        {"id": uuid.uuid4(), "budget_id": budget_id, "spent": spent, "transaction_count": count, "created_on": now, "updated_on": now}
+        for budget_id, (spent, count) in deltas.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[BudgetSpend.budget_id],
+        set_={
+            "spent": BudgetSpend.spent + statement.excluded.spent,
+            "transaction_count": BudgetSpend.transaction_count + statement.excluded.transaction_count,
+            "updated_on": statement.excluded.updated_on,
+        },
+    ))
+
+
+def recalculate_budget_spend(db: Session, budget_id):
+    """
+    Recomputes the ledger of one budget from its transactions, e.g. after its window changed. Does not commit.
+    """
+    actual = spending_from_transactions(db).filter(Budget.id == budget_id).one()
+
+    now = datetime.utcnow()
+    statement = insert(BudgetSpend).values(
+        id=uuid.uuid4(), budget_id=budget_id, spent=actual.spent, transaction_count=actual.transaction_count,
+        reconciled_at=now, created_on=now, updated_on=now,
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[BudgetSpend.budget_id],
+        set_={
+            "spent": statement.excluded.spent,
+            "transaction_count": statement.excluded.transaction_count,
+            "reconciled_at": statement.excluded.reconciled_at,
+            "updated_on": statement.excluded.updated_on,
+        },
+    ))
+
+
+def reconcile_budget_spend(db: Session) -> int:
+    """
+    Verifies every ledger against the raw transactions and corrects the ones that drifted, dropping
+    the cached responses of their accounts. Returns the number of corrected budgets.
+    """
+    now = datetime.utcnow()
+    actual = spending_from_transactions(db).subquery()
+
+    missing = db.query(actual.c.id).outerjoin(BudgetSpend, BudgetSpend.budget_id == actual.c.id).filter(BudgetSpend.id.is_(None)).all()
+    for row in missing:
+        db.add(BudgetSpend(budget_id=row.id, spent=0.0, transaction_count=0))
+    db.flush()
+
+    corrected = db.execute(
+        update(BudgetSpend)
+        .where(BudgetSpend.budget_id == actual.c.id)
+        .where(or_(func.abs(BudgetSpend.spent - actual.c.spent) > 0.005, BudgetSpend.transaction_count != actual.c.transaction_count))
+        .values(spent=actual.c.spent, transaction_count=actual.c.transaction_count, updated_on=now)
+        .returning(BudgetSpend.budget_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    db.query(BudgetSpend).update({BudgetSpend.reconciled_at: now}, synchronize_session=False)
+    db.commit()
+
+    if corrected:
+        budget_ids = [row.budget_id for row in corrected]
+        for row in db.query(Budget.account_id).filter(Budget.id.in_(budget_ids)).distinct():
+            invalidate_account(row.account_id)
+
+    return len(corrected)
+
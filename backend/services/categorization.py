@@ -0,0 +1,179 @@
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from model.categories.category_rule import CategoryRule
+from model.enable_banking.account import Account
+from model.enable_banking.transaction import Transaction
+from services.text_matcher import KeywordMatcher
+
+CATEGORIZATION_BATCH_SIZE = 1000
+
+CATEGORIES = [
+    "groceries",
+    "restaurants",
+    "transport",
+    "fuel",
+    "travel",
+    "housing",
+    "utilities",
+    "telecom",
+    "subscriptions",
+    "shopping",
+    "health",
+    "entertainment",
+    "education",
+    "cash",
+    "fees",
+    "transfers",
+    "income",
+    "other",
+]
+
+# Merchant category codes (ISO 18245) by inclusive range
+MCC_RANGES = [
+    (3000, 3350, "travel"),         # airlines
+    (3351, 3500, "transport"),      # car rental
+    (3501, 3999, "travel"),         # lodging
+    (4011, 4131, "transport"),      # railways, commuter transport, taxis, buses
+    (4411, 4411, "travel"),         # cruise lines
+    (4511, 4582, "travel"),         # airlines and airports
+    (4722, 4722, "travel"),         # travel agencies
+    (4784, 4784, "transport"),      # tolls
+    (4812, 4816, "telecom"),
+    (4899, 4899, "subscriptions"),  # cable and streaming
+    (4900, 4900, "utilities"),
+    (5200, 5299, "housing"),        # home supply and hardware
+    (5300, 5399, "shopping"),       # wholesale and department stores
+    (5411, 5411, "groceries"),
+    (5412, 5499, "groceries"),      # food stores
+    (5541, 5542, "fuel"),
+    (5600, 5699, "shopping"),       # clothing
+    (5712, 5735, "shopping"),       # furniture, electronics, music
+    (5811, 5814, "restaurants"),
+    (5912, 5912, "health"),         # pharmacies
+    (5940, 5999, "shopping"),
+    (6010, 6011, "cash"),
+    (6012, 6012, "fees"),
+    (6536, 6540, "transfers"),
+    (7011, 7011, "travel"),
+    (7832, 7841, "entertainment"),  # cinemas, video
+    (7900, 7999, "entertainment"),
+    (8011, 8099, "health"),
+    (8211, 8299, "education"),
+]
+
+KEYWORDS = {
+    "groceries": ["lidl", "konzum", "spar", "interspar", "kaufland", "plodine", "tommy", "studenac", "eurospin", "billa", "aldi", "tesco", "carrefour", "rewe"],
+    "restaurants": ["mcdonald's", "mcdonalds", "burger king", "kfc", "wolt", "glovo", "uber eats", "restaurant", "restoran", "pizzeria", "caffe bar", "starbucks"],
+    "transport": ["uber", "bolt", "zet", "hž", "hz putnicki", "flixbus", "arriva", "parking", "hac", "autocesta"],
+    "fuel": ["ina", "petrol", "tifon", "crodux", "mol", "shell", "omv", "lukoil"],
+    "travel": ["ryanair", "croatia airlines", "easyjet", "wizz air", "booking.com", "airbnb", "hotel"],
+    "housing": ["ikea", "pevex", "bauhaus", "jysk", "rent", "najam", "stanarina"],
+    "utilities": ["hep", "gradska plinara", "vodoopskrba", "zagrebački holding", "čistoća", "elektra"],
+    "telecom": ["a1", "hrvatski telekom", "telemach", "vodafone", "iskon"],
+    "subscriptions": ["netflix", "spotify", "hbo max", "disney+", "youtube premium", "apple.com/bill", "google play", "amazon prime", "icloud"],
+    "shopping": ["amazon", "zalando", "aliexpress", "dm", "müller", "h&m", "zara", "emmezeta", "sancta domenica"],
+    "health": ["ljekarna", "pharmacy", "apoteka", "poliklinika", "dental"],
+    "entertainment": ["cinestar", "cinema", "steam", "playstation", "xbox", "ticketmaster", "entrio"],
+    "education": ["udemy", "coursera", "školarina", "tuition"],
+    "cash": ["atm", "bankomat", "cash withdrawal", "isplata gotovine"],
+    "fees": ["naknada", "bank fee", "provizija", "članarina banke"],
+    "transfers": ["revolut", "paypal", "wise", "keks pay", "aircash"],
+    "income": ["plaća", "placa", "salary", "payroll", "mirovina", "povrat poreza"],
+}
+
+_MCC_LOOKUP: Dict[int, str] = {code: category for low, high, category in MCC_RANGES for code in range(low, high + 1)}
+_KEYWORD_MATCHER = KeywordMatcher({keyword: category for category, keywords in KEYWORDS.items() for keyword in keywords})
+
+
+class TransactionClassifier:
+    """
+    Assigns a category to transactions, trying in order: the user's own rules, the merchant
+    category code, then known merchant and keyword names in the creditor or debtor name and in the
+    remittance information. Credits nothing matched are income, the rest is "other".
+    """
+
+    def __init__(self, rules: Iterable[CategoryRule] = ()):
+        rules = {rule.pattern: rule.category for rule in rules}
+        self._rule_matcher = KeywordMatcher(rules) if rules else None
+
+    def classify(self, row: dict) -> str:
+        counterparty = row.get("creditor_name") if row.get("credit_debit_indicator") == "DBIT" else row.get("debtor_name")
+        texts = [counterparty, row.get("remittance_information")]
+
+        if self._rule_matcher is not None:
+            category = _first_match(self._rule_matcher, texts)
+            if category is not None:
+                return category
+
+        category = _mcc_category(row.get("merchant_category_code"))
+        if category is not None:
+            return category
+
+        category = _first_match(_KEYWORD_MATCHER, texts)
+        if category is not None:
+            return category
+
+        return "other" if row.get("credit_debit_indicator") == "DBIT" else "income"
+
+    def classify_all(self, rows: Iterable[dict]):
+        """
+        Sets the "category" of every row in place.
+        """
+        for row in rows:
+            row["category"] = self.classify(row)
+
+
+def get_account_classifier(db: Session, account_pk) -> TransactionClassifier:
+    """
+    The classifier with the rules of the account's owner, loaded in one query.
+    """
+    rules = db.query(CategoryRule) \
+        .join(Account, Account.user_id == CategoryRule.user_id) \
+        .filter(Account.id == account_pk) \
+        .all()
+    return TransactionClassifier(rules)
+
+
+def recategorize_transactions(db: Session, user_id) -> int:
+    """
+    Reclassifies every transaction of the user's accounts, e.g. after their rules changed, in
+    batches of CATEGORIZATION_BATCH_SIZE. Only changed categories are written. Returns their number.
+    """
+    classifier = TransactionClassifier(db.query(CategoryRule).filter(CategoryRule.user_id == user_id).all())
+    columns = [Transaction.id, Transaction.category, Transaction.credit_debit_indicator, Transaction.creditor_name,
+               Transaction.debtor_name, Transaction.remittance_information, Transaction.merchant_category_code]
+
+    transactions = db.query(*columns) \
+        .join(Account, Account.id == Transaction.account_id) \
+        .filter(Account.user_id == user_id) \
+        .execution_options(yield_per=CATEGORIZATION_BATCH_SIZE)
+
+    changed: List[dict] = []
+    for transaction in transactions:
+        category = classifier.classify(transaction._asdict())
+        if category != transaction.category:
+            changed.append({"transaction_id": transaction.id, "new_category": category})
+
+    statement = update(Transaction).where(Transaction.id == bindparam("transaction_id")).values(category=bindparam("new_category"))
+    for start in range(0, len(changed), CATEGORIZATION_BATCH_SIZE):
+        db.connection().execute(statement, changed[start:start + CATEGORIZATION_BATCH_SIZE])
+    db.commit()
+
+    return len(changed)
+
+
+def _first_match(matcher: KeywordMatcher, texts: List[Optional[str]]) -> Optional[str]:
+    for text in texts:
+        category = matcher.find_longest(text)
+        if category is not None:
+            return category
+    return None
+
+
+def _mcc_category(merchant_category_code: Optional[str]) -> Optional[str]:
+    if not merchant_category_code or not merchant_category_code.isdigit():
+        return None
+    return _MCC_LOOKUP.get(int(merchant_category_code))
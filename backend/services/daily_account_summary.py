@@ -0,0 +1,87 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, insert as sql_insert, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from model.enable_banking.daily_account_summary import DailyAccountSummary
+from model.enable_banking.transaction import Transaction
+from services.budget_spending import TransactionChange
+
+
+def apply_daily_summary_changes(db: Session, account_pk, changes: List[TransactionChange]):
+    """
+    Adds the written transactions to, and removes their previous versions from, the account's
+    daily rollup rows. Does not commit.
+    """
+    deltas: Dict[Tuple, List] = {}
+    for previous, current in changes:
+        for sign, row in ((-1, previous), (1, current)):
+            if row is None or row["booking_date"] is None:
+                continue
+
+            delta = deltas.setdefault((row["booking_date"], row["currency"]), [0.0, 0.0, 0])
+            if row["credit_debit_indicator"] == "DBIT":
+                delta[0] += sign * row["amount"]
+            else:
+                delta[1] += sign * row["amount"]
+            delta[2] += sign
+
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    now = datetime.utcnow()
+    statement = insert(DailyAccountSummary).values([
+        {
+            "id": uuid.uuid4(), "account_id": account_pk, "day": day, "currency": currency,
+            "debit_total": debit, "credit_total": credit, "transaction_count": count, "created_on": now, "updated_on": now,
+        }
+        for (day, currency), (debit, credit, count) in deltas.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[DailyAccountSummary.account_id, DailyAccountSummary.day, DailyAccountSummary.currency],
+        set_={
+            "debit_total": DailyAccountSummary.debit_total + statement.excluded.debit_total,
+            "credit_total": DailyAccountSummary.credit_total + statement.excluded.credit_total,
+            "transaction_count": DailyAccountSummary.transaction_count + statement.excluded.transaction_count,
+            "updated_on": statement.excluded.updated_on,
+        },
+    ))
+
+
+def rebuild_daily_account_summary(db: Session, account_pk=None, commit: bool = True) -> int:
+    """
+    Recomputes the rollup of one account, or of every account, from the stored transactions in a
+    single transaction. Returns the number of rollup rows written. Commits unless `commit` is False.
+    """
+    now = datetime.utcnow()
+    is_debit = Transaction.credit_debit_indicator == "DBIT"
+
+    aggregated = select(
+        func.gen_random_uuid(),
+        Transaction.account_id,
+        Transaction.booking_date,
+        Transaction.currency,
+        func.coalesce(func.sum(Transaction.amount).filter(is_debit), 0.0),
+        func.coalesce(func.sum(Transaction.amount).filter(is_debit.isnot(True)), 0.0),
+        func.count(),
+        now,
+        now,
+    ).group_by(Transaction.account_id, Transaction.booking_date, Transaction.currency)
+
+    deleted = db.query(DailyAccountSummary)
+    if account_pk is not None:
+        aggregated = aggregated.where(Transaction.account_id == account_pk)
+        deleted = deleted.filter(DailyAccountSummary.account_id == account_pk)
+
+    deleted.delete(synchronize_session=False)
+    written = db.execute(sql_insert(DailyAccountSummary).from_select([
+        "id", "account_id", "day", "currency", "debit_total", "credit_total", "transaction_count", "created_on", "updated_on",
+    ], aggregated))
+    if commit:
+        db.commit()
+
+    return written.rowcount
@@ -0,0 +1,120 @@
+import os
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import List
+
+from sqlalchemy.orm import Session
+
+import email_service
+from model.notifications.outbound_email import OutboundEmail
+from services.events import publish_email_queued
+
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', '200'))
+EMAIL_DIGEST_WINDOW_SECONDS = int(os.getenv('EMAIL_DIGEST_WINDOW_SECONDS', '300'))
+EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', '5'))
+EMAIL_RETRY_DELAY = int(os.getenv('EMAIL_RETRY_DELAY', '60'))
+
+
+def enqueue_email(db: Session, subject: str, content: str, recipient: str, digest_key: str = None, commit: bool = True) -> OutboundEmail:
+    """
+    Queues a message for the email worker instead of sending it in the caller.
+    Messages with a digest key are held for EMAIL_DIGEST_WINDOW_SECONDS; everything queued for the
+    same recipient and key within that window is delivered as a single digest.
+    """
+    now = datetime.utcnow()
+    send_after = now
+    open_window = None
+
+    if digest_key is not None:
+        open_window = db.query(OutboundEmail.send_after) \
+            .filter(OutboundEmail.status == "queued", OutboundEmail.recipient == recipient, OutboundEmail.digest_key == digest_key) \
+            .order_by(OutboundEmail.send_after) \
+            .first()
+        send_after = open_window.send_after if open_window is not None else now + timedelta(seconds=EMAIL_DIGEST_WINDOW_SECONDS)
+
+    email = OutboundEmail(recipient=recipient, subject=subject, content=content, digest_key=digest_key,
+                          status="queued", attempts=0, send_after=send_after)
+    db.add(email)
+
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+
+    # A message joining an open digest window is sent by the flush already scheduled for that window
+    if open_window is None:
+        publish_email_queued((send_after - now).total_seconds())
+
+    return email
+
+
+def flush_email_outbox(db: Session) -> dict:
+    """
+    Delivers the due queued messages over one SMTP connection, coalescing digest messages per
+    recipient, and records the result and latency of every delivery. The claimed rows stay locked
+    until their results are committed, so concurrent flushes skip them.
+    """
+    now = datetime.utcnow()
+    emails = db.query(OutboundEmail) \
+        .filter(OutboundEmail.status == "queued", OutboundEmail.send_after <= now) \
+        .order_by(OutboundEmail.recipient, OutboundEmail.digest_key, OutboundEmail.send_after) \
+        .limit(EMAIL_BATCH_SIZE) \
+        .with_for_update(skip_locked=True) \
+        .all()
+
+    stats = {"messages": len(emails), "deliveries": 0, "sent": 0, "failed": 0}
+
+    for batch in _deliveries(emails):
+        stats["deliveries"] += 1
+        subject, content = _compose(batch)
+
+        started_at = time.perf_counter()
+        try:
+            email_service.deliver_email(subject, content, batch[0].recipient)
+            error = None
+        except Exception as e:
+            email_service.close_smtp_connection()
+            error = str(e)
+        latency_ms = round((time.perf_counter() - started_at) * 1000, 1)
+
+        for email in batch:
+            _record_delivery(email, error, latency_ms)
+        stats["sent" if error is None else "failed"] += len(batch)
+
+    db.commit()
+    return stats
+
+
+def _deliveries(emails: List[OutboundEmail]) -> List[List[OutboundEmail]]:
+    deliveries = []
+    for (recipient, digest_key), group in groupby(emails, key=lambda email: (email.recipient, email.digest_key)):
+        group = list(group)
+        if digest_key is None:
+            deliveries.extend([email] for email in group)
+        else:
+            deliveries.append(group)
+    return deliveries
+
+
+def _compose(batch: List[OutboundEmail]):
+    if len(batch) == 1:
+        return batch[0].subject, batch[0].content
+
+    subject = f"{len(batch)} updates from Smart Spend"
+    content = "\n\n".join(f"{email.subject}\n{email.content}" for email in batch)
+    return subject, content
+
+
+def _record_delivery(email: OutboundEmail, error: str, latency_ms: float):
+    email.attempts += 1
+    email.latency_ms = latency_ms
+    email.error = error
+
+    if error is None:
+        email.status = "sent"
+        email.sent_at = datetime.utcnow()
+    elif email.attempts >= EMAIL_MAX_ATTEMPTS:
+        email.status = "failed"
+    else:
+        email.send_after = datetime.utcnow() + timedelta(seconds=EMAIL_RETRY_DELAY * 2 ** (email.attempts - 1))
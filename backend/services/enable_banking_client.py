@@ -0,0 +1,198 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+from services.rate_limiter import enable_banking_rate_limiter
+from services.sync_telemetry import current_upstream_stats
+from settings import settings
+from utils.authorization_key import EnableBankingAuth
+
+ENABLE_BANKING_MAX_CONNECTIONS = int(os.getenv('ENABLE_BANKING_MAX_CONNECTIONS', '100'))
+ENABLE_BANKING_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('ENABLE_BANKING_MAX_KEEPALIVE_CONNECTIONS', '20'))
+ENABLE_BANKING_TIMEOUT = float(os.getenv('ENABLE_BANKING_TIMEOUT', '30'))
+ENABLE_BANKING_HTTP2 = os.getenv('ENABLE_BANKING_HTTP2', 'false').lower() == 'true'
+ENABLE_BANKING_MAX_ATTEMPTS = int(os.getenv('ENABLE_BANKING_MAX_ATTEMPTS', '5'))
+ENABLE_BANKING_BACKOFF_BASE = float(os.getenv('ENABLE_BANKING_BACKOFF_BASE', '0.5'))
+ENABLE_BANKING_BACKOFF_MAX = float(os.getenv('ENABLE_BANKING_BACKOFF_MAX', '60'))
+
+# Interactive routes should fail fast instead of keeping the user waiting through a long backoff
+INTERACTIVE = {"max_attempts": 2}
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# Requests that may be sent twice; others opt in with extensions={"idempotent": True}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Errors raised before the request reached Enable Banking, so any request can be retried after them
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_refresher: Optional[threading.Thread] = None
+_refresher_stop = threading.Event()
+
+
+class EnableBankingJwtAuth(httpx.Auth):
+    """
+    Adds the cached application JWT to every request sent to Enable Banking.
+    """
+
+    def auth_flow(self, request):
+        request.headers["Authorization"] = f"Bearer {EnableBankingAuth.get_enable_banking_jwt()}"
+        yield request
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """
+    Sends requests through the shared rate limiter and retries 429, 5xx and connection errors
+    with exponential backoff and full jitter, honoring Retry-After. Non-idempotent requests (POST
+    /sessions consumes the authorization code) are only retried on 429 and on errors raised before
+    they were sent. The number of attempts can be lowered per request with extensions={"max_attempts": n}.
+    Latencies, retries and errors are recorded into the current sync's UpstreamStats, if any.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        max_attempts = request.extensions.get("max_attempts", ENABLE_BANKING_MAX_ATTEMPTS)
+        idempotent = request.method in IDEMPOTENT_METHODS or request.extensions.get("idempotent", False)
+        stats = current_upstream_stats.get()
+
+        attempt = 0
+        while True:
+            attempt += 1
+            await enable_banking_rate_limiter.acquire()
+
+            started_at = time.perf_counter()
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                if stats is not None:
+                    stats.record((time.perf_counter() - started_at) * 1000, failed=True)
+                if attempt >= max_attempts or not (idempotent or isinstance(e, UNSENT_ERRORS)):
+                    raise
+                if stats is not None:
+                    stats.retries += 1
+                await asyncio.sleep(_backoff(attempt))
+                continue
+
+            if stats is not None:
+                stats.record((time.perf_counter() - started_at) * 1000, failed=response.status_code >= 400)
+
+            retryable = response.status_code == 429 or (idempotent and response.status_code in RETRYABLE_STATUS_CODES)
+            if not retryable or attempt >= max_attempts:
+                return response
+
+            delay = _retry_after(response) or _backoff(attempt)
+            await response.aclose()
+
+            if stats is not None:
+                stats.retries += 1
+            if response.status_code == 429:
+                await enable_banking_rate_limiter.pause(delay)
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def get_enable_banking_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide Enable Banking client. Requests are sent relative to the API URL,
+    reuse pooled keep-alive connections and are authorized automatically.
+    A client is bound to the event loop it was created on, so a new one is created if the loop changed.
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        transport = httpx.AsyncHTTPTransport(
+            http2=ENABLE_BANKING_HTTP2 and _is_http2_available(),
+            limits=httpx.Limits(
+                max_connections=ENABLE_BANKING_MAX_CONNECTIONS,
+                max_keepalive_connections=ENABLE_BANKING_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        )
+        _client = httpx.AsyncClient(
+            base_url=settings.enable_banking_api_url,
+            auth=EnableBankingJwtAuth(),
+            timeout=ENABLE_BANKING_TIMEOUT,
+            transport=ResilientTransport(transport),
+        )
+        _client_loop = loop
+
+    return _client
+
+
+async def close_enable_banking_client():
+    global _client, _client_loop
+
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+def start_token_refresher():
+    """
+    Signs the application JWT now and re-signs it in a background thread shortly before it expires,
+    so requests never pay for reading the key or signing.
+    """
+    global _refresher
+
+    if _refresher is not None and _refresher.is_alive():
+        return
+
+    EnableBankingAuth.refresh_enable_banking_jwt()
+
+    _refresher_stop.clear()
+    _refresher = threading.Thread(target=_refresh_token_periodically, name="enable-banking-jwt-refresher", daemon=True)
+    _refresher.start()
+
+
+def stop_token_refresher():
+    _refresher_stop.set()
+
+
+def _refresh_token_periodically():
+    while not _refresher_stop.wait(EnableBankingAuth.seconds_until_refresh()):
+        try:
+            EnableBankingAuth.refresh_enable_banking_jwt()
+        except Exception as e:
+            print(f"Failed to refresh Enable Banking JWT: {e}")
+            _refresher_stop.wait(30)
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(ENABLE_BANKING_BACKOFF_MAX, ENABLE_BANKING_BACKOFF_BASE * 2 ** attempt))
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+
+    return min(ENABLE_BANKING_BACKOFF_MAX, max(0.0, seconds))
+
+
+def _is_http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        print("ENABLE_BANKING_HTTP2 is set but the h2 package is not installed, falling back to HTTP/1.1")
+        return False
+    return True
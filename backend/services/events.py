@@ -0,0 +1,80 @@
+import asyncio
+import os
+
+from celery import Celery
+from redis.exceptions import RedisError
+
+from services.redis_client import get_redis
+
+EVENT_DEBOUNCE_SECONDS = int(os.getenv('EVENT_DEBOUNCE_SECONDS', '10'))
+
+_publisher = Celery('events', broker=os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0'))
+
+
+def publish_transactions_ingested(account_pk):
+    """
+    Announces that an account received new or changed transactions. The event is handled by the
+    "transactions_ingested" Celery task; while one is still pending for the account, further
+    events are dropped. Publishing never fails the caller's ingestion.
+    """
+    account_pk = str(account_pk)
+    try:
+        if not get_redis().set(f"events:transactions_ingested:{account_pk}", 1, nx=True, ex=EVENT_DEBOUNCE_SECONDS):
+            return
+        _publisher.send_task("transactions_ingested", args=[account_pk], countdown=EVENT_DEBOUNCE_SECONDS)
+    except Exception as e:
+        print(f"Failed to publish transactions_ingested event of account {account_pk}: {e}")
+
+
+async def publish_transactions_ingested_async(account_pk):
+    """
+    publish_transactions_ingested for coroutines: Redis and the broker are called from a worker
+    thread, so a slow broker does not stall the event loop.
+    """
+    await asyncio.to_thread(publish_transactions_ingested, account_pk)
+
+
+def acknowledge_transactions_ingested(account_pk):
+    """
+    Called by the handler before it starts, so that events arriving while it runs are published again.
+    """
+    try:
+        get_redis().delete(f"events:transactions_ingested:{account_pk}")
+    except RedisError as e:
+        print(f"Failed to acknowledge transactions_ingested event of account {account_pk}: {e}")
+
+
+def publish_category_rules_changed(user_id):
+    """
+    Schedules recategorizing the user's transactions. Rule edits in quick succession are handled
+    by a single run, started EVENT_DEBOUNCE_SECONDS after the first one.
+    """
+    user_id = str(user_id)
+    try:
+        if not get_redis().set(f"events:category_rules_changed:{user_id}", 1, nx=True, ex=EVENT_DEBOUNCE_SECONDS):
+            return
+        _publisher.send_task("recategorize_transactions", args=[user_id], countdown=EVENT_DEBOUNCE_SECONDS)
+    except Exception as e:
+        print(f"Failed to publish category_rules_changed event of user {user_id}: {e}")
+
+
+async def publish_category_rules_changed_async(user_id):
+    await asyncio.to_thread(publish_category_rules_changed, user_id)
+
+
+def acknowledge_category_rules_changed(user_id):
+    try:
+        get_redis().delete(f"events:category_rules_changed:{user_id}")
+    except RedisError as e:
+        print(f"Failed to acknowledge category_rules_changed event of user {user_id}: {e}")
+
+
+def publish_email_queued(countdown: float = 0):
+    """
+    Schedules a flush of the email outbox on the "email" queue. The periodic flush picks up
+    anything that could not be published.
+    """
+    try:
+        _publisher.send_task("flush_email_outbox", countdown=max(0.0, countdown), queue="email")
+    except Exception as e:
+        print(f"Failed to publish flush of the email outbox: {e}")
@@ -0,0 +1,36 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Sample = Tuple[Dict[str, str], Optional[float]]
+
+
+class MetricFamily:
+    """
+    A metric with its samples, rendered in the Prometheus text exposition format.
+    """
+
+    def __init__(self, name: str, metric_type: str, description: str):
+        self.name = name
+        self.metric_type = metric_type
+        self.description = description
+        self.samples: List[Sample] = []
+
+    def add(self, value: Optional[float], **labels: str) -> "MetricFamily":
+        self.samples.append((labels, value))
+        return self
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.metric_type}"]
+        for labels, value in self.samples:
+            if value is None:
+                continue
+            label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+            lines.append(f"{self.name}{{{label_text}}} {float(value)}" if label_text else f"{self.name} {float(value)}")
+        return "\n".join(lines)
+
+
+def render_metrics(families: Iterable[MetricFamily]) -> str:
+    return "\n".join(family.render() for family in families) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
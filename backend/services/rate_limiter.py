@@ -0,0 +1,85 @@
+import asyncio
+import os
+
+from redis.exceptions import RedisError
+
+from services.redis_client import get_async_redis
+
+ENABLE_BANKING_RATE_LIMIT = float(os.getenv('ENABLE_BANKING_RATE_LIMIT', '10'))
+ENABLE_BANKING_RATE_BURST = int(os.getenv('ENABLE_BANKING_RATE_BURST', '20'))
+
+# Returns the number of milliseconds to wait before retrying, 0 if a token was taken.
+# Uses the Redis clock so that every worker sees the same bucket.
+_TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local paused_until = tonumber(redis.call('GET', KEYS[2]) or '0')
+if paused_until > now then
+    return paused_until - now
+end
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'timestamp')
+local tokens = tonumber(state[1]) or burst
+local timestamp = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - timestamp) * rate / 1000)
+
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'timestamp', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every API and Celery process through Redis. A rate of 0 disables it.
+    If Redis is unavailable the limiter lets requests through rather than stopping synchronization.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.bucket_key = f"rate_limit:{name}:bucket"
+        self.pause_key = f"rate_limit:{name}:paused_until"
+        self.rate = rate
+        self.burst = burst
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+
+        while True:
+            try:
+                wait_ms = await get_async_redis().eval(_TAKE_TOKEN_SCRIPT, 2, self.bucket_key, self.pause_key, self.rate, self.burst)
+            except RedisError as e:
+                print(f"Rate limiter unavailable, continuing without it: {e}")
+                return
+
+            if wait_ms <= 0:
+                return
+            await asyncio.sleep(wait_ms / 1000)
+
+    async def pause(self, seconds: float):
+        """
+        Stops every process from taking tokens for `seconds`, e.g. after the upstream answered 429.
+        """
+        if self.rate <= 0:
+            return
+
+        try:
+            redis = get_async_redis()
+            time_seconds, time_microseconds = await redis.time()
+            paused_until = int(time_seconds * 1000 + time_microseconds / 1000 + seconds * 1000)
+            await redis.set(self.pause_key, paused_until, px=int(seconds * 1000) + 1000)
+        except RedisError as e:
+            print(f"Rate limiter unavailable, could not pause it: {e}")
+
+
+enable_banking_rate_limiter = RateLimiter("enable_banking", ENABLE_BANKING_RATE_LIMIT, ENABLE_BANKING_RATE_BURST)
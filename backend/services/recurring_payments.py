@@ -0,0 +1,200 @@
+import os
+import re
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List
+
+import numpy as np
+from redis.exceptions import RedisError
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from model.enable_banking.recurring_series import RecurringSeries
+from model.enable_banking.transaction import Transaction
+from services.redis_client import get_redis
+
+RECURRING_LOOKBACK_DAYS = int(os.getenv('RECURRING_LOOKBACK_DAYS', '800'))
+RECURRING_MIN_OCCURRENCES = int(os.getenv('RECURRING_MIN_OCCURRENCES', '3'))
+RECURRING_MIN_REGULARITY = float(os.getenv('RECURRING_MIN_REGULARITY', '0.75'))
+# Relative width of an amount bucket; amounts within it are considered the same payment
+RECURRING_AMOUNT_TOLERANCE = float(os.getenv('RECURRING_AMOUNT_TOLERANCE', '0.1'))
+
+EPOCH = date(1970, 1, 1)
+# (name, interval in days, allowed deviation of an interval in days)
+PERIODS = [
+    ("weekly", 7.0, 1.5),
+    ("biweekly", 14.0, 2.5),
+    ("monthly", 30.44, 4.0),
+    ("quarterly", 91.31, 10.0),
+    ("yearly", 365.25, 20.0),
+]
+
+_DIRTY_ACCOUNTS_KEY = "recurring:dirty_accounts"
+_NOISE = re.compile(r"[^a-zà-ž ]+")
+
+
+def mark_account_changed(account_pk):
+    """
+    Queues the account for the next detection run, because it received new transactions.
+    """
+    try:
+        get_redis().sadd(_DIRTY_ACCOUNTS_KEY, str(account_pk))
+    except RedisError as e:
+        print(f"Failed to queue recurring payment detection of account {account_pk}: {e}")
+
+
+def claim_changed_accounts(limit: int) -> List[str]:
+    """
+    Takes up to `limit` queued accounts. While Redis is unavailable nothing is claimed, and the
+    queued accounts are left for a later run.
+    """
+    try:
+        return [account_pk.decode() for account_pk in get_redis().spop(_DIRTY_ACCOUNTS_KEY, limit) or []]
+    except RedisError as e:
+        print(f"Failed to claim accounts for recurring payment detection: {e}")
+        return []
+
+
+def detect_recurring_payments(db: Session, account_pk, today: date = None) -> int:
+    """
+    Detects the recurring payments of an account from its recent transactions and replaces its
+    stored series with them. Returns the number of detected series.
+    """
+    today = today or date.today()
+    is_debit = Transaction.credit_debit_indicator == "DBIT"
+    counterparty = func.coalesce(case((is_debit, Transaction.creditor_name), else_=Transaction.debtor_name), Transaction.remittance_information, "")
+
+    # All columns arrive as arrays in a single row
+    counterparties, amounts, days, debits, currencies, categories = db.query(
+        func.array_agg(counterparty),
+        func.array_agg(Transaction.amount),
+        func.array_agg(Transaction.booking_date - EPOCH),
+        func.array_agg(is_debit),
+        func.array_agg(Transaction.currency),
+        func.array_agg(Transaction.category),
+    ).filter(
+        Transaction.account_id == account_pk,
+        Transaction.booking_date >= today - timedelta(days=RECURRING_LOOKBACK_DAYS),
+    ).one()
+
+    detected = detect_series(
+        np.array(counterparties or [], dtype=object),
+        np.array(amounts or [], dtype=np.float64),
+        np.array(days or [], dtype=np.int64),
+        np.array(debits or [], dtype=bool),
+        np.array(currencies or [], dtype=object),
+        np.array(categories or [], dtype=object),
+        (today - EPOCH).days,
+    )
+
+    now = datetime.utcnow()
+    db.query(RecurringSeries).filter(RecurringSeries.account_id == account_pk).delete(synchronize_session=False)
+    if detected:
+        db.bulk_insert_mappings(RecurringSeries, [
+            {**series, "id": uuid.uuid4(), "account_id": account_pk, "created_on": now, "updated_on": now}
+            for series in detected
+        ])
+    db.commit()
+
+    return len(detected)
+
+
+def detect_series(counterparties: np.ndarray, amounts: np.ndarray, days: np.ndarray, debits: np.ndarray,
+                  currencies: np.ndarray, categories: np.ndarray, today: int) -> List[dict]:
+    """
+    Groups transactions by normalized counterparty, amount bucket, direction and currency, and
+    reports the groups whose sorted booking days are spaced at a regular, known period.
+    Runs in O(n log n) with NumPy; only the detected series are touched in Python.
+    """
+    if amounts.size == 0:
+        return []
+
+    # Normalize each distinct counterparty once
+    unique_counterparties, counterparty_index = np.unique(counterparties.astype(str), return_inverse=True)
+    normalized = np.array([_normalize(name) for name in unique_counterparties], dtype=object)
+    _, normalized_ids = np.unique(normalized.astype(str), return_inverse=True)
+    counterparty_ids = normalized_ids[counterparty_index]
+
+    _, currency_ids = np.unique(currencies.astype(str), return_inverse=True)
+    buckets = np.round(np.log(np.maximum(np.abs(amounts), 0.01)) / np.log1p(RECURRING_AMOUNT_TOLERANCE)).astype(np.int64)
+
+    usable = (normalized[counterparty_index] != "") & (amounts != 0)
+    keys = np.stack([counterparty_ids, buckets, debits.astype(np.int64), currency_ids], axis=1)[usable]
+    _, groups = np.unique(keys, axis=0, return_inverse=True)
+    groups = groups.reshape(-1)
+    rows = np.flatnonzero(usable)
+
+    # Sort by group, then day, and drop repeated days within a group
+    order = np.lexsort((days[rows], groups))
+    rows, groups = rows[order], groups[order]
+    group_days = days[rows]
+    distinct = np.ones(rows.size, dtype=bool)
+    distinct[1:] = (groups[1:] != groups[:-1]) | (group_days[1:] != group_days[:-1])
+    rows, groups, group_days = rows[distinct], groups[distinct], group_days[distinct]
+
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    ends = np.r_[starts[1:], rows.size]
+    occurrences = ends - starts
+    group_count = starts.size
+
+    # Intervals between consecutive occurrences, with the group they belong to
+    same_group = groups[1:] == groups[:-1]
+    intervals = np.diff(group_days)[same_group].astype(np.float64)
+    interval_groups = np.searchsorted(starts, np.flatnonzero(same_group), side="right") - 1
+    interval_counts = np.bincount(interval_groups, minlength=group_count)
+
+    # Median interval of every group from the intervals sorted within their group
+    sorted_intervals = intervals[np.lexsort((intervals, interval_groups))]
+    interval_starts = np.r_[0, np.cumsum(interval_counts)[:-1]]
+    has_intervals = interval_counts > 0
+    lower = interval_starts + np.maximum(interval_counts - 1, 0) // 2
+    upper = interval_starts + interval_counts // 2
+    medians = np.zeros(group_count)
+    medians[has_intervals] = (sorted_intervals[lower[has_intervals]] + sorted_intervals[upper[has_intervals]]) / 2
+
+    # Nearest known period and the share of intervals close to it
+    period_lengths = np.array([length for _, length, _ in PERIODS])
+    period_tolerances = np.array([tolerance for _, _, tolerance in PERIODS])
+    period_index = np.abs(medians[:, None] - period_lengths[None, :]).argmin(axis=1)
+    matches_period = np.abs(medians - period_lengths[period_index]) <= period_tolerances[period_index]
+
+    interval_tolerance = period_tolerances[period_index][interval_groups]
+    regular = np.abs(intervals - medians[interval_groups]) <= interval_tolerance
+    regularity = np.divide(np.bincount(interval_groups, weights=regular, minlength=group_count), interval_counts,
+                           out=np.zeros(group_count), where=has_intervals)
+
+    mean_amounts = np.bincount(groups, weights=amounts[rows], minlength=group_count) / occurrences
+    minimum_occurrences = np.where(period_lengths[period_index] > 300, 2, RECURRING_MIN_OCCURRENCES)
+    recurring = has_intervals & matches_period & (occurrences >= minimum_occurrences) & (regularity >= RECURRING_MIN_REGULARITY)
+
+    detected = []
+    for group in np.flatnonzero(recurring):
+        first_row, last_row = rows[starts[group]], rows[ends[group] - 1]
+        last_day = int(days[last_row])
+        next_expected_day = last_day + int(round(medians[group]))
+        detected.append({
+            "counterparty": str(counterparties[last_row]).strip(),
+            "category": categories[last_row],
+            "credit_debit_indicator": "DBIT" if debits[last_row] else "CRDT",
+            "currency": str(currencies[last_row]),
+            "amount": round(float(mean_amounts[group]), 2),
+            "period": PERIODS[period_index[group]][0],
+            "interval_days": float(medians[group]),
+            "regularity": round(float(regularity[group]), 3),
+            "occurrences": int(occurrences[group]),
+            "first_date": EPOCH + timedelta(days=int(days[first_row])),
+            "last_date": EPOCH + timedelta(days=last_day),
+            "next_expected_date": EPOCH + timedelta(days=next_expected_day),
+            # A series is over once its next payment is overdue by more than the period's tolerance
+            "active": bool(next_expected_day + period_tolerances[period_index[group]] >= today),
+        })
+
+    return detected
+
+
+def _normalize(counterparty: str) -> str:
+    """
+    Lowercases a counterparty and strips digits and punctuation, which carry references and dates
+    (e.g. "NETFLIX.COM 8472 10/26" -> "netflix com").
+    """
+    return " ".join(_NOISE.sub(" ", counterparty.lower()).split())
@@ -0,0 +1,36 @@
+import asyncio
+import os
+from typing import Optional
+
+import redis.asyncio as aioredis
+from redis import Redis
+
+REDIS_URL = os.getenv('REDIS_URL', os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0'))
+
+_redis: Optional[Redis] = None
+_async_redis: Optional[aioredis.Redis] = None
+_async_redis_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_redis() -> Redis:
+    """
+    Returns the process-wide blocking Redis client, for synchronous code such as Celery tasks.
+    """
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(REDIS_URL)
+    return _redis
+
+
+def get_async_redis() -> aioredis.Redis:
+    """
+    Returns the process-wide asyncio Redis client, recreated when the running event loop changed.
+    """
+    global _async_redis, _async_redis_loop
+
+    loop = asyncio.get_running_loop()
+    if _async_redis is None or _async_redis_loop is not loop:
+        _async_redis = aioredis.from_url(REDIS_URL)
+        _async_redis_loop = loop
+
+    return _async_redis
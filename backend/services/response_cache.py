@@ -0,0 +1,86 @@
+import hashlib
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from redis.exceptions import RedisError
+
+from services.redis_client import get_async_redis, get_redis
+
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '300'))
+
+_STATS_KEY = "cache:stats"
+
+
+def invalidate_account(account_pk):
+    """
+    Bumps the account's version, so that every cached response computed from its data is no longer
+    found. Called after its transactions or budgets were committed.
+    """
+    try:
+        get_redis().incr(_version_key(account_pk))
+    except RedisError as e:
+        print(f"Failed to invalidate cached responses of account {account_pk}: {e}")
+
+
+async def invalidate_account_async(account_pk):
+    try:
+        await get_async_redis().incr(_version_key(account_pk))
+    except RedisError as e:
+        print(f"Failed to invalidate cached responses of account {account_pk}: {e}")
+
+
+async def get_cached_response(namespace: str, account_pks: List, **parameters) -> Tuple[Optional[str], Optional[Any]]:
+    """
+    Looks up a response computed from the given accounts, keyed on the parameters and on the current
+    version of every account. Returns (key to store the response under, cached response or None).
+    The key is None if Redis is unavailable, in which case the response is not cached.
+    """
+    account_pks = sorted(str(account_pk) for account_pk in account_pks)
+    redis = get_async_redis()
+    try:
+        versions = await redis.mget([_version_key(account_pk) for account_pk in account_pks]) if account_pks else []
+
+        fingerprint = orjson.dumps({
+            "accounts": [[account_pk, int(version or 0)] for account_pk, version in zip(account_pks, versions)],
+            "parameters": {name: str(value) for name, value in sorted(parameters.items())},
+        })
+        key = f"cache:{namespace}:{hashlib.sha1(fingerprint).hexdigest()}"
+
+        cached = await redis.get(key)
+        await redis.hincrby(_STATS_KEY, f"{namespace}:{'hit' if cached is not None else 'miss'}", 1)
+    except RedisError as e:
+        print(f"Failed to read cached {namespace} response: {e}")
+        return None, None
+
+    return key, orjson.loads(cached) if cached is not None else None
+
+
+async def set_cached_response(key: Optional[str], response: Any):
+    if key is None:
+        return
+    try:
+        await get_async_redis().set(key, orjson.dumps(response), ex=RESPONSE_CACHE_TTL)
+    except RedisError as e:
+        print(f"Failed to cache response {key}: {e}")
+
+
+async def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Returns the hit and miss counts of every namespace since the counters were created.
+    """
+    stats: Dict[str, Dict[str, int]] = {}
+    try:
+        counters = await get_async_redis().hgetall(_STATS_KEY)
+    except RedisError as e:
+        print(f"Failed to read response cache stats: {e}")
+        return stats
+
+    for field, count in counters.items():
+        namespace, result = field.decode().rsplit(":", 1)
+        stats.setdefault(namespace, {"hit": 0, "miss": 0})[result] = int(count)
+    return stats
+
+
+def _version_key(account_pk) -> str:
+    return f"cache:account_version:{account_pk}"
@@ -0,0 +1,144 @@
+from datetime import date, timedelta
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from model.enable_banking.transaction import Transaction
+
+EPOCH = date(1970, 1, 1)
+PERCENTILES = [25, 50, 75, 90, 95, 99]
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+class SpendingSeries:
+    """
+    The transactions of a set of accounts as parallel NumPy arrays: booking day as days since the
+    epoch, amount, and whether the transaction is a debit.
+    """
+
+    def __init__(self, days: np.ndarray, amounts: np.ndarray, debits: np.ndarray, date_from: date, date_until: date):
+        self.days = days
+        self.amounts = amounts
+        self.debits = debits
+        self.first_day = (date_from - EPOCH).days
+        self.last_day = (date_until - EPOCH).days
+
+    @property
+    def length(self) -> int:
+        return self.last_day - self.first_day + 1
+
+    def daily_spending(self) -> np.ndarray:
+        """
+        Total debits of every day from date_from to date_until, zero on days without any.
+        """
+        offsets = self.days[self.debits] - self.first_day
+        return np.bincount(offsets, weights=self.amounts[self.debits], minlength=self.length)[:self.length]
+
+
+def load_spending_series(db: Session, account_pks: List, date_from: date, date_until: date, currency: Optional[str] = None) -> SpendingSeries:
+    """
+    Fetches the booking days, amounts and debit flags of the accounts' transactions in the range as
+    three arrays aggregated by Postgres, so the whole history arrives in a single row.
+    """
+    query = db.query(
+        func.array_agg(Transaction.booking_date - EPOCH),
+        func.array_agg(Transaction.amount),
+        func.array_agg(Transaction.credit_debit_indicator == "DBIT"),
+    ).filter(
+        Transaction.account_id.in_(account_pks),
+        Transaction.booking_date.between(date_from, date_until),
+    )
+    if currency is not None:
+        query = query.filter(Transaction.currency == currency)
+
+    days, amounts, debits = query.one()
+    return SpendingSeries(
+        np.array(days or [], dtype=np.int64),
+        np.array(amounts or [], dtype=np.float64),
+        np.array(debits or [], dtype=bool),
+        date_from,
+        date_until,
+    )
+
+
+def rolling_averages(series: SpendingSeries, windows=(7, 30), lead_days: int = 0) -> dict:
+    """
+    Average daily spending over each trailing window, for every day after the first `lead_days`
+    days of the series (which only provide history for the first windows).
+    """
+    daily = series.daily_spending()
+    cumulative = np.concatenate(([0.0], np.cumsum(daily)))
+    indices = np.arange(lead_days, series.length)
+
+    result = {"days": [(EPOCH + timedelta(days=int(series.first_day + index))).isoformat() for index in indices]}
+    for window in windows:
+        starts = np.maximum(indices + 1 - window, 0)
+        averages = (cumulative[indices + 1] - cumulative[starts]) / window
+        result[f"average_{window}d"] = np.round(averages, 2).tolist()
+    return result
+
+
+def weekday_profile(series: SpendingSeries) -> dict:
+    """
+    Total and average spending per weekday over the range; days without spending count as zero.
+    """
+    daily = series.daily_spending()
+    # 1970-01-01 was a Thursday
+    weekdays = (np.arange(series.first_day, series.last_day + 1) + 3) % 7
+
+    totals = np.bincount(weekdays, weights=daily, minlength=7)
+    occurrences = np.bincount(weekdays, minlength=7)
+    averages = np.divide(totals, occurrences, out=np.zeros(7), where=occurrences > 0)
+
+    return {
+        weekday: {"total": round(float(totals[index]), 2), "average": round(float(averages[index]), 2)}
+        for index, weekday in enumerate(WEEKDAYS)
+    }
+
+
+def transaction_sizes(series: SpendingSeries) -> dict:
+    """
+    Distribution of the amounts of the individual debit transactions.
+    """
+    amounts = series.amounts[series.debits]
+    if amounts.size == 0:
+        return {"count": 0, "mean": None, "median": None, "percentiles": {str(percentile): None for percentile in PERCENTILES}}
+
+    values = np.percentile(amounts, PERCENTILES)
+    return {
+        "count": int(amounts.size),
+        "mean": round(float(amounts.mean()), 2),
+        "median": round(float(np.median(amounts)), 2),
+        "percentiles": {str(percentile): round(float(value), 2) for percentile, value in zip(PERCENTILES, values)},
+    }
+
+
+def monthly_changes(series: SpendingSeries) -> List[dict]:
+    """
+    Spending and income of every month in the range, with the change of spending from the previous month.
+    """
+    first_month = np.datetime64(EPOCH + timedelta(days=series.first_day), "M")
+    last_month = np.datetime64(EPOCH + timedelta(days=series.last_day), "M")
+    month_count = int((last_month - first_month).astype(int)) + 1
+
+    months = (series.days.astype("datetime64[D]").astype("datetime64[M]") - first_month).astype(np.int64)
+    spending = np.bincount(months[series.debits], weights=series.amounts[series.debits], minlength=month_count)
+    income = np.bincount(months[~series.debits], weights=series.amounts[~series.debits], minlength=month_count)
+
+    deltas = np.diff(spending, prepend=np.nan)
+    previous = np.concatenate(([np.nan], spending[:-1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        changes = np.where(previous > 0, deltas / previous * 100, np.nan)
+
+    return [
+        {
+            "month": str(first_month + index),
+            "spending": round(float(spending[index]), 2),
+            "income": round(float(income[index]), 2),
+            "spending_delta": None if np.isnan(deltas[index]) else round(float(deltas[index]), 2),
+            "spending_change_percent": None if np.isnan(changes[index]) else round(float(changes[index]), 1),
+        }
+        for index in range(month_count)
+    ]
@@ -0,0 +1,165 @@
+import csv
+import io
+import os
+import time
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import BinaryIO, Iterator, Optional
+
+from sqlalchemy import UUID, column, func, literal, select, table, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from model.budgets.budget import Budget
+from model.enable_banking.transaction import Transaction
+from services.budget_spending import recalculate_budget_spend
+from services.categorization import TransactionClassifier, get_account_classifier
+from services.daily_account_summary import rebuild_daily_account_summary
+from services.events import publish_transactions_ingested
+from services.response_cache import invalidate_account
+from services.statement_parsers import StatementFormatError, parse_statement
+from services.transaction_ingestion import UPDATABLE_COLUMNS, IngestResult, map_transaction, upsert_transactions
+
+# Parsed transactions categorized and handed to COPY at a time
+STATEMENT_IMPORT_BATCH_SIZE = int(os.getenv('STATEMENT_IMPORT_BATCH_SIZE', '5000'))
+
+STAGING_TABLE = "statement_import_staging"
+STAGING_COLUMNS = ["line", "reference", *UPDATABLE_COLUMNS]
+STAGING_DDL = f"""
+    CREATE TEMPORARY TABLE {STAGING_TABLE} (
+        line bigint NOT NULL,
+        reference text NOT NULL,
+        booking_date date NOT NULL,
+        transaction_date date NOT NULL,
+        amount double precision NOT NULL,
+        currency text NOT NULL,
+        credit_debit_indicator text,
+        status text,
+        remittance_information text,
+        merchant_category_code text,
+        creditor_name text,
+        debtor_name text,
+        bank_transaction_code text,
+        category text
+    ) ON COMMIT DROP
+"""
+
+
+class ImportResult(IngestResult):
+    format: str
+    duration_seconds: float = 0.0
+
+
+def import_statement(db: Session, account_pk, stream: BinaryIO, statement_format: str, currency: Optional[str] = None) -> ImportResult:
+    """
+    Loads a bank statement into a statement account in one transaction. The file is parsed while
+    Postgres reads it through COPY into a temporary staging table, which is then merged into the
+    account's transactions on the statement's references, so overlapping statements of the same bank
+    dedupe. Those references never match Enable Banking ones, so callers must not import into
+    synchronized accounts. Since a statement can touch any
+    part of the history, the daily rollup and the budget ledgers of the account are recomputed
+    rather than adjusted. Raises StatementFormatError, with nothing written, if the file cannot be read.
+    """
+    started_at = time.perf_counter()
+    account_pk = uuid.UUID(str(account_pk))
+    result = ImportResult(format=statement_format)
+
+    rows = _CopySource(result, parse_statement(stream, statement_format, currency), account_pk, get_account_classifier(db, account_pk))
+
+    try:
+        db.execute(text(STAGING_DDL))
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", rows)
+        finally:
+            cursor.close()
+        if rows.error is not None:
+            raise rows.error
+
+        staging = table(STAGING_TABLE, *[column(name) for name in STAGING_COLUMNS])
+        now = datetime.utcnow()
+        # The last occurrence of a reference in the statement wins, as it does within a synchronized page
+        latest = select(
+            func.gen_random_uuid(),
+            literal(now),
+            literal(now),
+            literal(account_pk, UUID(as_uuid=True)),
+            *[staging.c[name] for name in STAGING_COLUMNS[1:]],
+        ).distinct(staging.c.reference).order_by(staging.c.reference, staging.c.line.desc())
+
+        written = db.execute(upsert_transactions(insert(Transaction).from_select(
+            ["id", "created_on", "updated_on", "account_id", *STAGING_COLUMNS[1:]], latest,
+        ))).all()
+
+        result.inserted = sum(1 for row in written if row.inserted)
+        result.updated = len(written) - result.inserted
+
+        if written:
+            rebuild_daily_account_summary(db, account_pk, commit=False)
+            for budget in db.query(Budget.id).filter(Budget.account_id == account_pk).all():
+                recalculate_budget_spend(db, budget.id)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if written:
+        invalidate_account(account_pk)
+        publish_transactions_ingested(account_pk)
+
+    result.duration_seconds = round(time.perf_counter() - started_at, 3)
+    return result
+
+
+class _CopySource:
+    """
+    Readable file of staging rows in CSV for COPY, produced from the parsed transactions a batch at a
+    time. A statement error ends the file early and is kept in `error`, to be raised once COPY returned.
+    """
+
+    def __init__(self, result: ImportResult, transactions: Iterator[dict], account_pk, classifier: TransactionClassifier):
+        self.error: Optional[StatementFormatError] = None
+        self._result = result
+        self._transactions = transactions
+        self._account_pk = account_pk
+        self._classifier = classifier
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._pending = ""
+        self._offset = 0
+
+    def read(self, size: int = -1) -> str:
+        if self._offset >= len(self._pending) and not self._fill():
+            return ""
+
+        end = len(self._pending) if size < 0 else self._offset + size
+        chunk = self._pending[self._offset:end]
+        self._offset += len(chunk)
+        return chunk
+
+    def _fill(self) -> bool:
+        batch = []
+        try:
+            for transaction in islice(self._transactions, STATEMENT_IMPORT_BATCH_SIZE):
+                number = self._result.received + len(batch) + 1
+                try:
+                    batch.append(map_transaction(transaction, self._account_pk))
+                except (KeyError, TypeError, ValueError) as e:
+                    raise StatementFormatError(f"Invalid transaction {number} of the statement: {e}")
+        except StatementFormatError as e:
+            self.error = e
+            return False
+        if not batch:
+            return False
+
+        self._classifier.classify_all(batch)
+        for row in batch:
+            self._result.received += 1
+            self._writer.writerow([self._result.received, *(row[name] for name in STAGING_COLUMNS[1:])])
+
+        self._pending, self._offset = self._buffer.getvalue(), 0
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return True
@@ -0,0 +1,309 @@
+import csv
+import hashlib
+import html
+import io
+import re
+from datetime import datetime
+from typing import BinaryIO, Dict, Iterator, List, Optional
+from xml.etree import ElementTree
+
+# Formats of uploaded bank statements
+STATEMENT_FORMATS = ["camt053", "csv", "ofx"]
+
+# Normalized CSV header -> field, for the column names banks commonly use
+CSV_COLUMNS = {
+    "reference": "reference", "transaction_id": "reference", "id": "reference", "referenca": "reference",
+    "booking_date": "booking_date", "date": "booking_date", "datum": "booking_date", "datum_knjizenja": "booking_date",
+    "transaction_date": "transaction_date", "value_date": "transaction_date", "datum_valute": "transaction_date",
+    "amount": "amount", "iznos": "amount",
+    "debit": "debit", "isplata": "debit",
+    "credit": "credit", "uplata": "credit",
+    "currency": "currency", "valuta": "currency",
+    "credit_debit_indicator": "indicator", "type": "indicator",
+    "remittance_information": "remittance", "description": "remittance", "details": "remittance", "memo": "remittance",
+    "opis": "remittance", "opis_placanja": "remittance",
+    "counterparty": "counterparty", "name": "counterparty", "payee": "counterparty", "naziv": "counterparty",
+    "merchant_category_code": "mcc", "mcc": "mcc",
+    "status": "status",
+}
+CSV_DATE_FORMATS = ["%Y-%m-%d", "%d.%m.%Y", "%d.%m.%Y.", "%d/%m/%Y", "%m/%d/%Y"]
+
+OFX_CHUNK_SIZE = 64 * 1024
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+
+class StatementFormatError(ValueError):
+    pass
+
+
+def detect_statement_format(filename: Optional[str], head: bytes) -> str:
+    """
+    Guesses the format of a statement from its file name, or else from its first bytes.
+    """
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension in ("ofx", "qfx"):
+        return "ofx"
+    if extension == "csv":
+        return "csv"
+    if extension == "xml" or head.lstrip().startswith(b"<?xml"):
+        return "ofx" if b"<OFX" in head.upper() else "camt053"
+    if b"OFXHEADER" in head or b"<OFX>" in head.upper():
+        return "ofx"
+    return "csv"
+
+
+def parse_statement(stream: BinaryIO, statement_format: str, currency: Optional[str] = None) -> Iterator[dict]:
+    """
+    Reads the transactions of a statement one at a time, in the shape the Enable Banking API returns
+    them, so that they go through the same mapping as synchronized ones. The file is never held in
+    memory as a whole. Transactions without a bank reference get one derived from their content.
+    """
+    parser = {"camt053": _parse_camt053, "csv": _parse_csv, "ofx": _parse_ofx}[statement_format]
+    occurrences: Dict[str, int] = {}
+
+    for transaction in parser(stream, currency or "EUR"):
+        if not transaction["transaction_id"]:
+            transaction["transaction_id"] = _fingerprint(transaction, occurrences)
+        yield transaction
+
+
+def _parse_camt053(stream: BinaryIO, currency: str) -> Iterator[dict]:
+    # Entries are removed from their statement once read, so only one is in memory at a time
+    parents = []
+    try:
+        for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+            if event == "start":
+                parents.append(element)
+                continue
+
+            parents.pop()
+            if _local_name(element.tag) == "Ntry":
+                yield _camt053_entry(element, currency)
+                parents[-1].remove(element)
+    except ElementTree.ParseError as e:
+        raise StatementFormatError(f"Invalid CAMT.053 file: {e}")
+
+
+def _camt053_entry(entry: ElementTree.Element, default_currency: str) -> dict:
+    amount = _find(entry, "Amt")
+    if amount is None or not amount.text:
+        raise StatementFormatError("CAMT.053 entry without an amount")
+
+    details = _find(entry, "NtryDtls", "TxDtls")
+    indicator = _find_text(entry, "CdtDbtInd")
+    parties = _find(details, "RltdPties") if details is not None else None
+
+    reference = _find_text(entry, "AcctSvcrRef") or _find_text(entry, "NtryRef")
+    if reference is None and details is not None:
+        end_to_end_id = _find_text(details, "Refs", "EndToEndId")
+        reference = _find_text(details, "Refs", "AcctSvcrRef") or (end_to_end_id if end_to_end_id != "NOTPROVIDED" else None)
+
+    remittance = [element.text.strip() for element in entry.iter() if _local_name(element.tag) == "Ustrd" and element.text]
+    if not remittance and _find_text(entry, "AddtlNtryInf"):
+        remittance = [_find_text(entry, "AddtlNtryInf")]
+
+    booking_date = _find_text(entry, "BookgDt", "Dt") or _find_text(entry, "BookgDt", "DtTm")
+    value_date = _find_text(entry, "ValDt", "Dt") or _find_text(entry, "ValDt", "DtTm")
+
+    return _transaction(
+        reference=reference,
+        booking_date=booking_date or value_date,
+        transaction_date=value_date or booking_date,
+        amount=amount.text,
+        currency=amount.get("Ccy") or default_currency,
+        indicator=indicator,
+        status=_find_text(entry, "Sts", "Cd") or _find_text(entry, "Sts") or "BOOK",
+        remittance=remittance,
+        creditor=_party_name(parties, "Cdtr"),
+        debtor=_party_name(parties, "Dbtr"),
+        code=_find_text(entry, "BkTxCd", "Prtry", "Cd") or _find_text(entry, "BkTxCd", "Domn", "Fmly", "SubFmlyCd"),
+    )
+
+
+def _party_name(parties: Optional[ElementTree.Element], role: str) -> Optional[str]:
+    if parties is None:
+        return None
+    # camt.053.001.02 has the name right under the party, later versions under Pty
+    return _find_text(parties, role, "Nm") or _find_text(parties, role, "Pty", "Nm")
+
+
+def _parse_csv(stream: BinaryIO, currency: str) -> Iterator[dict]:
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    header_line = text_stream.readline()
+    delimiter = max([";", ",", "\t"], key=header_line.count)
+    header = next(csv.reader([header_line], delimiter=delimiter), [])
+
+    fields = [CSV_COLUMNS.get(re.sub(r"\W+", "_", name.strip().lower()).strip("_")) for name in header]
+    if "booking_date" not in fields or ("amount" not in fields and "debit" not in fields and "credit" not in fields):
+        raise StatementFormatError("CSV statement needs a date column and an amount column, or debit and credit columns")
+
+    for line_number, values in enumerate(csv.reader(text_stream, delimiter=delimiter), start=2):
+        if not any(value.strip() for value in values):
+            continue
+        row = {field: value.strip() for field, value in zip(fields, values) if field is not None and value.strip()}
+
+        try:
+            if "amount" in row:
+                amount = _parse_amount(row["amount"])
+            else:
+                amount = _parse_amount(row.get("credit", "0")) - _parse_amount(row.get("debit", "0"))
+            booking_date = _parse_csv_date(row["booking_date"])
+            transaction_date = _parse_csv_date(row["transaction_date"]) if "transaction_date" in row else booking_date
+        except (KeyError, ValueError):
+            raise StatementFormatError(f"Invalid date or amount on line {line_number} of the CSV statement")
+
+        indicator = _csv_indicator(row.get("indicator")) or ("DBIT" if amount < 0 else "CRDT")
+        yield _transaction(
+            reference=row.get("reference"),
+            booking_date=booking_date,
+            transaction_date=transaction_date,
+            amount=str(abs(amount)),
+            currency=row.get("currency", currency).upper(),
+            indicator=indicator,
+            status=row.get("status", "BOOK"),
+            remittance=[row["remittance"]] if "remittance" in row else [],
+            creditor=row.get("counterparty") if indicator == "DBIT" else None,
+            debtor=row.get("counterparty") if indicator == "CRDT" else None,
+            mcc=row.get("mcc"),
+        )
+
+
+def _parse_amount(value: str) -> float:
+    value = value.replace(" ", "").replace("\u00a0", "").replace("'", "")
+    # The separator that comes last is the decimal one: 1.234,56 and 1,234.56
+    if "," in value and value.rfind(",") > value.rfind("."):
+        value = value.replace(".", "").replace(",", ".")
+    else:
+        value = value.replace(",", "")
+    return float(value) if value else 0.0
+
+
+def _parse_csv_date(value: str) -> str:
+    for date_format in CSV_DATE_FORMATS:
+        try:
+            return datetime.strptime(value[:11].strip(), date_format).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+
+def _csv_indicator(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip().upper()
+    if value in ("DBIT", "D", "DR", "DEBIT"):
+        return "DBIT"
+    if value in ("CRDT", "C", "CR", "CREDIT"):
+        return "CRDT"
+    return None
+
+
+def _parse_ofx(stream: BinaryIO, currency: str) -> Iterator[dict]:
+    # Handles both the SGML of OFX 1.x, where elements are not closed, and the XML of OFX 2.x
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8", errors="replace")
+    fields: Optional[dict] = None
+
+    for closing, name, value in _ofx_tags(text_stream):
+        if name == "CURDEF" and value:
+            currency = value
+        elif name == "STMTTRN":
+            if not closing:
+                fields = {}
+            elif fields is not None:
+                yield _ofx_transaction(fields, currency)
+                fields = None
+        elif fields is not None and not closing and value:
+            # NAME also appears inside PAYEE, the first one wins
+            fields.setdefault(name, value)
+
+
+def _ofx_tags(text_stream) -> Iterator[tuple]:
+    buffer = ""
+    while True:
+        chunk = text_stream.read(OFX_CHUNK_SIZE)
+        buffer += chunk
+        # The text after the last "<" may continue in the next chunk
+        end = len(buffer) if not chunk else max(buffer.rfind("<"), 0)
+        for match in OFX_TAG.finditer(buffer, 0, end):
+            yield match.group(1) == "/", match.group(2).upper(), html.unescape(match.group(3).strip())
+        buffer = buffer[end:]
+        if not chunk:
+            return
+
+
+def _ofx_transaction(fields: dict, currency: str) -> dict:
+    try:
+        amount = _parse_amount(fields["TRNAMT"])
+        booking_date = datetime.strptime(fields["DTPOSTED"][:8], "%Y%m%d").date().isoformat()
+        transaction_date = datetime.strptime(fields["DTUSER"][:8], "%Y%m%d").date().isoformat() if "DTUSER" in fields else booking_date
+    except (KeyError, ValueError):
+        raise StatementFormatError(f"Invalid OFX transaction {fields.get('FITID', '')}")
+
+    indicator = "DBIT" if amount < 0 else "CRDT"
+    return _transaction(
+        reference=fields.get("FITID"),
+        booking_date=booking_date,
+        transaction_date=transaction_date,
+        amount=str(abs(amount)),
+        currency=fields.get("CURSYM", currency),
+        indicator=indicator,
+        status="BOOK",
+        remittance=[fields["MEMO"]] if "MEMO" in fields else [],
+        creditor=fields.get("NAME") if indicator == "DBIT" else None,
+        debtor=fields.get("NAME") if indicator == "CRDT" else None,
+        mcc=fields.get("SIC"),
+        code=fields.get("TRNTYPE"),
+    )
+
+
+def _transaction(reference: Optional[str], booking_date: Optional[str], transaction_date: Optional[str], amount: str,
+                 currency: str, indicator: Optional[str], status: str, remittance: List[str], creditor: Optional[str] = None,
+                 debtor: Optional[str] = None, mcc: Optional[str] = None, code: Optional[str] = None) -> dict:
+    if not booking_date:
+        raise StatementFormatError(f"Transaction {reference or ''} without a booking date")
+
+    return {
+        "transaction_id": reference,
+        "booking_date": booking_date,
+        "transaction_date": transaction_date or booking_date,
+        "transaction_amount": {"amount": amount, "currency": currency},
+        "credit_debit_indicator": indicator,
+        "status": status,
+        "remittance_information": remittance,
+        "merchant_category_code": mcc,
+        "creditor": {"name": creditor} if creditor else None,
+        "debtor": {"name": debtor} if debtor else None,
+        "bank_transaction_code": {"code": code} if code else None,
+    }
+
+
+def _fingerprint(transaction: dict, occurrences: Dict[str, int]) -> str:
+    """
+    A reference that is the same every time the same statement is imported. Identical transactions
+    in one statement (two coffees on the same day) are told apart by their order.
+    """
+    content = "|".join(str(value) for value in (
+        transaction["booking_date"],
+        transaction["transaction_amount"]["amount"],
+        transaction["transaction_amount"]["currency"],
+        transaction["credit_debit_indicator"],
+        " ".join(transaction["remittance_information"]),
+        (transaction["creditor"] or transaction["debtor"] or {}).get("name"),
+    ))
+    occurrences[content] = occurrences.get(content, 0) + 1
+    return "import:" + hashlib.sha1(f"{content}|{occurrences[content]}".encode()).hexdigest()
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find(element: Optional[ElementTree.Element], *path: str) -> Optional[ElementTree.Element]:
+    for name in path:
+        if element is None:
+            return None
+        element = next((child for child in element if _local_name(child.tag) == name), None)
+    return element
+
+
+def _find_text(element: Optional[ElementTree.Element], *path: str) -> Optional[str]:
+    found = _find(element, *path)
+    return found.text.strip() if found is not None and found.text and found.text.strip() else None
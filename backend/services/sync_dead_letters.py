@@ -0,0 +1,65 @@
+import os
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from model.enable_banking.sync_dead_letter import SyncDeadLetter
+
+SYNC_DEAD_LETTER_MAX_ATTEMPTS = int(os.getenv('SYNC_DEAD_LETTER_MAX_ATTEMPTS', '8'))
+SYNC_DEAD_LETTER_BASE_DELAY = int(os.getenv('SYNC_DEAD_LETTER_BASE_DELAY', '900'))
+SYNC_DEAD_LETTER_MAX_DELAY = int(os.getenv('SYNC_DEAD_LETTER_MAX_DELAY', '86400'))
+
+
+def record_sync_failure(db: Session, account_pk, error: str) -> SyncDeadLetter:
+    """
+    Records a failed synchronization of an account and schedules its next automatic retry.
+    After SYNC_DEAD_LETTER_MAX_ATTEMPTS failures the account is parked until it is requeued.
+    """
+    dead_letter = db.query(SyncDeadLetter).filter(SyncDeadLetter.account_id == account_pk).first()
+    if dead_letter is None:
+        dead_letter = SyncDeadLetter(account_id=account_pk, attempts=0)
+        db.add(dead_letter)
+
+    now = datetime.utcnow()
+    dead_letter.attempts += 1
+    dead_letter.last_error = error
+    dead_letter.last_failed_at = now
+
+    if dead_letter.attempts >= SYNC_DEAD_LETTER_MAX_ATTEMPTS:
+        dead_letter.next_retry_at = None
+    else:
+        delay = min(SYNC_DEAD_LETTER_MAX_DELAY, SYNC_DEAD_LETTER_BASE_DELAY * 2 ** (dead_letter.attempts - 1))
+        dead_letter.next_retry_at = now + timedelta(seconds=delay)
+
+    db.commit()
+    return dead_letter
+
+
+def clear_sync_failure(db: Session, account_pk):
+    db.query(SyncDeadLetter).filter(SyncDeadLetter.account_id == account_pk).delete()
+    db.commit()
+
+
+def claim_due_dead_letters(db: Session) -> List[str]:
+    """
+    Returns the accounts whose retry is due and pushes their next retry back by one base delay,
+    so a slow retry is not enqueued twice.
+    """
+    now = datetime.utcnow()
+    dead_letters = db.query(SyncDeadLetter).filter(SyncDeadLetter.next_retry_at <= now).with_for_update(skip_locked=True).all()
+
+    for dead_letter in dead_letters:
+        dead_letter.next_retry_at = now + timedelta(seconds=SYNC_DEAD_LETTER_BASE_DELAY)
+    db.commit()
+
+    return [str(dead_letter.account_id) for dead_letter in dead_letters]
+
+
+def requeue_dead_letter(db: Session, account_pk):
+    """
+    Makes a parked account eligible for the next retry run again.
+    """
+    db.query(SyncDeadLetter).filter(SyncDeadLetter.account_id == account_pk) \
+        .update({SyncDeadLetter.attempts: 0, SyncDeadLetter.next_retry_at: datetime.utcnow()})
+    db.commit()
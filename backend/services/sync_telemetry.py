@@ -0,0 +1,116 @@
+from contextvars import ContextVar
+from datetime import datetime
+from statistics import quantiles
+from typing import List, Optional
+
+from sqlalchemy import distinct, func
+from sqlalchemy.orm import Session
+
+from model.enable_banking.account_sync_run import AccountSyncRun
+from model.enable_banking.sync_run import SyncRun
+
+
+class UpstreamStats:
+    """
+    Upstream calls made while synchronizing one account, recorded by the Enable Banking transport.
+    """
+
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.retries = 0
+        self.errors = 0
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies_ms)
+
+    def record(self, latency_ms: float, failed: bool):
+        self.latencies_ms.append(latency_ms)
+        if failed:
+            self.errors += 1
+
+    def percentiles(self) -> dict:
+        if not self.latencies_ms:
+            return {"p50": None, "p95": None, "p99": None}
+        if len(self.latencies_ms) == 1:
+            latency = round(self.latencies_ms[0], 1)
+            return {"p50": latency, "p95": latency, "p99": latency}
+
+        cut_points = quantiles(self.latencies_ms, n=100, method="inclusive")
+        return {"p50": round(cut_points[49], 1), "p95": round(cut_points[94], 1), "p99": round(cut_points[98], 1)}
+
+
+current_upstream_stats: ContextVar[Optional[UpstreamStats]] = ContextVar("current_upstream_stats", default=None)
+
+
+def start_sync_run(db: Session, trigger: str) -> str:
+    sync_run = SyncRun(trigger=trigger, status="running", started_at=datetime.utcnow())
+    db.add(sync_run)
+    db.commit()
+    return str(sync_run.id)
+
+
+def record_account_sync_run(db: Session, sync_run_id: Optional[str], result, started_at: datetime) -> AccountSyncRun:
+    """
+    Persists the outcome of synchronizing one account, `result` being an AccountSyncResult.
+    """
+    account_sync_run = AccountSyncRun(
+        sync_run_id=sync_run_id,
+        account_id=result.account_id,
+        status=result.status,
+        error=result.error,
+        started_at=started_at,
+        duration_seconds=result.duration_seconds,
+        pages=result.pages,
+        upstream_requests=result.upstream_requests,
+        upstream_latency_p50_ms=result.upstream_latency_p50_ms,
+        upstream_latency_p95_ms=result.upstream_latency_p95_ms,
+        upstream_latency_p99_ms=result.upstream_latency_p99_ms,
+        rows_received=result.transactions_received,
+        rows_inserted=result.transactions_saved,
+        rows_updated=result.transactions_updated,
+        rows_skipped=result.transactions_skipped,
+        retries=result.retries,
+        errors=result.errors,
+    )
+    db.add(account_sync_run)
+    db.commit()
+    return account_sync_run
+
+
+def finish_sync_run(db: Session, sync_run_id: str) -> Optional[SyncRun]:
+    """
+    Totals the account runs of a sync run. An account retried by Celery has several account runs;
+    it only counts as failed if none of them succeeded.
+    """
+    sync_run = db.query(SyncRun).filter(SyncRun.id == sync_run_id).first()
+    if sync_run is None:
+        return None
+
+    totals = db.query(
+        func.count(distinct(AccountSyncRun.account_id)).label("accounts"),
+        func.count(distinct(AccountSyncRun.account_id)).filter(AccountSyncRun.status == "ok").label("succeeded"),
+        func.coalesce(func.sum(AccountSyncRun.pages), 0).label("pages"),
+        func.coalesce(func.sum(AccountSyncRun.upstream_requests), 0).label("upstream_requests"),
+        func.coalesce(func.sum(AccountSyncRun.rows_inserted), 0).label("rows_inserted"),
+        func.coalesce(func.sum(AccountSyncRun.rows_updated), 0).label("rows_updated"),
+        func.coalesce(func.sum(AccountSyncRun.rows_skipped), 0).label("rows_skipped"),
+        func.coalesce(func.sum(AccountSyncRun.retries), 0).label("retries"),
+        func.coalesce(func.sum(AccountSyncRun.errors), 0).label("errors"),
+    ).filter(AccountSyncRun.sync_run_id == sync_run_id).one()
+
+    sync_run.status = "finished"
+    sync_run.finished_at = datetime.utcnow()
+    sync_run.duration_seconds = round((sync_run.finished_at - sync_run.started_at).total_seconds(), 3)
+    sync_run.accounts = totals.accounts
+    sync_run.failed_accounts = totals.accounts - totals.succeeded
+    sync_run.pages = totals.pages
+    sync_run.upstream_requests = totals.upstream_requests
+    sync_run.rows_inserted = totals.rows_inserted
+    sync_run.rows_updated = totals.rows_updated
+    sync_run.rows_skipped = totals.rows_skipped
+    sync_run.retries = totals.retries
+    sync_run.errors = totals.errors
+    db.commit()
+
+    return sync_run
@@ -0,0 +1,84 @@
+from collections import deque
+from typing import Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class KeywordMatcher(Generic[T]):
+    """
+    Aho-Corasick automaton over a fixed set of keywords. Finds every keyword in a text in a single
+    pass, however many keywords there are. Matching is case-insensitive and only whole words match,
+    so "ina" does not match inside "cinema".
+    """
+
+    def __init__(self, keywords: Dict[str, T]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # (keyword length, value) of every keyword ending in a state, including via failure links
+        self._output: List[List[Tuple[int, T]]] = [[]]
+
+        for keyword, value in keywords.items():
+            keyword = keyword.lower().strip()
+            if keyword:
+                self._add(keyword, value)
+        self._link()
+
+    def _add(self, keyword: str, value: T):
+        state = 0
+        for character in keyword:
+            next_state = self._goto[state].get(character)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][character] = next_state
+            state = next_state
+        self._output[state].append((len(keyword), value))
+
+    def _link(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail = self._fail[state]
+                while fail and character not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(character, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, int, T]]:
+        """
+        Yields (start, end, value) of every whole-word keyword occurrence in the text.
+        """
+        text = text.lower()
+        state = 0
+        for index, character in enumerate(text):
+            while state and character not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(character, 0)
+
+            for length, value in self._output[state]:
+                start = index - length + 1
+                if _is_boundary(text, start - 1) and _is_boundary(text, index + 1):
+                    yield start, index + 1, value
+
+    def find_longest(self, text: Optional[str]) -> Optional[T]:
+        """
+        Returns the value of the longest keyword in the text, the earliest one among equally long ones.
+        """
+        if not text:
+            return None
+
+        best = None
+        best_length = 0
+        for start, end, value in self.find_all(text):
+            if end - start > best_length:
+                best, best_length = value, end - start
+        return best
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not text[index].isalnum()
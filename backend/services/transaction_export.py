@@ -0,0 +1,160 @@
+import csv
+import io
+import os
+from typing import Iterable, Iterator, List, Optional
+
+import orjson
+from sqlalchemy import select
+
+from database import SessionLocal
+from model.enable_banking.transaction import Transaction
+
+# Rows fetched per round trip from the server-side cursor, and encoded per chunk of the response
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '5000'))
+
+EXPORT_COLUMNS = [
+    "reference",
+    "booking_date",
+    "transaction_date",
+    "amount",
+    "currency",
+    "credit_debit_indicator",
+    "status",
+    "remittance_information",
+    "merchant_category_code",
+    "creditor_name",
+    "debtor_name",
+    "bank_transaction_code",
+    "category",
+]
+
+# Format: (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def is_parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_transactions(account_pk, export_format: str, date_from=None, date_until=None) -> Iterator[bytes]:
+    """
+    Streams the account's transactions, oldest first, encoded as `export_format`.
+    Rows are read through a server-side cursor and encoded batch by batch, so memory stays
+    constant however long the history is. The generator opens its own session, because it
+    outlives the request that created it.
+    """
+    encoder = {"csv": _encode_csv, "ndjson": _encode_ndjson, "parquet": _encode_parquet}[export_format]
+    return encoder(_fetch_batches(account_pk, date_from, date_until))
+
+
+def _fetch_batches(account_pk, date_from, date_until) -> Iterator[List[tuple]]:
+    statement = select(*[getattr(Transaction, column) for column in EXPORT_COLUMNS]) \
+        .where(Transaction.account_id == account_pk)
+    if date_from:
+        statement = statement.where(Transaction.booking_date >= date_from)
+    if date_until:
+        statement = statement.where(Transaction.booking_date <= date_until)
+    statement = statement.order_by(Transaction.booking_date, Transaction.id)
+
+    db = SessionLocal()
+    try:
+        # yield_per makes psycopg2 use a named (server-side) cursor
+        result = db.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for batch in result.partitions():
+            yield batch
+    finally:
+        db.close()
+
+
+def _encode_csv(batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _encode_ndjson(batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(orjson.dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in batch)
+
+
+def _encode_parquet(batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (column, pa.date32() if column.endswith("_date") else pa.float64() if column == "amount" else pa.string())
+        for column in EXPORT_COLUMNS
+    ])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        # Every batch becomes one row group, handed out as soon as it is written
+        for batch in batches:
+            writer.write_table(pa.Table.from_pydict(dict(zip(EXPORT_COLUMNS, zip(*batch))), schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    # The footer, written on close
+    yield sink.drain()
+
+
+class _ChunkSink:
+    """
+    Write-only file for pyarrow whose content is taken out as it is written. Parquet records
+    absolute offsets in its footer, so tell() keeps counting what has already been taken out.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        content = b"".join(self._chunks)
+        self._chunks.clear()
+        return content
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def readable(self) -> bool:
+        return False
+
+    def seek(self, position: Optional[int], whence: int = 0):
+        raise io.UnsupportedOperation("seek")
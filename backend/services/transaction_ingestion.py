@@ -0,0 +1,136 @@
+import uuid
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.orm import Session
+
+from model.enable_banking.transaction import Transaction
+from services.budget_spending import apply_budget_spend_changes
+from services.categorization import TransactionClassifier, get_account_classifier
+from services.daily_account_summary import apply_daily_summary_changes
+
+# Columns refreshed in place when an already stored transaction is received again (e.g. PDNG -> BOOK)
+UPDATABLE_COLUMNS = [
+    "booking_date",
+    "transaction_date",
+    "amount",
+    "currency",
+    "credit_debit_indicator",
+    "status",
+    "remittance_information",
+    "merchant_category_code",
+    "creditor_name",
+    "debtor_name",
+    "bank_transaction_code",
+    "category",
+]
+
+
+class IngestResult(BaseModel):
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+
+    @property
+    def skipped(self) -> int:
+        return self.received - self.inserted - self.updated
+
+
+def map_transaction(received_transaction: dict, account_pk) -> dict:
+    """
+    Maps an Enable Banking transaction to the column values of a Transaction row. Pending
+    transactions may lack a booking or a transaction date, in which case the other one is used.
+    """
+    now = datetime.utcnow()
+    booking_date = _parse_date(received_transaction.get("booking_date"))
+    transaction_date = _parse_date(received_transaction.get("transaction_date"))
+    return {
+        "id": uuid.uuid4(),
+        "created_on": now,
+        "updated_on": now,
+        "account_id": account_pk,
+        "reference": received_transaction.get("transaction_id") or received_transaction.get("entry_reference"),
+        "booking_date": booking_date or transaction_date,
+        "transaction_date": transaction_date or booking_date,
+        "amount": float(received_transaction["transaction_amount"]["amount"]),
+        "currency": received_transaction["transaction_amount"]["currency"],
+        "credit_debit_indicator": received_transaction.get("credit_debit_indicator"),
+        "status": received_transaction.get("status"),
+        "remittance_information": " ".join(received_transaction.get("remittance_information") or []),
+        "merchant_category_code": received_transaction.get("merchant_category_code"),
+        "creditor_name": (received_transaction.get("creditor") or {}).get("name"),
+        "debtor_name": (received_transaction.get("debtor") or {}).get("name"),
+        "bank_transaction_code": (received_transaction.get("bank_transaction_code") or {}).get("code"),
+    }
+
+
+def ingest_transactions(db: Session, account_pk, received_transactions: List[dict], commit: bool = True,
+                        classifier: Optional[TransactionClassifier] = None) -> IngestResult:
+    """
+    Writes a page of Enable Banking transactions in a single INSERT ... ON CONFLICT statement.
+    New transactions are inserted, and stored ones are updated in place only when something changed
+    (typically a pending transaction that has been booked). Budget spend ledgers and the daily
+    account rollup are adjusted in the same transaction. Commits once per page unless `commit` is False.
+    Every row is categorized on the way in, by `classifier` or else by one built from the owner's rules.
+    """
+    result = IngestResult(received=len(received_transactions))
+
+    rows: Dict[str, dict] = {}
+    for received_transaction in received_transactions:
+        row = map_transaction(received_transaction, account_pk)
+        # Rows without a reference or without any date cannot be stored; they count as skipped
+        if row["reference"] is None or row["booking_date"] is None:
+            continue
+        # ON CONFLICT cannot touch the same row twice in one statement, so the last occurrence wins
+        rows[row["reference"]] = row
+
+    if not rows:
+        return result
+
+    (classifier or get_account_classifier(db, account_pk)).classify_all(rows.values())
+
+    # Previous values of already stored rows, so that derived counters can remove what they counted before
+    previous = {
+        row.reference: row._asdict()
+        for row in db.query(*[getattr(Transaction, column) for column in ["reference", *UPDATABLE_COLUMNS]])
+            .filter(Transaction.account_id == account_pk, Transaction.reference.in_(list(rows.keys())))
+    }
+
+    written = db.execute(upsert_transactions(insert(Transaction).values(list(rows.values())))).all()
+
+    changes = [(None if row.inserted else previous.get(row.reference), rows[row.reference]) for row in written]
+    apply_budget_spend_changes(db, account_pk, changes)
+    apply_daily_summary_changes(db, account_pk, changes)
+
+    if commit:
+        db.commit()
+
+    result.inserted = sum(1 for row in written if row.inserted)
+    result.updated = len(written) - result.inserted
+
+    return result
+
+
+def upsert_transactions(statement: Insert) -> Insert:
+    """
+    Turns an INSERT of transactions into the upsert used by every ingestion path: stored rows are
+    updated only when something changed, and (reference, inserted) is returned for every written row.
+    """
+    excluded = statement.excluded
+    return statement.on_conflict_do_update(
+        index_elements=[Transaction.account_id, Transaction.reference],
+        set_={
+            **{column: excluded[column] for column in UPDATABLE_COLUMNS},
+            "updated_on": excluded.updated_on,
+        },
+        where=(Transaction.status.is_distinct_from(excluded.status))
+            | (Transaction.booking_date.is_distinct_from(excluded.booking_date))
+            | (Transaction.amount.is_distinct_from(excluded.amount)),
+    ).returning(Transaction.reference, literal_column("(xmax = 0)").label("inserted"))
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value[:10]) if value else None
@@ -1,74 +1,378 @@
+import asyncio
+import os
+import time
+from datetime import date, datetime, timedelta
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
 import httpx
+import ijson
+from pydantic import BaseModel
 
 from database import SessionLocal
-from model.enable_banking.account import Account
-from model.enable_banking.transaction import Transaction
+from model.enable_banking.account import ENABLE_BANKING_SOURCE, Account
+from model.enable_banking.sync_dead_letter import SyncDeadLetter
+from model.enable_banking.sync_state import AccountSyncState
 from model.users.user import User
+from sqlalchemy import or_
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from settings import settings
-from utils.authorization_key import EnableBankingAuth
+from services.categorization import get_account_classifier
+from services.enable_banking_client import get_enable_banking_client
+from services.events import publish_transactions_ingested_async
+from services.response_cache import invalidate_account_async
+from services.sync_dead_letters import clear_sync_failure, record_sync_failure
+from services.sync_telemetry import UpstreamStats, current_upstream_stats, finish_sync_run, record_account_sync_run, start_sync_run
+from services.transaction_ingestion import ingest_transactions
+
+SYNC_CONCURRENCY = int(os.getenv('SYNC_CONCURRENCY', '16'))
+SYNC_PER_USER_CONCURRENCY = int(os.getenv('SYNC_PER_USER_CONCURRENCY', '2'))
+SYNC_OVERLAP_DAYS = int(os.getenv('SYNC_OVERLAP_DAYS', '3'))
+SYNC_INGEST_BATCH_SIZE = int(os.getenv('SYNC_INGEST_BATCH_SIZE', '500'))
+SYNC_PIPELINE_DEPTH = int(os.getenv('SYNC_PIPELINE_DEPTH', '4'))
+
+
+class AccountSyncResult(BaseModel):
+    account_id: str
+    user_id: str
+    status: str = "ok"
+    pages: int = 0
+    transactions_received: int = 0
+    transactions_saved: int = 0
+    transactions_updated: int = 0
+    transactions_skipped: int = 0
+    duration_seconds: float = 0.0
+    upstream_requests: int = 0
+    upstream_latency_p50_ms: Optional[float] = None
+    upstream_latency_p95_ms: Optional[float] = None
+    upstream_latency_p99_ms: Optional[float] = None
+    retries: int = 0
+    errors: int = 0
+    error: Optional[str] = None
 
 
-async def synchronize_transactions(providedDb: Session):
+async def synchronize_transactions(
+    providedDb: Optional[Session] = None,
+    concurrency: int = SYNC_CONCURRENCY,
+    per_user_concurrency: int = SYNC_PER_USER_CONCURRENCY,
+    trigger: str = "manual",
+) -> List[dict]:
+    """
+    Synchronizes transactions of every linked account, fetching up to `concurrency` accounts at once.
+    A single user never occupies more than `per_user_concurrency` of those slots, and accounts are
+    scheduled round-robin across users so large users cannot starve small ones.
+    Returns one summary per account, which are also recorded under a single sync run.
+    """
     db = providedDb
     if db is None:
         db = SessionLocal()
     try:
-        users = db.query(User).filter(
-            User.eb_session_id.isnot(None)
-        ).all()
+        accounts = get_accounts_to_synchronize(db)
+        sync_run_id = start_sync_run(db, trigger)
+    finally:
+        if providedDb is None:
+            db.close()
+
+    global_slots = asyncio.Semaphore(max(1, concurrency))
+    user_slots: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(max(1, per_user_concurrency)))
+
+    async def run(account_pk, eb_account_id, user_id) -> AccountSyncResult:
+        async with user_slots[user_id]:
+            async with global_slots:
+                return await synchronize_account(account_pk, eb_account_id, user_id, sync_run_id)
+
+    results = await asyncio.gather(*[
+        run(account_pk, eb_account_id, user_id)
+        for account_pk, eb_account_id, user_id in accounts
+    ])
+
+    db = SessionLocal()
+    try:
+        finish_sync_run(db, sync_run_id)
+    finally:
+        db.close()
+
+    return [result.model_dump() for result in results]
+
+
+def get_accounts_to_synchronize(db: Session) -> list:
+    """
+    Returns (id, account_id, user_id) of every Enable Banking account whose user has a session,
+    ordered round-robin by user. Statement accounts are never synchronized. Dead-lettered accounts are skipped until their retry is due.
+    """
+    accounts = db.query(Account.id, Account.account_id, Account.user_id) \
+        .join(User, User.id == Account.user_id) \
+        .outerjoin(SyncDeadLetter, SyncDeadLetter.account_id == Account.id) \
+        .filter(User.eb_session_id.isnot(None), Account.source == ENABLE_BANKING_SOURCE) \
+        .filter(or_(SyncDeadLetter.id.is_(None), SyncDeadLetter.next_retry_at <= datetime.utcnow())) \
+        .all()
+
+    return _interleave_by_user(accounts)
+
+
+async def synchronize_account_by_id(account_pk, sync_run_id: Optional[str] = None, record_failure: bool = True) -> dict:
+    """
+    Synchronizes a single account identified by its primary key. Used by the per-account Celery task,
+    which only records a failure as a dead letter once it will not retry the account itself.
+    """
+    db = SessionLocal()
+    try:
+        account = db.query(Account).filter(Account.id == account_pk).first()
+    finally:
+        db.close()
+
+    if account is None:
+        return AccountSyncResult(account_id=str(account_pk), user_id="", status="failed", error="Account not found").model_dump()
+
+    result = await synchronize_account(account.id, account.account_id, account.user_id, sync_run_id, record_failure)
+    return result.model_dump()
+
+
+async def synchronize_account(account_pk, eb_account_id: str, user_id, sync_run_id: Optional[str] = None,
+                              record_failure: bool = True) -> AccountSyncResult:
+    """
+    Pages through the Enable Banking transactions of a single account and upserts them in batches,
+    fetching the next page while the current one is written.
+    Only transactions booked since the account's watermark (minus SYNC_OVERLAP_DAYS) are requested,
+    and an interrupted run resumes from the stored continuation key.
+    Uses its own session so that accounts can be synchronized concurrently. A failure counts as a
+    dead-letter attempt unless `record_failure` is False.
+    """
+    result = AccountSyncResult(account_id=str(account_pk), user_id=str(user_id))
+    started_on = datetime.utcnow()
+    started_at = time.perf_counter()
+    upstream_stats = UpstreamStats()
+    upstream_stats_token = current_upstream_stats.set(upstream_stats)
+
+    db = SessionLocal()
+    try:
+        sync_state = db.query(AccountSyncState).filter(AccountSyncState.account_id == account_pk).first()
+        if sync_state is None:
+            sync_state = AccountSyncState(account_id=account_pk)
+            db.add(sync_state)
+            db.commit()
+
+        params = {}
+        if sync_state.last_booking_date is not None:
+            params["date_from"] = (sync_state.last_booking_date - timedelta(days=SYNC_OVERLAP_DAYS)).isoformat()
+        continuation_key = sync_state.continuation_key
+        watermark = _Watermark(sync_state.last_booking_date)
+        classifier = get_account_classifier(db, account_pk)
+
+        # The producer downloads and parses pages while this coroutine writes them, so the next page
+        # is already being fetched while the current one is stored. The bounded queue caps memory.
+        pages: asyncio.Queue = asyncio.Queue(maxsize=SYNC_PIPELINE_DEPTH)
+        producer = asyncio.create_task(_fetch_pages(eb_account_id, params, continuation_key, pages))
+        try:
+            while True:
+                kind, value = await pages.get()
+
+                if kind == "transactions":
+                    watermark.observe(value)
+                    ingested = await asyncio.to_thread(ingest_transactions, db, account_pk, value, False, classifier)
+                    result.transactions_received += ingested.received
+                    result.transactions_saved += ingested.inserted
+                    result.transactions_updated += ingested.updated
+                    result.transactions_skipped += ingested.skipped
+                elif kind == "page":
+                    await asyncio.to_thread(_commit_page, db, sync_state, value)
+                    result.pages += 1
+                    if value is None:
+                        break
+                else:
+                    db.rollback()
+                    result.status = "failed"
+                    result.error = value
+                    break
+        finally:
+            if not producer.done():
+                producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+        if result.status == "ok":
+            sync_state.last_booking_date = watermark.value
+            sync_state.last_synced_at = datetime.utcnow()
+            sync_state.continuation_key = None
+            db.commit()
+    except (httpx.HTTPError, SQLAlchemyError, KeyError, ValueError) as e:
+        db.rollback()
+        result.status = "failed"
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        if result.transactions_saved or result.transactions_updated:
+            await invalidate_account_async(account_pk)
+            await publish_transactions_ingested_async(account_pk)
+        current_upstream_stats.reset(upstream_stats_token)
+        result.duration_seconds = round(time.perf_counter() - started_at, 3)
+        _apply_upstream_stats(result, upstream_stats)
+        _record_outcome(db, account_pk, result, sync_run_id, started_on, record_failure)
+        db.close()
+
+    print(f"Synchronized account {eb_account_id}: {result.transactions_saved} new transactions in {result.pages} pages ({result.status})")
+
+    return result
+
+
+def _apply_upstream_stats(result: AccountSyncResult, upstream_stats: UpstreamStats):
+    latencies = upstream_stats.percentiles()
+    result.upstream_requests = upstream_stats.requests
+    result.upstream_latency_p50_ms = latencies["p50"]
+    result.upstream_latency_p95_ms = latencies["p95"]
+    result.upstream_latency_p99_ms = latencies["p99"]
+    result.retries = upstream_stats.retries
+    result.errors = upstream_stats.errors + (1 if result.status != "ok" else 0)
+
+
+def _record_outcome(db: Session, account_pk, result: AccountSyncResult, sync_run_id: Optional[str], started_on: datetime,
+                    record_failure: bool):
+    try:
+        record_account_sync_run(db, sync_run_id, result, started_on)
+        if result.status == "ok":
+            clear_sync_failure(db, account_pk)
+        elif record_failure:
+            record_sync_failure(db, account_pk, result.error)
+    except SQLAlchemyError as e:
+        db.rollback()
+        print(f"Failed to record synchronization outcome of account {account_pk}: {e}")
 
-        headers = {"Authorization": f"Bearer {EnableBankingAuth.get_enable_banking_jwt()}"}
 
-        for user in users:
+def _commit_page(db: Session, sync_state: AccountSyncState, continuation_key: Optional[str]):
+    """
+    Commits the batches of a page together with the continuation key of the next one.
+    """
+    sync_state.continuation_key = continuation_key
+    db.commit()
 
-            accounts = db.query(Account).filter(Account.user_id == user.id).all()
 
-            for account in accounts:
+async def _fetch_pages(eb_account_id: str, params: dict, continuation_key: Optional[str], pages: asyncio.Queue):
+    """
+    Streams the transaction pages of an account into `pages` as ("transactions", batch) items,
+    followed by ("page", next_continuation_key) once a page is complete, or ("error", message).
+    """
+    client = get_enable_banking_client()
+    try:
+        while True:
+            page_params = dict(params)
+            if continuation_key is not None:
+                page_params["continuation_key"] = continuation_key
+
+            async with client.stream("GET", f"/accounts/{eb_account_id}/transactions", params=page_params) as eb_response:
+                if eb_response.is_error:
+                    await pages.put(("error", f"Enable Banking responded with {eb_response.status_code}"))
+                    return
 
-                should_continue = True
                 continuation_key = None
-                iterations = 0
-
-                while should_continue:
-                    async with httpx.AsyncClient() as client:
-                        eb_response = await client.get(f"{settings.enable_banking_api_url}/accounts/{account.account_id}/transactions", headers=headers, params={"continuation_key": continuation_key})
-                        if eb_response.is_error:
-                            continue
-
-                    received_transactions = eb_response.json()["transactions"]
-
-                    for received_transaction in received_transactions:
-                        if db.query(Transaction).filter(Transaction.reference == (received_transaction["transaction_id"] or received_transaction["entry_reference"])).first() is not None:
-                            continue
-
-                        transaction = Transaction()
-                        transaction.reference = received_transaction["transaction_id"] or received_transaction["entry_reference"]
-                        transaction.booking_date = received_transaction["booking_date"]
-                        transaction.transaction_date = received_transaction["transaction_date"]
-                        transaction.amount = float(received_transaction["transaction_amount"]["amount"])
-                        transaction.currency = received_transaction["transaction_amount"]["currency"]
-                        transaction.credit_debit_indicator = received_transaction["credit_debit_indicator"]
-                        transaction.status = received_transaction["status"]
-                        transaction.remittance_information = " ".join(received_transaction.get("remittance_information", []))
-                        transaction.merchant_category_code = received_transaction.get("merchant_category_code")
-                        transaction.creditor_name = received_transaction.get("creditor", {}).get("name")
-                        transaction.debtor_name = received_transaction.get("debtor", {}).get("name")
-                        transaction.account_id = account.id
-                        db.add(transaction)
-                        db.commit()
-                        db.refresh(transaction)
-
-                    iterations += 1
-                    print(f"Successfuly synchronized {len(received_transactions)} transactions in {iterations}. iteration")
-                    
-                    if eb_response.json()["continuation_key"] is not None:
-                        continuation_key = eb_response.json()["continuation_key"]
+                async for kind, value in _parse_page(eb_response):
+                    if kind == "transactions":
+                        await pages.put((kind, value))
                     else:
-                        should_continue = False
+                        continuation_key = value
 
+            await pages.put(("page", continuation_key))
+            if continuation_key is None:
+                return
+    except Exception as e:
+        # Whatever ends the producer must reach the consumer, which otherwise waits on the queue forever
+        await pages.put(("error", f"{type(e).__name__}: {e}"))
 
-        return "Transactions synchronized"
-    finally:
-        if providedDb is None:
-            db.close()
\ No newline at end of file
+
+async def _parse_page(eb_response: httpx.Response):
+    """
+    Incrementally decodes a transactions page, yielding ("transactions", batch) for every
+    SYNC_INGEST_BATCH_SIZE transactions and finally ("continuation_key", value).
+    Only one batch is held in memory at a time, never the whole payload.
+    """
+    batch = []
+    builder = None
+    continuation_key = None
+
+    async for prefix, event, value in ijson.parse_async(_ResponseReader(eb_response), use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == "transactions.item" and event == "end_map":
+                batch.append(builder.value)
+                builder = None
+                if len(batch) >= SYNC_INGEST_BATCH_SIZE:
+                    yield "transactions", batch
+                    batch = []
+        elif prefix == "transactions.item" and event == "start_map":
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+        elif prefix == "continuation_key" and event in ("string", "null"):
+            continuation_key = value
+
+    if batch:
+        yield "transactions", batch
+    yield "continuation_key", continuation_key
+
+
+class _ResponseReader:
+    """
+    Exposes a streamed httpx response as the async file-like object ijson reads from.
+    """
+
+    def __init__(self, response: httpx.Response):
+        self._chunks = response.aiter_bytes()
+        self._buffer = b""
+
+    async def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            try:
+                self._buffer += await self._chunks.__anext__()
+            except StopAsyncIteration:
+                break
+
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+class _Watermark:
+    """
+    Tracks the booking date the next run may start from: the latest booked transaction,
+    held back to the earliest still pending one so it is fetched again once booked.
+    """
+
+    def __init__(self, last_booking_date: Optional[date]):
+        self.latest_booked = last_booking_date
+        self.earliest_pending: Optional[date] = None
+
+    def observe(self, received_transactions: list):
+        for received_transaction in received_transactions:
+            day = received_transaction.get("booking_date") or received_transaction.get("transaction_date")
+            if day is None:
+                continue
+            day = date.fromisoformat(day[:10])
+
+            if received_transaction.get("status") == "BOOK":
+                if self.latest_booked is None or day > self.latest_booked:
+                    self.latest_booked = day
+            elif self.earliest_pending is None or day < self.earliest_pending:
+                self.earliest_pending = day
+
+    @property
+    def value(self) -> Optional[date]:
+        if self.earliest_pending is not None and (self.latest_booked is None or self.earliest_pending < self.latest_booked):
+            return self.earliest_pending
+        return self.latest_booked
+
+
+def _interleave_by_user(accounts: list) -> list:
+    """
+    Orders accounts round-robin by user: first account of every user, then the second one, etc.
+    """
+    per_user: Dict[str, deque] = defaultdict(deque)
+    for account in accounts:
+        per_user[account.user_id].append(account)
+
+    queues = deque(per_user.values())
+    ordered = []
+    while queues:
+        queue = queues.popleft()
+        ordered.append(queue.popleft())
+        if queue:
+            queues.append(queue)
+
+    return ordered
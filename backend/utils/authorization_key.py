@@ -1,22 +1,49 @@
 from settings import settings
-import os
-from datetime import datetime
+import threading
+import time
 import jwt as pyjwt
 
 class EnableBankingAuth:
-    @staticmethod
-    def get_enable_banking_jwt():
-        iat = int(datetime.now().timestamp())
-        jwt_body = {
-            "iss": "enablebanking.com",
-            "aud": "api.enablebanking.com",
-            "iat": iat,
-            "exp": iat + 3600,
-        }
-        jwt = pyjwt.encode(
-            jwt_body,
-            open(settings.enable_banking_key_path, "rb").read(),
-            algorithm="RS256",
-            headers={"kid": settings.enable_banking_application_id},
-        )
-        return jwt
\ No newline at end of file
+    TOKEN_LIFETIME = 3600
+    REFRESH_MARGIN = 300
+
+    _private_key = None
+    _token = None
+    _token_expires_at = 0
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_enable_banking_jwt(cls):
+        """
+        Returns the cached application JWT, signing a new one only when it is about to expire.
+        """
+        if cls._token is None or time.time() >= cls._token_expires_at - cls.REFRESH_MARGIN:
+            cls.refresh_enable_banking_jwt()
+        return cls._token
+
+    @classmethod
+    def refresh_enable_banking_jwt(cls):
+        with cls._lock:
+            if cls._private_key is None:
+                with open(settings.enable_banking_key_path, "rb") as key_file:
+                    cls._private_key = key_file.read()
+
+            iat = int(time.time())
+            jwt_body = {
+                "iss": "enablebanking.com",
+                "aud": "api.enablebanking.com",
+                "iat": iat,
+                "exp": iat + cls.TOKEN_LIFETIME,
+            }
+            cls._token = pyjwt.encode(
+                jwt_body,
+                cls._private_key,
+                algorithm="RS256",
+                headers={"kid": settings.enable_banking_application_id},
+            )
+            cls._token_expires_at = jwt_body["exp"]
+            return cls._token
+
+    @classmethod
+    def seconds_until_refresh(cls) -> float:
+        return max(0.0, cls._token_expires_at - cls.REFRESH_MARGIN - time.time())
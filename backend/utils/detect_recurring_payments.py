@@ -0,0 +1,30 @@
+"""
+Detects the recurring payments of every account, or of one, regardless of whether it received
+new transactions. The periodic job only analyses accounts that did.
+
+    python -m utils.detect_recurring_payments [--account-id <account pk>]
+"""
+import argparse
+
+from database import SessionLocal
+from model.enable_banking.account import Account
+from services.recurring_payments import detect_recurring_payments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--account-id", default=None, help="only this account, all accounts by default")
+    arguments = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        account_pks = [arguments.account_id] if arguments.account_id else [row.id for row in db.query(Account.id)]
+        detected = sum(detect_recurring_payments(db, account_pk) for account_pk in account_pks)
+    finally:
+        db.close()
+
+    print(f"Detected {detected} recurring series in {len(account_pks)} accounts.")
+
+
+if __name__ == "__main__":
+    main()
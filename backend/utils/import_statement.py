@@ -0,0 +1,45 @@
+"""
+Imports a CAMT.053, CSV or OFX bank statement into a statement account (one not synchronized
+through Enable Banking).
+
+    python -m utils.import_statement <account pk> <statement file> [--format camt053|csv|ofx] [--currency EUR]
+"""
+import argparse
+
+from database import SessionLocal
+from model.enable_banking.account import STATEMENT_SOURCE, Account
+from services.statement_import import import_statement
+from services.statement_parsers import STATEMENT_FORMATS, StatementFormatError, detect_statement_format
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("account_id", help="pk of the account the transactions belong to")
+    parser.add_argument("path", help="statement file")
+    parser.add_argument("--format", choices=STATEMENT_FORMATS, default=None, help="detected from the file by default")
+    parser.add_argument("--currency", default=None, help="for statements without one, the account's currency by default")
+    arguments = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        account = db.query(Account).filter(Account.id == arguments.account_id).first()
+        if account is None:
+            parser.error(f"Account {arguments.account_id} not found")
+        if account.source != STATEMENT_SOURCE:
+            parser.error(f"Account {arguments.account_id} is synchronized through Enable Banking, statements can only be imported into statement accounts")
+
+        with open(arguments.path, "rb") as statement:
+            statement_format = arguments.format or detect_statement_format(arguments.path, statement.read(512))
+            statement.seek(0)
+            result = import_statement(db, account.id, statement, statement_format, arguments.currency or account.currency)
+    except StatementFormatError as e:
+        parser.exit(1, f"Statement not imported: {e}\n")
+    finally:
+        db.close()
+
+    print(f"Imported {arguments.path} ({result.format}) in {result.duration_seconds:.2f} s: {result.received} received, "
+          f"{result.inserted} inserted, {result.updated} updated, {result.skipped} skipped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Rebuilds the daily account rollup from the stored transactions, e.g. after a backfill.
+
+    python -m utils.rebuild_daily_account_summary [--account-id <account pk>]
+"""
+import argparse
+
+from database import SessionLocal
+from services.daily_account_summary import rebuild_daily_account_summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--account-id", default=None, help="only this account, all accounts by default")
+    arguments = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        written = rebuild_daily_account_summary(db, arguments.account_id)
+    finally:
+        db.close()
+
+    print(f"Rebuilt daily account summary, {written} rows written.")
+
+
+if __name__ == "__main__":
+    main()
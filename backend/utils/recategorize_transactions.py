@@ -0,0 +1,30 @@
+"""
+Categorizes stored transactions again, e.g. after the categorization tables changed or to
+backfill transactions stored before categorization existed.
+
+    python -m utils.recategorize_transactions [--user-id <user id>]
+"""
+import argparse
+
+from database import SessionLocal
+from model.users.user import User
+from services.categorization import recategorize_transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", default=None, help="only this user's transactions, all users by default")
+    arguments = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user_ids = [arguments.user_id] if arguments.user_id else [row.id for row in db.query(User.id)]
+        changed = sum(recategorize_transactions(db, user_id) for user_id in user_ids)
+    finally:
+        db.close()
+
+    print(f"Recategorized transactions of {len(user_ids)} users, {changed} categories changed.")
+
+
+if __name__ == "__main__":
+    main()